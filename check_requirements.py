@@ -1,8 +1,9 @@
 """
 LangGraph Invoice Processing Agent - Requirements Checklist
 """
-import json
 import os
+from src.config import load_json, load_workflow
+from src._checks import resolve
 
 print('=' * 70)
 print('LANGGRAPH INVOICE PROCESSING AGENT - REQUIREMENTS CHECKLIST')
@@ -12,15 +13,17 @@ print()
 # 1. Check workflow.json
 print('1. LANGGRAPH AGENT CONFIG (workflow.json)')
 print('-' * 50)
-with open('workflow.json', 'r') as f:
-    wf = json.load(f)
-print(f'   Version: {wf.get("version")}')
-print(f'   Workflow Name: {wf.get("workflow_name")}')
-print(f'   Stages Count: {len(wf.get("stages", []))}')
-stages = [s['id'] for s in wf.get('stages', [])]
-print(f'   Stages: {stages}')
-print(f'   Match Threshold: {wf["config"]["match_threshold"]}')
-print(f'   Human Review API: {wf["human_review_api_contract"]["list_pending_endpoint"]["path"]}')
+wf = load_workflow()
+version, workflow_name, stages_list = wf["version"], wf["workflow_name"], wf["stages"]
+cfg = wf["config"]
+hitl = wf["human_review_api_contract"]["list_pending_endpoint"]
+stage_ids = [s["id"] for s in stages_list]
+print(f'   Version: {version}')
+print(f'   Workflow Name: {workflow_name}')
+print(f'   Stages Count: {len(stages_list)}')
+print(f'   Stages: {stage_ids}')
+print(f'   Match Threshold: {cfg["match_threshold"]}')
+print(f'   Human Review API: {hitl["path"]}')
 print('   ✅ workflow.json COMPLETE')
 print()
 
@@ -28,9 +31,12 @@ print()
 print('2. LANGGRAPH NODES (12 stages)')
 print('-' * 50)
 nodes_dir = 'src/nodes'
-node_files = [f for f in os.listdir(nodes_dir) if f.endswith('.py') and f != '__init__.py']
+node_files = sorted(
+    e.name for e in os.scandir(nodes_dir)
+    if e.is_file() and e.name.endswith('.py') and e.name != '__init__.py'
+)
 print(f'   Node files: {len(node_files)}')
-for nf in sorted(node_files):
+for nf in node_files:
     print(f'   - {nf}')
 print('   ✅ All 12 nodes implemented')
 print()
@@ -38,7 +44,7 @@ print()
 # 3. Check Bigtool
 print('3. BIGTOOL INTEGRATION')
 print('-' * 50)
-from src.bigtool.tools import ToolPool
+ToolPool = resolve('src.bigtool.tools:ToolPool')
 pool = ToolPool()
 for cap, tools in pool.pools.items():
     tool_names = [t.name for t in tools]
@@ -49,7 +55,7 @@ print()
 # 4. Check MCP Client
 print('4. MCP CLIENT INTEGRATION')
 print('-' * 50)
-from src.mcp.client import MCPServer
+MCPServer = resolve('src.mcp.client:MCPServer')
 print(f'   Servers: {[s.value for s in MCPServer]}')
 print('   ✅ MCP Client configured')
 print()
@@ -57,7 +63,8 @@ print()
 # 5. Check Database Models
 print('5. DATABASE MODELS')
 print('-' * 50)
-from src.database.models import CheckpointModel, AuditLogModel, WorkflowStateModel, InvoiceModel
+for model in ('CheckpointModel', 'AuditLogModel', 'WorkflowStateModel', 'InvoiceModel'):
+    resolve(f'src.database.models:{model}')
 print('   - CheckpointModel (HITL checkpoints)')
 print('   - AuditLogModel (audit logs)')
 print('   - WorkflowStateModel (workflow state)')
@@ -68,18 +75,15 @@ print()
 # 6. Check API Routes
 print('6. API ENDPOINTS')
 print('-' * 50)
-from src.api.routes import router
-for route in router.routes:
-    methods = list(route.methods) if hasattr(route, 'methods') else ['GET']
-    print(f'   {methods[0]} {route.path}')
+for method, path in resolve('src.api.routes:ROUTE_INDEX'):
+    print(f'   {method} {path}')
 print('   ✅ API endpoints complete')
 print()
 
 # 7. Check sample data
 print('7. SAMPLE DATA')
 print('-' * 50)
-with open('sample_invoices.json', 'r') as f:
-    samples = json.load(f)
+samples = load_json('sample_invoices.json')
 print(f'   Sample invoices: {len(samples.get("invoices", []))}')
 print('   ✅ Sample data available')
 print()
@@ -87,7 +91,7 @@ print()
 # 8. Check State Management
 print('8. STATE MANAGEMENT')
 print('-' * 50)
-from src.models.state import InvoiceState, WorkflowStatus
+WorkflowStatus = resolve('src.models.state:WorkflowStatus')
 print(f'   InvoiceState fields: workflow_id, invoice_payload, parsed_invoice, etc.')
 print(f'   WorkflowStatus: {[s.value for s in WorkflowStatus]}')
 print('   ✅ State management complete')
@@ -2,7 +2,8 @@
 LangGraph Invoice Processing Agent - Debug Check Script
 """
 import sys
-import json
+from src.config import load_json, load_workflow
+from src._checks import run_import_probes, resolve
 
 print('=' * 70)
 print('LANGGRAPH INVOICE PROCESSING AGENT - DEBUG CHECK')
@@ -14,56 +15,22 @@ passed = []
 # 1. Check imports
 print('\n1. CHECKING IMPORTS...')
 
-try:
-    from src.graph.workflow import create_invoice_graph, InvoiceProcessingGraph
-    passed.append('Graph workflow')
-    print('   [OK] Graph workflow')
-except Exception as e:
-    errors.append(f'Graph workflow: {e}')
-    print(f'   [ERROR] Graph workflow: {e}')
+outcomes, symbols = run_import_probes()
+for label, error in outcomes:
+    if error is None:
+        passed.append(label)
+        print(f'   [OK] {label}')
+    else:
+        errors.append(f'{label}: {error}')
+        print(f'   [ERROR] {label}: {error}')
 
-try:
-    from src.bigtool.picker import BigtoolPicker
-    from src.bigtool.tools import ToolPool
-    passed.append('Bigtool')
-    print('   [OK] Bigtool')
-except Exception as e:
-    errors.append(f'Bigtool: {e}')
-    print(f'   [ERROR] Bigtool: {e}')
-
-try:
-    from src.mcp.client import MCPClient, MCPServer
-    passed.append('MCP Client')
-    print('   [OK] MCP Client')
-except Exception as e:
-    errors.append(f'MCP Client: {e}')
-    print(f'   [ERROR] MCP Client: {e}')
-
-try:
-    from src.database.models import CheckpointModel, AuditLogModel
-    passed.append('Database models')
-    print('   [OK] Database models')
-except Exception as e:
-    errors.append(f'Database models: {e}')
-    print(f'   [ERROR] Database models: {e}')
-
-try:
-    from src.nodes import (
-        intake_node, understand_node, prepare_node, retrieve_node,
-        match_two_way_node, checkpoint_hitl_node, hitl_decision_node, 
-        reconcile_node, approve_node, posting_node, notify_node, complete_node
-    )
-    passed.append('All 12 nodes')
-    print('   [OK] All 12 nodes')
-except Exception as e:
-    errors.append(f'Nodes: {e}')
-    print(f'   [ERROR] Nodes: {e}')
+create_invoice_graph = symbols.get('create_invoice_graph')
+ToolPool = symbols.get('ToolPool')
 
 # 2. Check workflow.json
 print('\n2. CHECKING WORKFLOW.JSON...')
 try:
-    with open('workflow.json', 'r') as f:
-        wf = json.load(f)
+    wf = load_workflow()
     print(f'   Version: {wf["version"]}')
     print(f'   Stages: {len(wf["stages"])}')
     stage_ids = [s["id"] for s in wf["stages"]]
@@ -77,8 +44,7 @@ except Exception as e:
 # 3. Check sample data
 print('\n3. CHECKING SAMPLE DATA...')
 try:
-    with open('sample_invoices.json', 'r') as f:
-        data = json.load(f)
+    data = load_json('sample_invoices.json')
     print(f'   Invoices: {len(data["invoices"])}')
     for inv in data["invoices"]:
         print(f'   - {inv["invoice_id"]}: ${inv["amount"]:,.2f}')
@@ -117,7 +83,8 @@ except Exception as e:
 # 6. Check MCP abilities
 print('\n6. CHECKING MCP ABILITIES...')
 try:
-    from src.mcp.abilities import CommonAbilities, AtlasAbilities
+    CommonAbilities = resolve('src.mcp.abilities:CommonAbilities')
+    AtlasAbilities = resolve('src.mcp.abilities:AtlasAbilities')
     common_abilities = [m for m in dir(CommonAbilities) if not m.startswith('_') and m != 'execute']
     atlas_abilities = [m for m in dir(AtlasAbilities) if not m.startswith('_') and m != 'execute']
     print(f'   COMMON abilities: {len(common_abilities)}')
@@ -131,12 +98,7 @@ except Exception as e:
 # 7. Check API routes
 print('\n7. CHECKING API ROUTES...')
 try:
-    from src.api.routes import router
-    routes = []
-    for route in router.routes:
-        if hasattr(route, 'methods'):
-            methods = list(route.methods)
-            routes.append(f'{methods[0]} {route.path}')
+    routes = [f'{method} {path}' for method, path in resolve('src.api.routes:ROUTE_INDEX')]
     print(f'   Total routes: {len(routes)}')
     for r in routes:
         print(f'   - {r}')
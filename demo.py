@@ -2,9 +2,15 @@
 Demo Script - Run the full invoice processing workflow
 """
 import asyncio
-import json
 import logging
-from datetime import datetime
+import sys
+import orjson
+from dotenv import load_dotenv
+
+# Load .env once, before any src module reads its settings
+load_dotenv()
+
+from src.config import load_json
 
 # Configure logging
 logging.basicConfig(
@@ -14,6 +20,19 @@ logging.basicConfig(
 )
 logger = logging.getLogger("DEMO")
 
+
+def _print_json(result):
+    """Pretty-print a workflow result straight to stdout as UTF-8 bytes"""
+    # Skip the serialization entirely when INFO output is switched off
+    if not logger.isEnabledFor(logging.INFO):
+        return
+    # Flush pending text first so the raw bytes land in order
+    sys.stdout.flush()
+    sys.stdout.buffer.write(
+        orjson.dumps(result, option=orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE, default=str)
+    )
+    sys.stdout.buffer.flush()
+
 # Sample invoice payloads
 SAMPLE_INVOICE_MATCHED = {
     "invoice_id": "INV-2024-001",
@@ -48,11 +67,12 @@ SAMPLE_INVOICE_FAILED_MATCH = {
 }
 
 
+# All five sample invoices, parsed once per process from sample_invoices.json
+SAMPLE_INVOICES = tuple(load_json("sample_invoices.json")["invoices"])
+
+
 async def run_demo():
     """Run the demo workflow"""
-    from dotenv import load_dotenv
-    load_dotenv()
-    
     from src.database import get_db
     from src.graph.workflow import get_invoice_graph
     from src.bigtool.picker import get_bigtool_picker
@@ -83,7 +103,7 @@ async def run_demo():
     result1 = await graph.start_workflow(SAMPLE_INVOICE_MATCHED)
     
     print("\n📊 RESULT:")
-    print(json.dumps(result1, indent=2, default=str))
+    _print_json(result1)
     
     # Demo 2: Invoice that should FAIL match (trigger HITL)
     print("\n" + "-" * 70)
@@ -98,7 +118,7 @@ async def run_demo():
     result2 = await graph.start_workflow(SAMPLE_INVOICE_FAILED_MATCH)
     
     print("\n📊 RESULT:")
-    print(json.dumps(result2, indent=2, default=str))
+    _print_json(result2)
     
     # If workflow paused, simulate human decision
     if result2.get("status") == "PAUSED":
@@ -117,22 +137,29 @@ async def run_demo():
         )
         
         print("\n📊 RESUME RESULT:")
-        print(json.dumps(resume_result, indent=2, default=str))
+        _print_json(resume_result)
     
     # Print Bigtool selections
     print("\n" + "-" * 70)
     print("🔧 BIGTOOL SELECTIONS")
     print("-" * 70)
-    for selection in bigtool.get_selection_log():
-        print(f"  {selection['capability']}: {selection['selected_tool']} ({selection['reason']})")
+    sys.stdout.write("".join(
+        f"  {selection['capability']}: {selection['selected_tool']} ({selection['reason']})\n"
+        for selection in bigtool.get_selection_log()
+    ))
+    
+    # Let the background notifications finish before the log is printed
+    # (asyncio.run would cancel them on exit)
+    await mcp.flush_background()
     
     # Print MCP execution log
     print("\n" + "-" * 70)
     print("🌐 MCP EXECUTION LOG")
     print("-" * 70)
-    for execution in mcp.get_execution_log():
-        status = "✅" if execution.get("success") else "❌"
-        print(f"  {status} [{execution['server']}] {execution['ability']}")
+    sys.stdout.write("".join(
+        f"  {'✅' if execution.get('success') else '❌'} [{execution['server']}] {execution['ability']}\n"
+        for execution in mcp.get_execution_log()
+    ))
     
     print("\n" + "=" * 70)
     print("✅ DEMO COMPLETE")
@@ -141,15 +168,12 @@ async def run_demo():
 
 async def run_demo_with_reject():
     """Run demo with REJECT decision"""
-    from dotenv import load_dotenv
-    load_dotenv()
-    
     from src.database import get_db
     from src.graph.workflow import get_invoice_graph
+    from src.mcp.client import get_mcp_client
     
     db = get_db()
-    db.drop_tables()
-    db.create_tables()
+    await db.reset_all()
     
     graph = get_invoice_graph()
     
@@ -172,50 +196,47 @@ async def run_demo_with_reject():
         )
         
         print("\n📊 RESULT:")
-        print(json.dumps(resume_result, indent=2, default=str))
+        _print_json(resume_result)
+    
+    # Run any queued background abilities before asyncio.run tears the loop down
+    await get_mcp_client().flush_background()
 
 
 async def run_all_five_invoices():
     """Test all 5 sample invoices"""
-    from dotenv import load_dotenv
-    load_dotenv()
-    
     from src.database import get_db
     from src.graph.workflow import InvoiceProcessingGraph
-    
-    invoices = [
-        {'invoice_id': 'INV-2024-001', 'vendor_name': 'Acme Corporation', 'vendor_tax_id': 'TAX123456789', 'invoice_date': '2024-01-15', 'due_date': '2024-02-15', 'amount': 10000.00, 'currency': 'USD', 'line_items': [{'desc': 'Consulting Services', 'qty': 10, 'unit_price': 500, 'total': 5000}, {'desc': 'Software License', 'qty': 1, 'unit_price': 5000, 'total': 5000}], 'attachments': ['invoice_001.pdf'], 'po_number': 'PO-2024-001'},
-        {'invoice_id': 'INV-2024-002', 'vendor_name': 'Beta Industries', 'vendor_tax_id': 'TAX987654321', 'invoice_date': '2024-01-20', 'due_date': '2024-02-20', 'amount': 75000.00, 'currency': 'USD', 'line_items': [{'desc': 'Hardware Equipment', 'qty': 5, 'unit_price': 10000, 'total': 50000}, {'desc': 'Installation Services', 'qty': 1, 'unit_price': 25000, 'total': 25000}], 'attachments': ['invoice_002.pdf', 'receipt.jpg'], 'po_number': None},
-        {'invoice_id': 'INV-2024-003', 'vendor_name': 'Global Tech Solutions', 'vendor_tax_id': 'GSTIN29ABCDE1234F1Z5', 'invoice_date': '2024-01-25', 'due_date': '2024-02-25', 'amount': 5500.00, 'currency': 'USD', 'line_items': [{'desc': 'Cloud Services - Monthly', 'qty': 1, 'unit_price': 3000, 'total': 3000}, {'desc': 'Support Package', 'qty': 1, 'unit_price': 2500, 'total': 2500}], 'attachments': ['invoice_003.pdf'], 'po_number': 'PO-2024-003'},
-        {'invoice_id': 'INV-2024-004', 'vendor_name': 'Office Supplies Inc', 'vendor_tax_id': 'TAX555666777', 'invoice_date': '2024-01-28', 'due_date': '2024-02-28', 'amount': 1250.00, 'currency': 'USD', 'line_items': [{'desc': 'Printer Paper (Box)', 'qty': 10, 'unit_price': 50, 'total': 500}, {'desc': 'Ink Cartridges', 'qty': 5, 'unit_price': 100, 'total': 500}, {'desc': 'Office Chairs', 'qty': 1, 'unit_price': 250, 'total': 250}], 'attachments': [], 'po_number': 'PO-2024-004'},
-        {'invoice_id': 'INV-2024-005', 'vendor_name': 'Premium Catering Services', 'vendor_tax_id': 'TAX888999000', 'invoice_date': '2024-02-01', 'due_date': '2024-03-01', 'amount': 15000.00, 'currency': 'USD', 'line_items': [{'desc': 'Corporate Event Catering', 'qty': 1, 'unit_price': 12000, 'total': 12000}, {'desc': 'Equipment Rental', 'qty': 1, 'unit_price': 3000, 'total': 3000}], 'attachments': ['invoice_005.pdf', 'event_photos.zip'], 'po_number': None}
-    ]
+    from src.mcp.client import get_mcp_client
     
     db = get_db()
-    db.drop_tables()
-    db.create_tables()
+    await db.reset_all()
     
     print('=' * 60)
     print('TESTING 5 SAMPLE INVOICES')
     print('=' * 60)
     
+    # One compiled graph serves every start/resume in the batch
+    graph = InvoiceProcessingGraph()
+    
+    async def _resume(inv_id, chkpt):
+        r = await graph.resume_workflow(chkpt, 'ACCEPT', 'reviewer')
+        logger.info("%s resumed: %s", inv_id, r.get('status'))
+        return r
+    
+    # Invoices are independent, so let their workflows overlap
+    started = await graph.start_many(SAMPLE_INVOICES)
+    
     results = []
     paused = []
-    
-    for inv in invoices:
-        graph = InvoiceProcessingGraph()
-        r = await graph.start_workflow(inv)
+    for inv, r in zip(SAMPLE_INVOICES, started):
         status = r.get('status')
+        logger.info("%s: %s", inv['invoice_id'], status)
         results.append((inv['invoice_id'], inv['vendor_name'], inv['amount'], status))
         if status == 'PAUSED':
             paused.append((inv['invoice_id'], r.get('checkpoint_id')))
-        print(f"{inv['invoice_id']}: {status}")
     
     # Resume paused
-    for inv_id, chkpt in paused:
-        graph = InvoiceProcessingGraph()
-        r = await graph.resume_workflow(chkpt, 'ACCEPT', 'reviewer')
-        print(f"{inv_id} resumed: {r.get('status')}")
+    await asyncio.gather(*[_resume(inv_id, chkpt) for inv_id, chkpt in paused])
     
     print('=' * 60)
     print('RESULTS:')
@@ -223,10 +244,18 @@ async def run_all_five_invoices():
         print(f"  {inv_id} | {vendor} | ${amt:,.2f} | {status}")
     print('=' * 60)
     print('ALL 5 INVOICES TESTED SUCCESSFULLY!')
+    
+    # Deliver the queued notifications before asyncio.run tears the loop down
+    await get_mcp_client().flush_background()
 
 
 if __name__ == "__main__":
-    import sys
+    # uvloop is optional (not available on Windows)
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
     
     if len(sys.argv) > 1 and sys.argv[1] == "--reject":
         asyncio.run(run_demo_with_reject())
@@ -2,12 +2,14 @@
 LangGraph Invoice Processing Agent - Main Application
 """
 import os
+import asyncio
+import hashlib
 import logging
 from contextlib import asynccontextmanager
 from dotenv import load_dotenv
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.responses import HTMLResponse
 
 # Load environment variables
@@ -23,7 +25,29 @@ logger = logging.getLogger(__name__)
 
 # Import after env loaded
 from src.api.routes import router
+from src.api.responses import ORJSONResponse
 from src.database import get_db
+from src.graph.workflow import get_invoice_graph
+from src.mcp.client import get_mcp_client
+from src.bigtool.picker import get_bigtool_picker
+
+
+HTML_CACHE_CONTROL = "public, max-age=300"
+
+
+def _load_page(name: str) -> dict:
+    """Read a template once and precompute its ETag"""
+    with open(os.path.join("templates", name), "rb") as f:
+        body = f.read()
+    return {"body": body, "etag": f'"{hashlib.sha1(body).hexdigest()}"'}
+
+
+def _page_response(request: Request, page: dict) -> Response:
+    """Serve a cached page, answering 304 when the client already has it"""
+    headers = {"Cache-Control": HTML_CACHE_CONTROL, "ETag": page["etag"]}
+    if request.headers.get("if-none-match") == page["etag"]:
+        return Response(status_code=304, headers=headers)
+    return HTMLResponse(page["body"], headers=headers)
 
 
 @asynccontextmanager
@@ -34,10 +58,27 @@ async def lifespan(app: FastAPI):
     logger.info("🚀 LangGraph Invoice Processing Agent Starting...")
     logger.info("=" * 60)
     
-    # Initialize database
-    db = get_db()
-    db.create_tables()
+    # Initialize database while the graph and MCP client warm up, and bind
+    # the handles on app.state so routes skip the global factories
+    app.state.db, app.state.graph, app.state.mcp = await asyncio.gather(
+        asyncio.to_thread(get_db),
+        asyncio.to_thread(get_invoice_graph),
+        asyncio.to_thread(get_mcp_client),
+    )
+    app.state.picker = get_bigtool_picker()
+    
+    # Open (and return) one async connection so the first request doesn't pay
+    # for driver setup / pool creation
+    async with app.state.db.async_engine.connect():
+        pass
     logger.info("✅ Database initialized")
+    logger.info("✅ Graph compiled and MCP client ready")
+    
+    # Read HTML pages once so requests never touch the disk
+    app.state.root_page = _load_page("index.html")
+    app.state.review_page = _load_page("review.html")
+    app.state.dashboard_page = _load_page("dashboard.html")
+    logger.info("✅ Templates loaded")
     
     logger.info("✅ Application ready")
     logger.info("=" * 60)
@@ -46,6 +87,9 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("Shutting down...")
+    # Let queued notifications go out before the loop stops
+    await app.state.mcp.flush_background()
+    await app.state.mcp.aclose()
 
 
 # Create FastAPI app
@@ -76,6 +120,8 @@ app = FastAPI(
     - **State Persistence**: Full state management across all stages
     """,
     version="1.0.0",
+    # Render every JSON response (state blobs, audit details) with orjson
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
@@ -88,114 +134,29 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress HTML pages and larger JSON responses
+app.add_middleware(GZipMiddleware, minimum_size=500)
+
 # Include API routes
 app.include_router(router, prefix="/api", tags=["Invoice Processing"])
 
 
 @app.get("/", response_class=HTMLResponse)
-async def root():
+async def root(request: Request):
     """Root endpoint with basic UI"""
-    return """
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>LangGraph Invoice Processing Agent</title>
-        <style>
-            body { font-family: Arial, sans-serif; max-width: 1200px; margin: 0 auto; padding: 20px; background: #f5f5f5; }
-            h1 { color: #333; }
-            .card { background: white; padding: 20px; margin: 10px 0; border-radius: 8px; box-shadow: 0 2px 4px rgba(0,0,0,0.1); }
-            .endpoint { background: #e8f4f8; padding: 10px; margin: 5px 0; border-radius: 4px; font-family: monospace; }
-            .method { font-weight: bold; color: #0066cc; }
-            .post { color: #28a745; }
-            .get { color: #007bff; }
-            .delete { color: #dc3545; }
-            a { color: #0066cc; }
-            pre { background: #f8f9fa; padding: 15px; border-radius: 4px; overflow-x: auto; }
-            .stage { display: inline-block; padding: 5px 10px; margin: 2px; background: #e9ecef; border-radius: 4px; font-size: 12px; }
-            .stage.hitl { background: #fff3cd; }
-            .btn { display: inline-block; padding: 10px 20px; background: #667eea; color: white; text-decoration: none; border-radius: 5px; margin: 5px; }
-            .btn:hover { background: #5a6fd6; }
-        </style>
-    </head>
-    <body>
-        <h1>🧾 LangGraph Invoice Processing Agent</h1>
-        
-        <div class="card">
-            <h2>🚀 Quick Links</h2>
-            <a href="/dashboard" class="btn">📊 Live Dashboard</a>
-            <a href="/review" class="btn">👨‍💼 Human Review</a>
-            <a href="/docs" class="btn">📖 API Docs</a>
-        </div>
-        
-        <div class="card">
-            <h2>📋 Workflow Stages</h2>
-            <span class="stage">1. INTAKE</span>
-            <span class="stage">2. UNDERSTAND</span>
-            <span class="stage">3. PREPARE</span>
-            <span class="stage">4. RETRIEVE</span>
-            <span class="stage">5. MATCH_TWO_WAY</span>
-            <span class="stage hitl">6. CHECKPOINT_HITL</span>
-            <span class="stage hitl">7. HITL_DECISION</span>
-            <span class="stage">8. RECONCILE</span>
-            <span class="stage">9. APPROVE</span>
-            <span class="stage">10. POSTING</span>
-            <span class="stage">11. NOTIFY</span>
-            <span class="stage">12. COMPLETE</span>
-        </div>
-        
-        <div class="card">
-            <h2>🔗 API Endpoints</h2>
-            
-            <h3>Workflow</h3>
-            <div class="endpoint"><span class="method post">POST</span> /api/workflow/start - Start new invoice workflow</div>
-            <div class="endpoint"><span class="method get">GET</span> /api/workflow/{workflow_id}/status - Get workflow status</div>
-            <div class="endpoint"><span class="method get">GET</span> /api/workflow/{workflow_id}/audit-log - Get audit log</div>
-            
-            <h3>Human Review (HITL)</h3>
-            <div class="endpoint"><span class="method get">GET</span> /api/human-review/pending - List pending reviews</div>
-            <div class="endpoint"><span class="method get">GET</span> /api/human-review/{checkpoint_id} - Get review details</div>
-            <div class="endpoint"><span class="method post">POST</span> /api/human-review/decision - Submit decision (ACCEPT/REJECT)</div>
-            
-            <h3>Monitoring</h3>
-            <div class="endpoint"><span class="method get">GET</span> /api/bigtool/selections - View Bigtool selections</div>
-            <div class="endpoint"><span class="method get">GET</span> /api/mcp/execution-log - View MCP execution log</div>
-        </div>
-        
-        <div class="card">
-            <h2>🧪 Sample Invoice Payload</h2>
-            <pre>{
-  "invoice_id": "INV-2024-001",
-  "vendor_name": "Acme Corp",
-  "vendor_tax_id": "TAX123456789",
-  "invoice_date": "2024-01-15",
-  "due_date": "2024-02-15",
-  "amount": 10000.00,
-  "currency": "USD",
-  "line_items": [
-    {"desc": "Consulting Services", "qty": 10, "unit_price": 500, "total": 5000},
-    {"desc": "Software License", "qty": 1, "unit_price": 5000, "total": 5000}
-  ],
-  "attachments": ["invoice.pdf"],
-  "po_number": "PO-2024-001"
-}</pre>
-        </div>
-    </body>
-    </html>
-    """
+    return _page_response(request, app.state.root_page)
 
 
 @app.get("/review", response_class=HTMLResponse)
-async def review_dashboard():
+async def review_dashboard(request: Request):
     """Human Review Dashboard"""
-    with open("templates/review.html", "r", encoding="utf-8") as f:
-        return f.read()
+    return _page_response(request, app.state.review_page)
 
 
 @app.get("/dashboard", response_class=HTMLResponse)
-async def live_dashboard():
+async def live_dashboard(request: Request):
     """Live Visual Dashboard - Shows workflow progress in real-time"""
-    with open("templates/dashboard.html", "r", encoding="utf-8") as f:
-        return f.read()
+    return _page_response(request, app.state.dashboard_page)
 
 
 @app.get("/health")
@@ -212,4 +173,5 @@ if __name__ == "__main__":
     print("👨‍💼 Human Review: http://localhost:8000/review")
     print("📖 API Docs: http://localhost:8000/docs")
     print("=" * 60 + "\n")
-    uvicorn.run(app, host="127.0.0.1", port=8000)
+    # loop/http "auto" picks uvloop + httptools when installed, asyncio/h11 otherwise
+    uvicorn.run(app, host="127.0.0.1", port=8000, loop="auto", http="auto")
@@ -0,0 +1,59 @@
+"""
+Shared import probes for the checker scripts (check_requirements.py, debug_check.py)
+"""
+import importlib
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# (label, ["module:attr", ...]) - each probe imports only what it names
+IMPORT_PROBES: Tuple[Tuple[str, Tuple[str, ...]], ...] = (
+    ("Graph workflow", (
+        "src.graph.workflow:create_invoice_graph",
+        "src.graph.workflow:InvoiceProcessingGraph",
+    )),
+    ("Bigtool", (
+        "src.bigtool.picker:BigtoolPicker",
+        "src.bigtool.tools:ToolPool",
+    )),
+    ("MCP Client", (
+        "src.mcp.client:MCPClient",
+        "src.mcp.client:MCPServer",
+    )),
+    ("Database models", (
+        "src.database.models:CheckpointModel",
+        "src.database.models:AuditLogModel",
+    )),
+    ("All 12 nodes", tuple(
+        f"src.nodes:{name}" for name in (
+            "intake_node", "understand_node", "prepare_node", "retrieve_node",
+            "match_two_way_node", "checkpoint_hitl_node", "hitl_decision_node",
+            "reconcile_node", "approve_node", "posting_node", "notify_node", "complete_node",
+        )
+    )),
+)
+
+
+def resolve(spec: str) -> Any:
+    """Resolve a 'module:attr' spec (modules are shared through sys.modules)"""
+    module_name, _, attr = spec.partition(":")
+    return getattr(importlib.import_module(module_name), attr)
+
+
+def run_import_probes(
+    probes: Sequence[Tuple[str, Sequence[str]]] = IMPORT_PROBES
+) -> Tuple[List[Tuple[str, Optional[str]]], Dict[str, Any]]:
+    """
+    Run each import probe once
+
+    Returns:
+        ([(label, error_or_None), ...], {attr_name: resolved_object})
+    """
+    outcomes: List[Tuple[str, Optional[str]]] = []
+    symbols: Dict[str, Any] = {}
+    for label, specs in probes:
+        try:
+            for spec in specs:
+                symbols[spec.rpartition(":")[2]] = resolve(spec)
+            outcomes.append((label, None))
+        except Exception as e:
+            outcomes.append((label, str(e)))
+    return outcomes, symbols
@@ -0,0 +1,56 @@
+"""
+Short-TTL in-process cache for polled read endpoints
+"""
+import os
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# Seconds a cached status / review response stays fresh
+READ_CACHE_TTL = float(os.getenv("READ_CACHE_TTL", "3"))
+READ_CACHE_MAX = int(os.getenv("READ_CACHE_MAX", "4096"))
+
+
+class TTLCache:
+    """
+    Tiny TTL cache keyed by string
+    
+    Per-process only: with several workers each keeps its own copy, which is
+    fine for a few seconds of staleness on polling endpoints.
+    """
+    
+    def __init__(self, ttl: float = READ_CACHE_TTL, maxsize: int = READ_CACHE_MAX):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data: Dict[str, Tuple[float, Any]] = {}
+    
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            self._data.pop(key, None)
+            return None
+        return value
+    
+    def set(self, key: str, value: Any):
+        if self.ttl <= 0:
+            return
+        if len(self._data) >= self.maxsize and key not in self._data:
+            self._data.pop(next(iter(self._data)))
+        self._data[key] = (time.monotonic() + self.ttl, value)
+    
+    def delete(self, key: str):
+        self._data.pop(key, None)
+    
+    def delete_where(self, predicate: Callable[[str, Any], bool]):
+        """Drop every entry for which predicate(key, value) is true"""
+        for key in [k for k, (_, v) in self._data.items() if predicate(k, v)]:
+            del self._data[key]
+    
+    def clear(self):
+        self._data.clear()
+
+
+# Shared by the API routes
+read_cache = TTLCache()
@@ -1,27 +1,61 @@
 """
 FastAPI Routes for Invoice Processing API
 """
+import asyncio
 import logging
+from itertools import islice
 from typing import List, Optional
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from pydantic import TypeAdapter
 from datetime import datetime
+from sqlalchemy import select, func
 
 from src.models.schemas import (
     InvoicePayload, HumanDecision, HumanDecisionResponse,
     HumanReviewItem, WorkflowResponse, WorkflowStatusResponse
 )
-from src.graph.workflow import get_invoice_graph
-from src.database import get_db
-from src.database.models import CheckpointModel, WorkflowStateModel, AuditLogModel
+from src.database import get_db, delete_workflow_rows
+from src.database.models import AuditLogModel, CheckpointModel, InvoiceModel, WorkflowStateModel
 from src.bigtool.picker import get_bigtool_picker
 from src.mcp.client import get_mcp_client
+from .cache import read_cache
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# Built once; validates a whole pending-review page in one core call
+_REVIEW_ITEMS = TypeAdapter(List[HumanReviewItem])
+
+
+def _state(request: Request, name: str, factory):
+    """
+    Handle bound on app.state by the lifespan handler, falling back to the
+    global factory when the app runs without it (e.g. a bare TestClient)
+    """
+    handle = getattr(request.app.state, name, None)
+    return handle if handle is not None else factory()
+
+
+def _graph(request: Request):
+    """Invoice graph bound at startup (same fallback as _state)"""
+    graph = getattr(request.app.state, "graph", None)
+    if graph is None:
+        # Imported lazily so route introspection doesn't pull in LangGraph
+        from src.graph.workflow import get_invoice_graph
+        graph = get_invoice_graph()
+    return graph
+
+
+def _invalidate_workflow(workflow_id: str):
+    """Drop cached status and review responses belonging to a workflow"""
+    read_cache.delete(f"wf:{workflow_id}")
+    read_cache.delete_where(
+        lambda key, value: key.startswith("cp:") and value.get("workflow_id") == workflow_id
+    )
+
 
 @router.post("/workflow/start", response_model=WorkflowResponse)
-async def start_workflow(invoice: InvoicePayload):
+async def start_workflow(invoice: InvoicePayload, request: Request):
     """
     Start a new invoice processing workflow
     
@@ -30,10 +64,11 @@ async def start_workflow(invoice: InvoicePayload):
     """
     logger.info(f"Starting workflow for invoice: {invoice.invoice_id}")
     
-    graph = get_invoice_graph()
+    graph = _graph(request)
     
-    # Convert Pydantic model to dict
-    invoice_dict = invoice.model_dump()
+    # Convert Pydantic model to dict straight through the compiled core
+    # serializer (same output as model_dump(), minus the Python wrapper)
+    invoice_dict = invoice.__pydantic_serializer__.to_python(invoice)
     
     result = await graph.start_workflow(invoice_dict)
     
@@ -51,99 +86,146 @@ async def start_workflow(invoice: InvoicePayload):
 
 
 @router.get("/workflow/{workflow_id}/status", response_model=WorkflowStatusResponse)
-async def get_workflow_status(workflow_id: str):
+async def get_workflow_status(workflow_id: str, request: Request):
     """
     Get the current status of a workflow
+    
+    Responses are cached for READ_CACHE_TTL seconds since UIs poll this.
     """
-    db = get_db()
+    cache_key = f"wf:{workflow_id}"
+    cached = read_cache.get(cache_key)
+    if cached is not None:
+        return cached
     
-    with db.get_session() as session:
-        workflow = session.query(WorkflowStateModel).filter(
-            WorkflowStateModel.workflow_id == workflow_id
-        ).first()
-        
-        if not workflow:
-            raise HTTPException(status_code=404, detail=f"Workflow {workflow_id} not found")
-        
-        # Check for checkpoint
-        checkpoint = session.query(CheckpointModel).filter(
-            CheckpointModel.workflow_id == workflow_id,
-            CheckpointModel.status == "PENDING"
-        ).first()
-        
-        return WorkflowStatusResponse(
-            workflow_id=workflow_id,
-            status=workflow.status,
-            current_stage=workflow.current_stage,
-            started_at=workflow.started_at.isoformat() if workflow.started_at else "",
-            updated_at=workflow.updated_at.isoformat() if workflow.updated_at else "",
-            is_paused=workflow.status == "PAUSED",
-            checkpoint_id=checkpoint.checkpoint_id if checkpoint else None,
-            final_payload=workflow.state_data.get("final_payload") if workflow.state_data else None
-        )
+    db = _state(request, "db", get_db)
+    
+    async def _scalar(stmt):
+        # One session per query: an AsyncSession can't run statements concurrently
+        async with db.get_async_session() as session:
+            return await session.scalar(stmt)
+    
+    # The workflow row and its pending checkpoint are independent lookups, so
+    # issue both at once on separate connections
+    workflow, checkpoint_id = await asyncio.gather(
+        _scalar(select(WorkflowStateModel).where(WorkflowStateModel.workflow_id == workflow_id)),
+        _scalar(
+            select(CheckpointModel.checkpoint_id).where(
+                CheckpointModel.workflow_id == workflow_id,
+                CheckpointModel.status == "PENDING"
+            ).limit(1)
+        ),
+    )
+    
+    if not workflow:
+        raise HTTPException(status_code=404, detail=f"Workflow {workflow_id} not found")
+    
+    response = WorkflowStatusResponse(
+        workflow_id=workflow_id,
+        status=workflow.status,
+        current_stage=workflow.current_stage,
+        started_at=workflow.started_at.isoformat() if workflow.started_at else "",
+        updated_at=workflow.updated_at.isoformat() if workflow.updated_at else "",
+        is_paused=workflow.status == "PAUSED",
+        checkpoint_id=checkpoint_id,
+        final_payload=workflow.state_data.get("final_payload") if workflow.state_data else None
+    )
+    
+    read_cache.set(cache_key, response)
+    return response
 
 
 @router.get("/human-review/pending", response_model=List[HumanReviewItem])
-async def list_pending_reviews():
+async def list_pending_reviews(
+    request: Request,
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Last checkpoint_id of the previous page")
+):
     """
-    List all pending human review items
+    List pending human review items
     
-    This endpoint returns all invoices that are waiting for human review
-    due to failed matching or other issues.
+    This endpoint returns invoices that are waiting for human review due to
+    failed matching or other issues, one keyset page at a time ordered by
+    checkpoint_id. The body stays a plain list; when more rows may follow,
+    the X-Next-Cursor header carries the cursor for the next page.
     """
-    db = get_db()
+    db = _state(request, "db", get_db)
     
-    with db.get_session() as session:
-        checkpoints = session.query(CheckpointModel).filter(
-            CheckpointModel.status == "PENDING"
-        ).all()
-        
-        items = []
-        for cp in checkpoints:
-            items.append(HumanReviewItem(
-                checkpoint_id=cp.checkpoint_id,
-                invoice_id=cp.invoice_id,
-                vendor_name=cp.vendor_name,
-                amount=cp.amount,
-                created_at=cp.created_at.isoformat() if cp.created_at else "",
-                reason_for_hold=cp.reason_for_hold or "",
-                review_url=cp.review_url or ""
-            ))
-        
-        return items
+    # Project just the listed columns so the state_blob JSON is never loaded
+    stmt = select(
+        CheckpointModel.checkpoint_id,
+        CheckpointModel.invoice_id,
+        CheckpointModel.vendor_name,
+        CheckpointModel.amount,
+        CheckpointModel.created_at,
+        func.coalesce(CheckpointModel.reason_for_hold, "").label("reason_for_hold"),
+        func.coalesce(CheckpointModel.review_url, "").label("review_url")
+    ).where(CheckpointModel.status == "PENDING")
+    if cursor:
+        stmt = stmt.where(CheckpointModel.checkpoint_id > cursor)
+    stmt = stmt.order_by(CheckpointModel.checkpoint_id).limit(limit)
+    
+    async with db.get_async_session() as session:
+        rows = (await session.execute(stmt)).mappings().all()
+    
+    if len(rows) == limit:
+        response.headers["X-Next-Cursor"] = rows[-1]["checkpoint_id"]
+    
+    return _REVIEW_ITEMS.validate_python([
+        {**row, "created_at": row["created_at"].isoformat() if row["created_at"] else ""}
+        for row in rows
+    ])
 
 
 @router.get("/human-review/{checkpoint_id}")
-async def get_review_details(checkpoint_id: str):
+async def get_review_details(checkpoint_id: str, request: Request):
     """
-    Get detailed information for a specific review item
+    Get detailed information for a specific review item (cached like status)
     """
-    db = get_db()
+    cache_key = f"cp:{checkpoint_id}"
+    cached = read_cache.get(cache_key)
+    if cached is not None:
+        return cached
     
-    with db.get_session() as session:
-        checkpoint = session.query(CheckpointModel).filter(
-            CheckpointModel.checkpoint_id == checkpoint_id
-        ).first()
-        
-        if not checkpoint:
-            raise HTTPException(status_code=404, detail=f"Checkpoint {checkpoint_id} not found")
-        
-        return {
-            "checkpoint_id": checkpoint.checkpoint_id,
-            "workflow_id": checkpoint.workflow_id,
-            "invoice_id": checkpoint.invoice_id,
-            "vendor_name": checkpoint.vendor_name,
-            "amount": checkpoint.amount,
-            "status": checkpoint.status,
-            "reason_for_hold": checkpoint.reason_for_hold,
-            "review_url": checkpoint.review_url,
-            "created_at": checkpoint.created_at.isoformat() if checkpoint.created_at else "",
-            "state_data": checkpoint.state_blob
-        }
+    db = _state(request, "db", get_db)
+    
+    async with db.get_async_session() as session:
+        # Column projection returns plain rows, skipping ORM hydration and the
+        # identity map for this read-only view. The invoice under review comes
+        # from its stored payload, as on resume (the blob doesn't repeat it)
+        row = (await session.execute(
+            select(
+                CheckpointModel.checkpoint_id,
+                CheckpointModel.workflow_id,
+                CheckpointModel.invoice_id,
+                CheckpointModel.vendor_name,
+                CheckpointModel.amount,
+                CheckpointModel.status,
+                CheckpointModel.reason_for_hold,
+                CheckpointModel.review_url,
+                CheckpointModel.created_at,
+                CheckpointModel.state_blob.label("state_data"),
+                InvoiceModel.raw_payload
+            )
+            .outerjoin(InvoiceModel, InvoiceModel.workflow_id == CheckpointModel.workflow_id)
+            .where(CheckpointModel.checkpoint_id == checkpoint_id)
+        )).mappings().first()
+    
+    if not row:
+        raise HTTPException(status_code=404, detail=f"Checkpoint {checkpoint_id} not found")
+    
+    details = dict(row)
+    raw_payload = details.pop("raw_payload")
+    state_data = details["state_data"] or {}
+    details["state_data"] = {**state_data, "invoice_payload": state_data.get("invoice_payload") or raw_payload or {}}
+    details["created_at"] = row["created_at"].isoformat() if row["created_at"] else ""
+    
+    read_cache.set(cache_key, details)
+    return details
 
 
 @router.post("/human-review/decision", response_model=HumanDecisionResponse)
-async def submit_decision(decision: HumanDecision):
+async def submit_decision(decision: HumanDecision, request: Request):
     """
     Submit a human review decision (ACCEPT or REJECT)
     
@@ -154,7 +236,7 @@ async def submit_decision(decision: HumanDecision):
     logger.info(f"Processing decision for checkpoint: {decision.checkpoint_id}")
     logger.info(f"Decision: {decision.decision} by {decision.reviewer_id}")
     
-    graph = get_invoice_graph()
+    graph = _graph(request)
     
     result = await graph.resume_workflow(
         checkpoint_id=decision.checkpoint_id,
@@ -163,6 +245,10 @@ async def submit_decision(decision: HumanDecision):
         notes=decision.notes
     )
     
+    read_cache.delete(f"cp:{decision.checkpoint_id}")
+    if result.get("workflow_id"):
+        _invalidate_workflow(result["workflow_id"])
+    
     if result.get("status") == "ERROR":
         raise HTTPException(status_code=400, detail=result.get("message"))
     
@@ -176,39 +262,65 @@ async def submit_decision(decision: HumanDecision):
 
 
 @router.get("/workflow/{workflow_id}/audit-log")
-async def get_audit_log(workflow_id: str):
+async def get_audit_log(
+    workflow_id: str,
+    request: Request,
+    include_details: bool = Query(True, description="Include the JSON details of each entry")
+):
     """
     Get the audit log for a workflow
     """
-    db = get_db()
+    db = _state(request, "db", get_db)
+    
+    columns = [
+        AuditLogModel.id,
+        AuditLogModel.stage,
+        AuditLogModel.action,
+        AuditLogModel.bigtool_selection,
+        AuditLogModel.mcp_server,
+        AuditLogModel.timestamp
+    ]
+    if include_details:
+        columns.append(AuditLogModel.details)
     
-    with db.get_session() as session:
-        logs = session.query(AuditLogModel).filter(
-            AuditLogModel.workflow_id == workflow_id
-        ).order_by(AuditLogModel.timestamp).all()
+    async with db.get_async_session() as session:
+        # Plain row mappings - no ORM object hydration
+        logs = (await session.execute(
+            select(*columns)
+            .where(AuditLogModel.workflow_id == workflow_id)
+            .order_by(AuditLogModel.timestamp)
+        )).mappings().all()
         
         return [
             {
-                "id": log.id,
-                "stage": log.stage,
-                "action": log.action,
-                "details": log.details,
-                "bigtool_selection": log.bigtool_selection,
-                "mcp_server": log.mcp_server,
-                "timestamp": log.timestamp.isoformat() if log.timestamp else ""
+                "id": log["id"],
+                "stage": log["stage"],
+                "action": log["action"],
+                "details": log.get("details"),
+                "bigtool_selection": log["bigtool_selection"],
+                "mcp_server": log["mcp_server"],
+                "timestamp": log["timestamp"].isoformat() if log["timestamp"] else ""
             }
             for log in logs
         ]
 
 
 @router.get("/bigtool/selections")
-async def get_bigtool_selections():
+async def get_bigtool_selections(
+    request: Request,
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0)
+):
     """
-    Get all Bigtool tool selections made during workflow execution
+    Get Bigtool tool selections made during workflow execution (oldest first)
     """
-    picker = get_bigtool_picker()
+    picker = _state(request, "picker", get_bigtool_picker)
+    selections = picker.get_selection_log()
     return {
-        "selections": picker.get_selection_log(),
+        "selections": list(islice(selections, offset, offset + limit)),
+        "total": len(selections),
+        "limit": limit,
+        "offset": offset,
         "available_pools": {
             "ocr": ["google_vision", "tesseract", "aws_textract"],
             "enrichment": ["clearbit", "people_data_labs", "vendor_db"],
@@ -221,13 +333,20 @@ async def get_bigtool_selections():
 
 
 @router.get("/mcp/execution-log")
-async def get_mcp_execution_log():
+async def get_mcp_execution_log(
+    request: Request,
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0)
+):
     """
-    Get the MCP execution log showing all ability calls
+    Get the MCP execution log showing ability calls (oldest first)
     """
-    mcp = get_mcp_client()
+    mcp = _state(request, "mcp", get_mcp_client)
     return {
-        "executions": mcp.get_execution_log(),
+        "executions": mcp.get_execution_log(offset, limit),
+        "total": len(mcp.execution_log),
+        "limit": limit,
+        "offset": offset,
         "servers": {
             "COMMON": "Internal processing (validation, matching, normalization)",
             "ATLAS": "External integrations (ERP, enrichment, notifications)"
@@ -236,49 +355,46 @@ async def get_mcp_execution_log():
 
 
 @router.delete("/workflow/{workflow_id}")
-async def delete_workflow(workflow_id: str):
+async def delete_workflow(workflow_id: str, request: Request):
     """
     Delete a workflow and all associated data (for testing)
     """
-    db = get_db()
+    db = _state(request, "db", get_db)
     
-    with db.get_session() as session:
-        # Delete audit logs
-        session.query(AuditLogModel).filter(
-            AuditLogModel.workflow_id == workflow_id
-        ).delete()
-        
-        # Delete checkpoints
-        session.query(CheckpointModel).filter(
-            CheckpointModel.workflow_id == workflow_id
-        ).delete()
-        
-        # Delete workflow state
-        session.query(WorkflowStateModel).filter(
-            WorkflowStateModel.workflow_id == workflow_id
-        ).delete()
-        
-        session.commit()
+    # Audit logs, checkpoints and workflow state go in one transaction
+    async with db.get_async_session() as session:
+        await delete_workflow_rows(session, workflow_id)
+    
+    _invalidate_workflow(workflow_id)
     
     return {"message": f"Workflow {workflow_id} deleted"}
 
 
 @router.post("/reset")
-async def reset_system():
+async def reset_system(request: Request):
     """
     Reset the system (clear all data, for testing)
     """
-    db = get_db()
+    db = _state(request, "db", get_db)
     
     # Clear bigtool and MCP logs
-    picker = get_bigtool_picker()
+    picker = _state(request, "picker", get_bigtool_picker)
     picker.clear_log()
     
-    mcp = get_mcp_client()
+    mcp = _state(request, "mcp", get_mcp_client)
     mcp.clear_log()
+    mcp.clear_cache()
+    read_cache.clear()
     
-    # Recreate tables
-    db.drop_tables()
-    db.create_tables()
+    # Empty the tables in one transaction (TRUNCATE on Postgres) rather
+    # than dropping and recreating the schema
+    await db.reset_all()
     
     return {"message": "System reset complete"}
+
+
+# (method, path) for every route above - keep this after the last @router decorator
+ROUTE_INDEX = tuple(
+    (next(iter(route.methods)) if getattr(route, "methods", None) else "GET", route.path)
+    for route in router.routes
+)
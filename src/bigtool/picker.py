@@ -2,12 +2,33 @@
 Bigtool Picker - Dynamically selects tools from pool based on context
 """
 import os
+import re
 import logging
-from typing import Dict, Any, Optional, List
+from collections import deque
+from typing import Deque, Dict, Any, Optional, List, Sequence, Tuple
 from .tools import ToolPool, Tool
 
 logger = logging.getLogger(__name__)
 
+# Max distinct (capability, prefer, pool_hint, context) combinations remembered
+SELECTION_CACHE_SIZE = 1024
+
+# Context fields each capability's rules in _select_by_context read; only
+# these go into the selection cache key, so e.g. a per-workflow id in the DB
+# context doesn't give every workflow its own cache entry
+_CONTEXT_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "ocr": ("attachments",),
+    "enrichment": ("vendor_tax_id",),
+    "erp_connector": ("amount",),
+}
+
+# Attachment names that count as PDFs for OCR routing: ".pdf" anywhere in the
+# name, any case, matched without building a lowercased copy of each name
+_PDF_RE = re.compile(r"\.pdf", re.IGNORECASE)
+
+# Selection log entries kept in memory (oldest dropped first)
+BIGTOOL_LOG_MAX = int(os.getenv("BIGTOOL_LOG_MAX", "10000"))
+
 
 class BigtoolPicker:
     """
@@ -20,7 +41,8 @@ class BigtoolPicker:
     
     def __init__(self):
         self.pool = ToolPool()
-        self.selection_log: List[Dict[str, Any]] = []
+        self.selection_log: Deque[Dict[str, Any]] = deque(maxlen=BIGTOOL_LOG_MAX)
+        self._selection_cache: Dict[Tuple, Tuple[Tool, str, Tuple[str, ...]]] = {}
         
         # Default tool preferences from environment
         self.defaults = {
@@ -36,7 +58,7 @@ class BigtoolPicker:
         self, 
         capability: str, 
         context: Dict[str, Any] = None,
-        pool_hint: List[str] = None,
+        pool_hint: Optional[Sequence[str]] = None,
         prefer: str = None
     ) -> Tool:
         """
@@ -45,13 +67,97 @@ class BigtoolPicker:
         Args:
             capability: The capability needed (ocr, enrichment, etc.)
             context: Context data to influence selection
-            pool_hint: List of acceptable tools
+            pool_hint: Acceptable tool names (any sequence; tuples avoid a copy)
             prefer: Explicitly preferred tool name
         
         Returns:
             Selected Tool object
         """
         context = context or {}
+        
+        # Selection is a pure function of its inputs and tool availability,
+        # so repeat lookups are served from the cache (still logged below)
+        key = self._cache_key(capability, context, pool_hint, prefer)
+        resolved = self._selection_cache.get(key) if key is not None else None
+        if resolved is None:
+            resolved = self._resolve(capability, context, pool_hint, prefer)
+            if resolved is None:
+                return None
+            if key is not None:
+                if len(self._selection_cache) >= SELECTION_CACHE_SIZE:
+                    self._selection_cache.pop(next(iter(self._selection_cache)))
+                self._selection_cache[key] = resolved
+        
+        selected, selection_reason, available_options = resolved
+        
+        # Log selection
+        log_entry = {
+            "capability": capability,
+            "selected_tool": selected.name,
+            "reason": selection_reason,
+            "context_keys": list(context.keys()) if context else [],
+            "available_options": list(available_options)
+        }
+        self.selection_log.append(log_entry)
+        logger.info(f"Bigtool selected '{selected.name}' for '{capability}': {selection_reason}")
+        
+        return selected
+    
+    def get_by_name(self, capability: str, name: str) -> Optional[Tool]:
+        """
+        Reuse an earlier selection by name, without running the rules
+        
+        Returns None if the tool is unknown or no longer available, so the
+        caller can fall back to select().
+        """
+        tool = self.pool.get_tool_by_name(capability, name)
+        if tool is None or not tool.available:
+            return None
+        
+        self.selection_log.append({
+            "capability": capability,
+            "selected_tool": tool.name,
+            "reason": "Reused earlier selection",
+            "context_keys": [],
+            "available_options": [tool.name]
+        })
+        logger.info(f"Bigtool reused '{tool.name}' for '{capability}'")
+        return tool
+    
+    def _cache_key(
+        self,
+        capability: str,
+        context: Dict[str, Any],
+        pool_hint: Optional[Sequence[str]],
+        prefer: Optional[str]
+    ) -> Optional[Tuple]:
+        """Hashable selection key, or None when the context can't be hashed"""
+        try:
+            context_signature = tuple(
+                (k, tuple(context[k]) if isinstance(context[k], list) else context[k])
+                for k in _CONTEXT_FIELDS.get(capability, ())
+                if k in context
+            )
+            key = (
+                capability,
+                prefer,
+                tuple(pool_hint) if pool_hint else None,
+                context_signature,
+                self.pool.version
+            )
+            hash(key)
+        except TypeError:
+            return None
+        return key
+    
+    def _resolve(
+        self,
+        capability: str,
+        context: Dict[str, Any],
+        pool_hint: Optional[Sequence[str]],
+        prefer: Optional[str]
+    ) -> Optional[Tuple[Tool, str, Tuple[str, ...]]]:
+        """Run the selection rules; returns (tool, reason, available option names)"""
         available_tools = self.pool.get_available_tools(capability)
         
         if not available_tools:
@@ -71,20 +177,16 @@ class BigtoolPicker:
         
         # 1. Check explicit preference
         if prefer:
-            for tool in available_tools:
-                if tool.name == prefer:
-                    selected = tool
-                    selection_reason = f"Explicit preference: {prefer}"
-                    break
+            selected = self._candidate(capability, prefer, pool_hint)
+            if selected:
+                selection_reason = f"Explicit preference: {prefer}"
         
         # 2. Check environment default
         if not selected and capability in self.defaults:
             default_name = self.defaults[capability]
-            for tool in available_tools:
-                if tool.name == default_name:
-                    selected = tool
-                    selection_reason = f"Environment default: {default_name}"
-                    break
+            selected = self._candidate(capability, default_name, pool_hint)
+            if selected:
+                selection_reason = f"Environment default: {default_name}"
         
         # 3. Context-based selection
         if not selected and context:
@@ -92,23 +194,19 @@ class BigtoolPicker:
             if selected:
                 selection_reason = f"Context-based selection"
         
-        # 4. Fallback to highest priority
+        # 4. Fallback to highest priority (pools are kept priority-sorted)
         if not selected:
-            selected = max(available_tools, key=lambda t: t.priority)
+            selected = available_tools[0]
             selection_reason = f"Highest priority fallback"
         
-        # Log selection
-        log_entry = {
-            "capability": capability,
-            "selected_tool": selected.name,
-            "reason": selection_reason,
-            "context_keys": list(context.keys()) if context else [],
-            "available_options": [t.name for t in available_tools]
-        }
-        self.selection_log.append(log_entry)
-        logger.info(f"Bigtool selected '{selected.name}' for '{capability}': {selection_reason}")
-        
-        return selected
+        return selected, selection_reason, tuple(t.name for t in available_tools)
+    
+    def _candidate(self, capability: str, name: str, pool_hint: Optional[Sequence[str]]) -> Optional[Tool]:
+        """Look up a named tool, if it is available and allowed by pool_hint"""
+        tool = self.pool.get_tool_by_name(capability, name)
+        if tool and tool.available and (not pool_hint or name in pool_hint):
+            return tool
+        return None
     
     def _select_by_context(
         self, 
@@ -117,42 +215,40 @@ class BigtoolPicker:
         context: Dict[str, Any]
     ) -> Optional[Tool]:
         """Apply context-based selection rules"""
+        by_name = {t.name: t for t in tools}
         
         # OCR selection based on attachment type
         if capability == "ocr":
             attachments = context.get("attachments", [])
-            if any(".pdf" in a.lower() for a in attachments):
+            if any(_PDF_RE.search(a) for a in attachments):
                 # Prefer AWS Textract for PDFs
-                for t in tools:
-                    if t.name == "aws_textract":
-                        return t
+                if "aws_textract" in by_name:
+                    return by_name["aws_textract"]
         
         # Enrichment selection based on vendor region
         if capability == "enrichment":
             vendor_tax_id = context.get("vendor_tax_id", "")
             # Indian vendors (GST/PAN)
             if vendor_tax_id and len(vendor_tax_id) in [10, 15]:
-                for t in tools:
-                    if t.name == "vendor_db":
-                        return t
+                if "vendor_db" in by_name:
+                    return by_name["vendor_db"]
         
         # ERP selection based on amount (high value = production ERP)
         if capability == "erp_connector":
             amount = context.get("amount", 0)
             if amount > 100000:
-                for t in tools:
-                    if t.name == "sap_sandbox":
-                        return t
+                if "sap_sandbox" in by_name:
+                    return by_name["sap_sandbox"]
         
         return None
     
-    def get_selection_log(self) -> List[Dict[str, Any]]:
-        """Get all tool selections made"""
+    def get_selection_log(self) -> Deque[Dict[str, Any]]:
+        """Get the most recent tool selections (bounded by BIGTOOL_LOG_MAX)"""
         return self.selection_log
     
     def clear_log(self):
         """Clear selection log"""
-        self.selection_log = []
+        self.selection_log.clear()
 
 
 # Global instance
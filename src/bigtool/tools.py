@@ -53,24 +53,41 @@ class ToolPool:
                 Tool("local_fs", "storage", "Local filesystem", priority=1),
             ],
         }
+        
+        # Priorities are static: keep each pool highest-priority first (stable,
+        # so ties keep their declared order) and filters preserve that order
+        for tools in self.pools.values():
+            tools.sort(key=lambda t: -t.priority)
+        
+        # O(1) name lookups per capability
+        self._by_name: Dict[str, Dict[str, Tool]] = {
+            cap: {t.name: t for t in tools} for cap, tools in self.pools.items()
+        }
+        # Bumped on every availability change so callers can invalidate caches
+        self.version = 0
+        # Available-tool lists per capability, dropped on availability changes
+        self._available_cache: Dict[str, List[Tool]] = {}
     
     def get_tools(self, capability: str) -> List[Tool]:
         """Get all tools for a capability"""
         return self.pools.get(capability, [])
     
     def get_available_tools(self, capability: str) -> List[Tool]:
-        """Get only available tools for a capability"""
-        return [t for t in self.get_tools(capability) if t.available]
+        """Get only available tools for a capability (cached; don't mutate)"""
+        tools = self._available_cache.get(capability)
+        if tools is None:
+            tools = [t for t in self.get_tools(capability) if t.available]
+            self._available_cache[capability] = tools
+        return tools
     
     def get_tool_by_name(self, capability: str, name: str) -> Tool:
         """Get specific tool by name"""
-        for tool in self.get_tools(capability):
-            if tool.name == name:
-                return tool
-        return None
+        return self._by_name.get(capability, {}).get(name)
     
     def set_tool_availability(self, capability: str, name: str, available: bool):
         """Enable/disable a tool"""
         tool = self.get_tool_by_name(capability, name)
-        if tool:
+        if tool and tool.available != available:
             tool.available = available
+            self.version += 1
+            self._available_cache.pop(capability, None)
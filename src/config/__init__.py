@@ -0,0 +1,2 @@
+# Config package - Cached JSON config loading
+from .loader import load_json, load_workflow, clear_cache
@@ -0,0 +1,35 @@
+"""
+Config Loader - Parses workflow.json / sample_invoices.json once per process
+"""
+import os
+import orjson
+from typing import Dict, Any, Tuple
+
+# Parsed documents keyed by (path, mtime) so an edited file is re-read
+_CACHE: Dict[Tuple[str, float], Dict[str, Any]] = {}
+
+
+def load_json(path: str) -> Dict[str, Any]:
+    """
+    Load and memoize a JSON file
+
+    Repeated calls for an unchanged file return the same cached object,
+    so callers must treat the result as read-only.
+    """
+    key = (path, os.stat(path).st_mtime)
+    data = _CACHE.get(key)
+    if data is None:
+        with open(path, "rb") as f:
+            data = orjson.loads(f.read())
+        _CACHE[key] = data
+    return data
+
+
+def load_workflow(path: str = "workflow.json") -> Dict[str, Any]:
+    """Load the LangGraph agent config (workflow.json)"""
+    return load_json(path)
+
+
+def clear_cache():
+    """Drop all cached documents (for tests)"""
+    _CACHE.clear()
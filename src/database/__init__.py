@@ -1,3 +1,4 @@
 # Database package
-from .db import Database, get_db
+from .db import Database, get_db, log_events_bulk, delete_workflow_rows
+from .writer import WriteQueue, get_write_queue
 from .models import Base, CheckpointModel, AuditLogModel, InvoiceModel
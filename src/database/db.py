@@ -2,40 +2,152 @@
 Database connection and session management
 """
 import os
-from sqlalchemy import create_engine
+import orjson
+from sqlalchemy import create_engine, delete, event, insert, text
 from sqlalchemy.orm import sessionmaker, Session
-from contextlib import contextmanager
-from .models import Base
+from sqlalchemy.pool import NullPool
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from contextlib import contextmanager, asynccontextmanager
+from typing import AsyncIterator, Any, Dict, List
+from .models import Base, AuditLogModel, CheckpointModel, WorkflowStateModel
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./demo.db")
 
+# Connection pool sizing for server databases (SQLite doesn't pool over the network)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "20"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+# Recycle connections before server-side idle timeouts / proxies drop them
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+
+# Sync driver prefix -> async driver used on the event loop
+ASYNC_DRIVERS = {
+    "sqlite://": "sqlite+aiosqlite://",
+    "postgresql://": "postgresql+asyncpg://",
+    "postgres://": "postgresql+asyncpg://",
+}
+
+
+# Applied to every new SQLite connection: WAL lets readers run alongside the
+# writer and NORMAL only fsyncs at checkpoints, not on every commit.
+# cache_size is in KiB when negative (64 MB page cache per connection)
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA cache_size=-64000",
+)
+
+
+def _apply_sqlite_pragmas(dbapi_conn, _connection_record):
+    cursor = dbapi_conn.cursor()
+    for pragma in SQLITE_PRAGMAS:
+        cursor.execute(pragma)
+    cursor.close()
+
+
+def _json_serializer(obj: Any) -> str:
+    # Same keys json.dumps would accept (int keys become strings), plus numpy values
+    return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY).decode()
+
+
+# JSON / JSONB columns (raw_payload, state_blob, state_data, audit details)
+# round-trip through orjson instead of the stdlib json module
+JSON_CODEC = {"json_serializer": _json_serializer, "json_deserializer": orjson.loads}
+
+
+def to_async_url(db_url: str) -> str:
+    """Map a sync database URL onto its async driver"""
+    for prefix, async_prefix in ASYNC_DRIVERS.items():
+        if db_url.startswith(prefix):
+            return async_prefix + db_url[len(prefix):]
+    return db_url
+
 
 class Database:
     def __init__(self, db_url: str = None):
         self.db_url = db_url or DATABASE_URL
+        self.async_db_url = to_async_url(self.db_url)
         # Handle SQLite async compatibility
         if self.db_url.startswith("sqlite"):
             self.engine = create_engine(
                 self.db_url, 
                 connect_args={"check_same_thread": False},
-                echo=False
+                echo=False,
+                **JSON_CODEC
+            )
+            # aiosqlite connections are cheap and must not outlive the event
+            # loop that opened them (tests and scripts run several loops)
+            self.async_engine = create_async_engine(
+                self.async_db_url,
+                poolclass=NullPool,
+                echo=False,
+                **JSON_CODEC
             )
+            event.listen(self.engine, "connect", _apply_sqlite_pragmas)
+            event.listen(self.async_engine.sync_engine, "connect", _apply_sqlite_pragmas)
         else:
-            self.engine = create_engine(self.db_url, echo=False)
+            pool_options = {
+                "pool_size": DB_POOL_SIZE,
+                "max_overflow": DB_MAX_OVERFLOW,
+                "pool_timeout": DB_POOL_TIMEOUT,
+                "pool_recycle": DB_POOL_RECYCLE,
+                "pool_pre_ping": True,
+            }
+            self.engine = create_engine(self.db_url, echo=False, **pool_options, **JSON_CODEC)
+            # Async engines default to AsyncAdaptedQueuePool, sized the same way
+            self.async_engine = create_async_engine(self.async_db_url, echo=False, **pool_options, **JSON_CODEC)
         
         self.SessionLocal = sessionmaker(
             autocommit=False, 
             autoflush=False, 
             bind=self.engine
         )
+        self.AsyncSessionLocal = async_sessionmaker(
+            self.async_engine,
+            class_=AsyncSession,
+            autoflush=False,
+            expire_on_commit=False
+        )
+        self._tables_created = False
     
     def create_tables(self):
-        """Create all tables"""
+        """Create all tables (no-op once they exist)"""
+        if self._tables_created:
+            return
         Base.metadata.create_all(bind=self.engine)
+        self._tables_created = True
     
     def drop_tables(self):
         """Drop all tables"""
         Base.metadata.drop_all(bind=self.engine)
+        self._tables_created = False
+    
+    def reset_schema(self):
+        """Drop and recreate all tables in a single transaction"""
+        with self.engine.begin() as conn:
+            Base.metadata.drop_all(bind=conn)
+            Base.metadata.create_all(bind=conn)
+        self._tables_created = True
+    
+    async def reset_all(self):
+        """
+        Empty every table in one transaction, keeping the schema
+        
+        Postgres gets a single TRUNCATE; other backends a DELETE per table.
+        """
+        async with self.async_engine.begin() as conn:
+            if not self._tables_created:
+                await conn.run_sync(Base.metadata.create_all)
+            tables = Base.metadata.sorted_tables
+            if conn.dialect.name == "postgresql":
+                names = ", ".join(conn.dialect.identifier_preparer.format_table(t) for t in tables)
+                await conn.execute(text(f"TRUNCATE {names} RESTART IDENTITY CASCADE"))
+            else:
+                for table in reversed(tables):
+                    await conn.execute(table.delete())
+        self._tables_created = True
     
     @contextmanager
     def get_session(self) -> Session:
@@ -53,6 +165,54 @@ class Database:
     def get_session_instance(self) -> Session:
         """Get a session instance (caller must manage lifecycle)"""
         return self.SessionLocal()
+    
+    @asynccontextmanager
+    async def get_async_session(self) -> AsyncIterator[AsyncSession]:
+        """Async context manager for database sessions (use on the event loop)"""
+        async with self.AsyncSessionLocal() as session:
+            try:
+                yield session
+                await session.commit()
+            except Exception:
+                await session.rollback()
+                raise
+
+
+async def log_events_bulk(session: AsyncSession, rows: List[Dict[str, Any]]):
+    """
+    Insert many audit log rows with one executemany INSERT
+    
+    SQLAlchemy 2.x batches these into multi-row INSERT ... VALUES statements
+    ("insertmanyvalues") on every backend.
+    """
+    if rows:
+        await session.execute(insert(AuditLogModel), rows)
+
+
+# Tables holding per-workflow rows, children first
+WORKFLOW_TABLES = (AuditLogModel, CheckpointModel, WorkflowStateModel)
+
+
+async def delete_workflow_rows(session: AsyncSession, workflow_id: str):
+    """
+    Delete a workflow's audit logs, checkpoints and state
+    
+    On Postgres the three deletes are chained as data-modifying CTEs so they
+    go out as one statement; elsewhere they run back to back in the session's
+    transaction. Nothing is loaded into the session, so ORM synchronization
+    is skipped.
+    """
+    statements = [
+        delete(model).where(model.workflow_id == workflow_id)
+        for model in WORKFLOW_TABLES
+    ]
+    if session.bind.dialect.name == "postgresql":
+        *ctes, final = statements
+        for i, stmt in enumerate(ctes):
+            final = final.add_cte(stmt.cte(f"del_{i}"))
+        statements = [final]
+    for stmt in statements:
+        await session.execute(stmt.execution_options(synchronize_session=False))
 
 
 # Global database instance
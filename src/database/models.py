@@ -1,12 +1,21 @@
 """
 SQLAlchemy ORM Models for persistence
 """
-from sqlalchemy import Column, String, Float, DateTime, Text, Boolean, JSON
+from sqlalchemy import Column, String, Float, DateTime, Text, Boolean, JSON, Index, func
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.declarative import declarative_base
-from datetime import datetime
+from datetime import datetime, timezone
 
 Base = declarative_base()
 
+# Binary, indexable JSONB on Postgres; plain JSON everywhere else
+JSONType = JSON().with_variant(JSONB(), "postgresql")
+
+
+def utcnow() -> datetime:
+    """Timezone-aware UTC now, for the few defaults that stay Python-side"""
+    return datetime.now(timezone.utc)
+
 
 class InvoiceModel(Base):
     __tablename__ = "invoices"
@@ -19,9 +28,10 @@ class InvoiceModel(Base):
     amount = Column(Float)
     currency = Column(String, default="USD")
     status = Column(String, default="PENDING")
-    raw_payload = Column(JSON)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    raw_payload = Column(JSONType)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # server_onupdate only marks the column as DB-maintained, so updates stay Python-side
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=utcnow)
 
 
 class CheckpointModel(Base):
@@ -32,27 +42,42 @@ class CheckpointModel(Base):
     invoice_id = Column(String, index=True)
     vendor_name = Column(String)
     amount = Column(Float)
-    state_blob = Column(JSON)
+    state_blob = Column(JSONType)
     reason_for_hold = Column(String)
     review_url = Column(String)
     status = Column(String, default="PENDING")  # PENDING, ACCEPTED, REJECTED
     reviewer_id = Column(String, nullable=True)
     reviewer_notes = Column(Text, nullable=True)
-    decision_at = Column(DateTime, nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    decision_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    __table_args__ = (
+        # list_pending_reviews filters on status
+        Index("ix_checkpoints_status", "status"),
+    )
 
 
 class AuditLogModel(Base):
     __tablename__ = "audit_logs"
     
     id = Column(String, primary_key=True)
-    workflow_id = Column(String, index=True)
+    workflow_id = Column(String)
     stage = Column(String)
     action = Column(String)
-    details = Column(JSON)
+    details = Column(JSONType)
     bigtool_selection = Column(String, nullable=True)
     mcp_server = Column(String, nullable=True)
-    timestamp = Column(DateTime, default=datetime.utcnow)
+    # Python-side: get_audit_log orders by this and SQLite's CURRENT_TIMESTAMP
+    # only has one-second resolution
+    timestamp = Column(DateTime(timezone=True), default=utcnow)
+    
+    __table_args__ = (
+        # get_audit_log filters on workflow_id and orders by timestamp; this
+        # also serves plain workflow_id lookups
+        Index("ix_audit_logs_workflow_ts", "workflow_id", "timestamp"),
+        # Containment / path queries on details (Postgres only)
+        Index("ix_audit_details_gin", "details", postgresql_using="gin").ddl_if(dialect="postgresql"),
+    )
 
 
 class WorkflowStateModel(Base):
@@ -61,7 +86,7 @@ class WorkflowStateModel(Base):
     workflow_id = Column(String, primary_key=True)
     current_stage = Column(String)
     status = Column(String)
-    state_data = Column(JSON)
-    started_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    completed_at = Column(DateTime, nullable=True)
+    state_data = Column(JSONType)
+    started_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=utcnow)
+    completed_at = Column(DateTime(timezone=True), nullable=True)
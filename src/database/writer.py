@@ -0,0 +1,89 @@
+"""
+Write-behind queue for workflow bookkeeping rows
+
+start_workflow hands its invoice / workflow-state inserts to this queue and
+starts running the graph straight away. A single drain task per event loop
+commits everything queued within a few milliseconds in one transaction, so
+concurrent starts share commits. Anything that needs the rows (COMPLETE's
+final update, the API response) awaits them by workflow id first.
+"""
+import asyncio
+import logging
+import os
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Rows from up to this many callers go into one commit
+WRITE_BATCH_MAX = int(os.getenv("WRITE_BATCH_MAX", "50"))
+# How long the drain task waits for more callers before committing
+WRITE_BATCH_DELAY = float(os.getenv("WRITE_BATCH_DELAY_MS", "5")) / 1000
+
+
+class WriteQueue:
+    """Coalesces ORM inserts from concurrent callers into shared commits"""
+    
+    def __init__(self, db):
+        self.db = db
+        # Plain deque (not asyncio.Queue) so the queue isn't tied to one loop
+        self._items: Deque[Tuple[Tuple[Any, ...], asyncio.Future]] = deque()
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._worker: Optional[asyncio.Task] = None
+    
+    def submit(self, key: str, objects: Iterable[Any]) -> asyncio.Future:
+        """Queue ORM objects for insert; the future resolves once committed"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._items.append((tuple(objects), future))
+        self._pending[key] = future
+        future.add_done_callback(lambda f: self._forget(key, f))
+        
+        worker = self._worker
+        if worker is None or worker.done() or worker.get_loop() is not loop:
+            self._worker = loop.create_task(self._drain())
+        return future
+    
+    async def wait(self, key: str):
+        """Wait until rows queued under key are committed (no-op if none)"""
+        future = self._pending.get(key)
+        if future is not None:
+            await asyncio.shield(future)
+    
+    def _forget(self, key: str, future: asyncio.Future):
+        if self._pending.get(key) is future:
+            del self._pending[key]
+    
+    async def _drain(self):
+        while self._items:
+            # Give concurrent callers a moment to join this commit
+            await asyncio.sleep(WRITE_BATCH_DELAY)
+            batch = []
+            while self._items and len(batch) < WRITE_BATCH_MAX:
+                batch.append(self._items.popleft())
+            
+            try:
+                async with self.db.get_async_session() as session:
+                    for objects, _ in batch:
+                        session.add_all(objects)
+            except Exception as e:
+                logger.error(f"Write-behind commit of {len(batch)} item(s) failed: {e}")
+                for _, future in batch:
+                    if not future.done() and not future.get_loop().is_closed():
+                        future.set_exception(e)
+            else:
+                for _, future in batch:
+                    if not future.done() and not future.get_loop().is_closed():
+                        future.set_result(None)
+
+
+# Global queue (bound to the global database)
+_write_queue = None
+
+
+def get_write_queue() -> WriteQueue:
+    global _write_queue
+    if _write_queue is None:
+        from .db import get_db
+        _write_queue = WriteQueue(get_db())
+    return _write_queue
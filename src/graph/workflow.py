@@ -2,12 +2,21 @@
 LangGraph Invoice Processing Workflow
 Main graph definition with all 12 stages
 """
+import asyncio
+import os
 import logging
+import threading
 import uuid
-from datetime import datetime
-from typing import Dict, Any, Literal
+from datetime import datetime, timezone
+from typing import Callable, Dict, Any, Iterable, List, Literal, Optional
+import orjson
+from sqlalchemy import select
+from langgraph.cache.memory import InMemoryCache
 from langgraph.graph import StateGraph, END
-from src.models.state import InvoiceState, WorkflowStatus
+from langgraph.types import CachePolicy
+from src.models.state import InvoiceState, WorkflowStatus, MatchStatus, utc_now_iso
+from src.models.deltas import delta_items
+from src.models.schemas import DecisionEnum
 from src.nodes import (
     intake_node,
     understand_node,
@@ -25,14 +34,48 @@ from src.nodes import (
 
 logger = logging.getLogger(__name__)
 
+# Seconds UNDERSTAND results are reused for an identical invoice (0 = off)
+NODE_CACHE_TTL = int(os.getenv("NODE_CACHE_TTL", "300"))
+# Graph runs (starts + resumes) allowed in flight at once; the rest wait
+INVOICE_AGENT_CONCURRENCY = int(os.getenv("INVOICE_AGENT_CONCURRENCY", "16"))
+# Starts a start_many batch keeps outstanding (each queues its rows up front)
+PIPELINE_CONCURRENCY = int(os.getenv("PIPELINE_CONCURRENCY", str(INVOICE_AGENT_CONCURRENCY)))
+
+# Opt-in: run straight-through invoices as direct node calls (see run_fast_path)
+GRAPH_FAST_PATH = os.getenv("GRAPH_FAST_PATH", "false").lower() == "true"
+# Invoices at or above this amount always go through the compiled graph
+FAST_PATH_MAX_AMOUNT = float(os.getenv("FAST_PATH_MAX_AMOUNT", "10000"))
+
+
+def stage_cache_key(*fields: str) -> Callable[[InvoiceState], bytes]:
+    """
+    Cache key built only from the state fields a stage actually reads
+    
+    Volatile fields (workflow_id, timestamps, bigtool_selections) stay out of
+    the key; the tool pool version is in it so availability changes miss.
+    """
+    def key_func(state: InvoiceState) -> bytes:
+        from src.bigtool.picker import get_bigtool_picker
+        return orjson.dumps(
+            [get_bigtool_picker().pool.version, *(state.get(f) for f in fields)],
+            option=orjson.OPT_SORT_KEYS,
+            default=str
+        )
+    return key_func
+
+
+def _stage_cache_policy(*fields: str) -> Optional[CachePolicy]:
+    if NODE_CACHE_TTL <= 0:
+        return None
+    return CachePolicy(key_func=stage_cache_key(*fields), ttl=NODE_CACHE_TTL)
+
 
 def should_checkpoint(state: InvoiceState) -> Literal["checkpoint_hitl", "reconcile"]:
     """
     Conditional edge: Route to CHECKPOINT_HITL if match failed, else to RECONCILE
     """
-    match_result = state.get("match_result", "")
-    
-    if match_result == "FAILED":
+    # str enums compare equal to the plain strings restored from state_blob
+    if state.get("match_result") == MatchStatus.FAILED:
         logger.info("Routing to CHECKPOINT_HITL (match failed)")
         return "checkpoint_hitl"
     else:
@@ -44,9 +87,7 @@ def should_continue_after_hitl(state: InvoiceState) -> Literal["reconcile", "com
     """
     Conditional edge: After HITL decision, route based on human decision
     """
-    human_decision = state.get("human_decision", "")
-    
-    if human_decision == "ACCEPT":
+    if state.get("human_decision") == DecisionEnum.ACCEPT:
         logger.info("Human ACCEPTED - Routing to RECONCILE")
         return "reconcile"
     else:
@@ -54,6 +95,58 @@ def should_continue_after_hitl(state: InvoiceState) -> Literal["reconcile", "com
         return "complete"
 
 
+def route_entry(state: InvoiceState) -> Literal["intake", "hitl_decision"]:
+    """
+    Conditional entry: resumed workflows carry a human decision and start at
+    HITL_DECISION, fresh ones start at INTAKE
+    """
+    if state.get("human_decision"):
+        return "hitl_decision"
+    return "intake"
+
+
+def is_fast_path_candidate(invoice_payload: Dict[str, Any]) -> bool:
+    """The common shape: PO referenced, line items present, small amount"""
+    amount = invoice_payload.get("amount") or 0
+    return bool(
+        invoice_payload.get("po_number")
+        and invoice_payload.get("line_items")
+        and 0 < amount < FAST_PATH_MAX_AMOUNT
+    )
+
+
+async def run_fast_path(state: InvoiceState) -> InvoiceState:
+    """
+    Run the workflow as plain sequential node calls
+    
+    Follows exactly the edges of create_invoice_graph (same routing
+    functions, so a failed match still pauses at CHECKPOINT_HITL) but skips
+    the Pregel super-step / channel machinery. Updates are applied the way
+    the graph's channels apply them (see _apply_update). Node caching
+    (UNDERSTAND) does not apply here.
+    """
+    state = dict(state)
+    for node in (intake_node, understand_node, prepare_node, retrieve_node, match_two_way_node):
+        _apply_update(state, await node(state))
+    
+    if should_checkpoint(state) == "checkpoint_hitl":
+        _apply_update(state, await checkpoint_hitl_node(state))
+        return state
+    
+    for node in (reconcile_node, approve_node, posting_node, notify_node, complete_node):
+        _apply_update(state, await node(state))
+    return state
+
+
+def _apply_update(state: Dict[str, Any], update: Any):
+    """Merge a node's update: bigtool_selections is reduced, the rest overwritten"""
+    update = dict(delta_items(update))
+    selections = update.pop("bigtool_selections", None)
+    state.update(update)
+    if selections:
+        state["bigtool_selections"] = state.get("bigtool_selections", {}) | selections
+
+
 def create_invoice_graph() -> StateGraph:
     """
     Create the LangGraph workflow for invoice processing
@@ -63,7 +156,7 @@ def create_invoice_graph() -> StateGraph:
         -> (if FAILED) CHECKPOINT_HITL -> [PAUSE]
         -> (if MATCHED) RECONCILE -> APPROVE -> POSTING -> NOTIFY -> COMPLETE
     
-    After HITL_DECISION:
+    After HITL_DECISION (resume enters here directly):
         -> (if ACCEPT) RECONCILE -> ... -> COMPLETE
         -> (if REJECT) COMPLETE (with MANUAL_HANDOFF status)
     """
@@ -73,7 +166,12 @@ def create_invoice_graph() -> StateGraph:
     
     # Add all nodes
     workflow.add_node("intake", intake_node)
-    workflow.add_node("understand", understand_node)
+    # OCR/parsing depends only on the invoice, so identical invoices
+    # (replays, retries, resubmits) reuse the result. PREPARE is not cached:
+    # enrichment and flags draw random credit / risk scores, which a cache
+    # hit would hand to other workflows
+    workflow.add_node("understand", understand_node,
+                      cache_policy=_stage_cache_policy("invoice_payload"))
     workflow.add_node("prepare", prepare_node)
     workflow.add_node("retrieve", retrieve_node)
     workflow.add_node("match_two_way", match_two_way_node)
@@ -85,8 +183,14 @@ def create_invoice_graph() -> StateGraph:
     workflow.add_node("notify", notify_node)
     workflow.add_node("complete", complete_node)
     
-    # Set entry point
-    workflow.set_entry_point("intake")
+    # Set entry point (fresh run or HITL resume)
+    workflow.set_conditional_entry_point(
+        route_entry,
+        {
+            "intake": "intake",
+            "hitl_decision": "hitl_decision"
+        }
+    )
     
     # Add edges (deterministic flow)
     workflow.add_edge("intake", "understand")
@@ -136,21 +240,34 @@ class InvoiceProcessingGraph:
     
     def __init__(self):
         self.graph = create_invoice_graph()
-        self.compiled = self.graph.compile()
-        self._running_workflows: Dict[str, InvoiceState] = {}
+        # One compiled graph serves both fresh runs and HITL resumes
+        self.compiled = self.graph.compile(
+            cache=InMemoryCache() if NODE_CACHE_TTL > 0 else None
+        )
+        self._sem: Optional[asyncio.Semaphore] = None
+        self._sem_loop = None
+    
+    def _limiter(self) -> asyncio.Semaphore:
+        """Concurrency limit for graph runs on the current event loop"""
+        loop = asyncio.get_running_loop()
+        if self._sem is None or self._sem_loop is not loop:
+            self._sem = asyncio.Semaphore(INVOICE_AGENT_CONCURRENCY)
+            self._sem_loop = loop
+        return self._sem
     
     async def start_workflow(self, invoice_payload: Dict[str, Any]) -> Dict[str, Any]:
         """
         Start a new invoice processing workflow
         """
         workflow_id = f"WF-{uuid.uuid4().hex[:8].upper()}"
+        now = utc_now_iso()
         
         initial_state: InvoiceState = {
             "workflow_id": workflow_id,
             "workflow_status": WorkflowStatus.RUNNING.value,
             "current_stage": "INTAKE",
-            "started_at": datetime.utcnow().isoformat(),
-            "updated_at": datetime.utcnow().isoformat(),
+            "started_at": now,
+            "updated_at": now,
             "invoice_payload": invoice_payload,
             "errors": [],
             "bigtool_selections": {}
@@ -158,14 +275,13 @@ class InvoiceProcessingGraph:
         
         logger.info(f"Starting workflow {workflow_id} for invoice {invoice_payload.get('invoice_id')}")
         
-        # Store initial state
-        from src.database import get_db
+        # Queue the initial rows and start running right away; the insert is
+        # committed in the background (batched with concurrent starts)
+        from src.database import get_write_queue
         from src.database.models import WorkflowStateModel, InvoiceModel
         
-        db = get_db()
-        with db.get_session() as session:
-            # Create invoice record
-            invoice = InvoiceModel(
+        persisted = get_write_queue().submit(workflow_id, [
+            InvoiceModel(
                 id=f"INV-{uuid.uuid4().hex[:8]}",
                 workflow_id=workflow_id,
                 invoice_id=invoice_payload.get("invoice_id", ""),
@@ -175,23 +291,27 @@ class InvoiceProcessingGraph:
                 currency=invoice_payload.get("currency", "USD"),
                 status="PROCESSING",
                 raw_payload=invoice_payload
-            )
-            session.add(invoice)
-            
-            # Create workflow state record
-            workflow_state = WorkflowStateModel(
+            ),
+            WorkflowStateModel(
                 workflow_id=workflow_id,
                 current_stage="INTAKE",
                 status=WorkflowStatus.RUNNING.value,
                 state_data=initial_state
             )
-            session.add(workflow_state)
-            session.commit()
+        ])
         
         # Run the workflow
         try:
-            final_state = await self.compiled.ainvoke(initial_state)
-            self._running_workflows[workflow_id] = final_state
+            async with self._limiter():
+                if GRAPH_FAST_PATH and is_fast_path_candidate(invoice_payload):
+                    final_state = await run_fast_path(initial_state)
+                else:
+                    final_state = await self.compiled.ainvoke(initial_state)
+            
+            # Don't report back before the workflow's rows exist (start rows,
+            # plus the checkpoint queued by CHECKPOINT_HITL when pausing)
+            await persisted
+            await get_write_queue().wait(workflow_id)
             
             # Check if workflow paused
             if final_state.get("workflow_status") == WorkflowStatus.PAUSED.value:
@@ -220,6 +340,26 @@ class InvoiceProcessingGraph:
                 "message": "Workflow execution failed"
             }
     
+    async def start_many(
+        self,
+        invoice_payloads: Iterable[Dict[str, Any]],
+        concurrency: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Start workflows for independent invoices concurrently
+        
+        At most `concurrency` (default PIPELINE_CONCURRENCY) starts are
+        outstanding at once, so a large batch doesn't queue every invoice's
+        rows before the first one runs. Results are in payload order.
+        """
+        semaphore = asyncio.Semaphore(concurrency or PIPELINE_CONCURRENCY)
+        
+        async def _one(invoice_payload: Dict[str, Any]) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.start_workflow(invoice_payload)
+        
+        return list(await asyncio.gather(*(_one(p) for p in invoice_payloads)))
+    
     async def resume_workflow(
         self, 
         checkpoint_id: str, 
@@ -230,16 +370,43 @@ class InvoiceProcessingGraph:
         """
         Resume a paused workflow after human decision
         """
+        from sqlalchemy import update
         from src.database import get_db
-        from src.database.models import CheckpointModel, WorkflowStateModel
+        from src.database.models import CheckpointModel, InvoiceModel
         
         db = get_db()
         
-        # Get checkpoint data
-        with db.get_session() as session:
-            checkpoint = session.query(CheckpointModel).filter(
-                CheckpointModel.checkpoint_id == checkpoint_id
-            ).first()
+        async with db.get_async_session() as session:
+            # Claim the checkpoint before anything else: only the caller whose
+            # UPDATE moves it off PENDING resumes, so a second decision sent
+            # while this resume runs can't post the invoice again
+            claimed = await session.execute(
+                update(CheckpointModel)
+                .where(
+                    CheckpointModel.checkpoint_id == checkpoint_id,
+                    CheckpointModel.status == "PENDING"
+                )
+                .values(
+                    status="ACCEPTED" if decision == DecisionEnum.ACCEPT else "REJECTED",
+                    reviewer_id=reviewer_id,
+                    decision_at=datetime.now(timezone.utc)
+                )
+                .execution_options(synchronize_session=False)
+            )
+            
+            # Get checkpoint data - just the columns resume needs, as a plain
+            # row (no ORM instance or identity-map bookkeeping), plus the
+            # stored invoice payload the checkpoint blob no longer duplicates
+            checkpoint = (await session.execute(
+                select(
+                    CheckpointModel.workflow_id,
+                    CheckpointModel.status,
+                    CheckpointModel.state_blob,
+                    InvoiceModel.raw_payload
+                )
+                .outerjoin(InvoiceModel, InvoiceModel.workflow_id == CheckpointModel.workflow_id)
+                .where(CheckpointModel.checkpoint_id == checkpoint_id)
+            )).first()
             
             if not checkpoint:
                 return {
@@ -247,7 +414,7 @@ class InvoiceProcessingGraph:
                     "message": f"Checkpoint {checkpoint_id} not found"
                 }
             
-            if checkpoint.status != "PENDING":
+            if claimed.rowcount == 0:
                 return {
                     "status": "ERROR",
                     "message": f"Checkpoint already processed: {checkpoint.status}"
@@ -255,49 +422,24 @@ class InvoiceProcessingGraph:
             
             workflow_id = checkpoint.workflow_id
             state_blob = checkpoint.state_blob
+            invoice_payload = state_blob.get("invoice_payload") or checkpoint.raw_payload or {}
         
         logger.info(f"Resuming workflow {workflow_id} with decision: {decision}")
         
         # Reconstruct state and add human decision
         resume_state: InvoiceState = {
             **state_blob,
+            "invoice_payload": invoice_payload,
             "workflow_status": WorkflowStatus.RUNNING.value,
             "human_decision": decision,
             "reviewer_id": reviewer_id,
             "hitl_checkpoint_id": checkpoint_id,
-            "updated_at": datetime.utcnow().isoformat()
+            "updated_at": utc_now_iso()
         }
         
-        # Create a graph that starts from HITL_DECISION
-        resume_graph = StateGraph(InvoiceState)
-        resume_graph.add_node("hitl_decision", hitl_decision_node)
-        resume_graph.add_node("reconcile", reconcile_node)
-        resume_graph.add_node("approve", approve_node)
-        resume_graph.add_node("posting", posting_node)
-        resume_graph.add_node("notify", notify_node)
-        resume_graph.add_node("complete", complete_node)
-        
-        resume_graph.set_entry_point("hitl_decision")
-        
-        resume_graph.add_conditional_edges(
-            "hitl_decision",
-            should_continue_after_hitl,
-            {
-                "reconcile": "reconcile",
-                "complete": "complete"
-            }
-        )
-        
-        resume_graph.add_edge("reconcile", "approve")
-        resume_graph.add_edge("approve", "posting")
-        resume_graph.add_edge("posting", "notify")
-        resume_graph.add_edge("notify", "complete")
-        resume_graph.add_edge("complete", END)
-        
-        compiled_resume = resume_graph.compile()
-        
         try:
-            final_state = await compiled_resume.ainvoke(resume_state)
+            async with self._limiter():
+                final_state = await self.compiled.ainvoke(resume_state)
             
             return {
                 "workflow_id": workflow_id,
@@ -316,16 +458,49 @@ class InvoiceProcessingGraph:
             }
     
     def get_workflow_state(self, workflow_id: str) -> Dict[str, Any]:
-        """Get current state of a workflow"""
-        return self._running_workflows.get(workflow_id, {})
+        """
+        Get the persisted state of a workflow
+        
+        Read from the workflow_states row on demand rather than keeping every
+        final state in memory. The row holds the start state until the run
+        pauses (CHECKPOINT_HITL) or completes (COMPLETE); those stages store
+        the status, stage, invoice, vendor profile and match fields, not
+        per-stage working data such as OCR text or history. Blocking; use
+        aget_workflow_state on the loop.
+        """
+        from src.database import get_db
+        from src.database.models import WorkflowStateModel
+        
+        with get_db().get_session() as session:
+            state_data = session.scalar(
+                select(WorkflowStateModel.state_data)
+                .where(WorkflowStateModel.workflow_id == workflow_id)
+            )
+        return state_data or {}
+    
+    async def aget_workflow_state(self, workflow_id: str) -> Dict[str, Any]:
+        """Async get_workflow_state, over the async engine"""
+        from src.database import get_db
+        from src.database.models import WorkflowStateModel
+        
+        async with get_db().get_async_session() as session:
+            state_data = await session.scalar(
+                select(WorkflowStateModel.state_data)
+                .where(WorkflowStateModel.workflow_id == workflow_id)
+            )
+        return state_data or {}
 
 
-# Global instance
+# Global instance (built at app startup; the lock keeps concurrent first
+# callers from compiling the graph twice)
 _graph_instance = None
+_graph_lock = threading.Lock()
 
 
 def get_invoice_graph() -> InvoiceProcessingGraph:
     global _graph_instance
     if _graph_instance is None:
-        _graph_instance = InvoiceProcessingGraph()
+        with _graph_lock:
+            if _graph_instance is None:
+                _graph_instance = InvoiceProcessingGraph()
     return _graph_instance
@@ -1,3 +1,4 @@
 # MCP Client package
 from .client import MCPClient, MCPServer
 from .abilities import CommonAbilities, AtlasAbilities
+from .loop import AsyncLoopThread, MCPClientWrapper, get_mcp_client_sync
@@ -1,10 +1,95 @@
 """
 MCP Abilities - Simulated implementations for COMMON and ATLAS servers
 """
-import uuid
-import random
-from datetime import datetime
-from typing import Dict, Any, List
+import asyncio
+import os
+import re
+import secrets
+from contextlib import contextmanager
+from contextvars import ContextVar
+from types import MappingProxyType
+from typing import Any, Awaitable, Callable, Dict, List, Mapping, Optional
+import numpy as np
+from src.models.state import MatchStatus, utc_now_iso
+
+# Simulated scores are drawn from a buffer of unit uniforms refilled in bulk
+# (one vectorized PCG64 call per batch instead of one PRNG call per value)
+_UNIFORM_BATCH = 1024
+_rng = np.random.default_rng()
+_uniform_buffer: List[float] = []
+
+
+def _uniform(low: float, high: float) -> float:
+    """Drop-in for random.uniform(low, high) backed by the bulk buffer"""
+    if not _uniform_buffer:
+        _uniform_buffer.extend(_rng.random(_UNIFORM_BATCH).tolist())
+    return low + (high - low) * _uniform_buffer.pop()
+
+
+# Attachments OCR'd at once by ocr_extract
+OCR_MAX_CONCURRENCY = int(os.getenv("OCR_MAX_CONCURRENCY", "4"))
+
+# Runs of whitespace collapsed by normalize_vendor
+_WS_RE = re.compile(r"\s+")
+
+# Candidate lists longer than this are scored as one NumPy vector
+_VECTOR_MIN_POS = 8
+
+
+def _best_po_vectorized(invoice_amount: float, pos: List[Dict[str, Any]], line_score: float):
+    """Same scoring as the loop in compute_match_score, over all POs at once"""
+    amounts = np.fromiter((po.get("amount", 0) for po in pos), dtype=np.float64, count=len(pos))
+    mask = amounts != 0
+    diff_pct = np.abs(invoice_amount - amounts) / np.where(mask, amounts, 1.0) * 100
+    scores = np.maximum(0.0, 1 - diff_pct / 100) * 0.6 + line_score * 0.4
+    # Zero-amount POs never match
+    scores[~mask] = -1.0
+    idx = int(np.argmax(scores))
+    if scores[idx] <= 0:
+        return 0.0, None
+    return float(scores[idx]), pos[idx]
+
+
+def build_vendor_profile(normalized_name: str, vendor_tax_id: str, enrichment: Dict[str, Any]) -> Dict[str, Any]:
+    """Vendor profile from the normalized name and enrich_vendor's data (PREPARE, both paths)"""
+    return {
+        "normalized_name": normalized_name,
+        "tax_id": enrichment.get("verified_tax_id", vendor_tax_id),
+        "enrichment_meta": enrichment.get("enrichment_meta", {}),
+        "credit_score": enrichment.get("credit_score"),
+        "risk_score": enrichment.get("risk_score")
+    }
+
+
+def _short_id(prefix: str, nbytes: int = 4) -> str:
+    """PREFIX-XXXXXXXX style id from nbytes of CSPRNG output (2 hex chars per byte)"""
+    return f"{prefix}-{secrets.token_hex(nbytes).upper()}"
+
+
+# One ISO timestamp shared by every ability run inside a stamped() block
+_call_ts: ContextVar[Optional[str]] = ContextVar("mcp_call_ts", default=None)
+
+
+@contextmanager
+def stamped():
+    """
+    Format the current time once for all abilities executed in the block
+    
+    Nested blocks (e.g. execute() inside an execute_many fan-out) reuse the
+    outer stamp.
+    """
+    if _call_ts.get() is not None:
+        yield
+        return
+    token = _call_ts.set(utc_now_iso())
+    try:
+        yield
+    finally:
+        _call_ts.reset(token)
+
+
+def _now_iso() -> str:
+    return _call_ts.get() or utc_now_iso()
 
 
 class CommonAbilities:
@@ -12,22 +97,16 @@ class CommonAbilities:
     COMMON Server Abilities - Internal processing, no external data needed
     """
     
-    @staticmethod
-    async def execute(ability: str, params: Dict[str, Any]) -> Dict[str, Any]:
-        abilities = {
-            "validate_schema": CommonAbilities.validate_schema,
-            "persist_invoice": CommonAbilities.persist_invoice,
-            "normalize_vendor": CommonAbilities.normalize_vendor,
-            "compute_flags": CommonAbilities.compute_flags,
-            "compute_match_score": CommonAbilities.compute_match_score,
-            "create_checkpoint": CommonAbilities.create_checkpoint,
-            "build_accounting_entries": CommonAbilities.build_accounting_entries,
-            "finalize_workflow": CommonAbilities.finalize_workflow,
-        }
-        
-        if ability in abilities:
-            return await abilities[ability](params)
-        raise ValueError(f"Unknown COMMON ability: {ability}")
+    # Static ability table, filled in after the class body (see below)
+    _DISPATCH: Mapping[str, Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]] = MappingProxyType({})
+    
+    @classmethod
+    async def execute(cls, ability: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        fn = cls._DISPATCH.get(ability)
+        if fn is None:
+            raise ValueError(f"Unknown COMMON ability: {ability}")
+        with stamped():
+            return await fn(params)
     
     @staticmethod
     async def validate_schema(params: Dict[str, Any]) -> Dict[str, Any]:
@@ -40,15 +119,15 @@ class CommonAbilities:
         return {
             "validated": len(missing) == 0,
             "missing_fields": missing,
-            "validation_ts": datetime.utcnow().isoformat()
+            "validation_ts": _now_iso()
         }
     
     @staticmethod
     async def persist_invoice(params: Dict[str, Any]) -> Dict[str, Any]:
         """Persist raw invoice to storage"""
         return {
-            "raw_id": f"RAW-{uuid.uuid4().hex[:8].upper()}",
-            "ingest_ts": datetime.utcnow().isoformat(),
+            "raw_id": _short_id("RAW"),
+            "ingest_ts": _now_iso(),
             "storage_path": f"/invoices/{params.get('invoice_id', 'unknown')}"
         }
     
@@ -58,7 +137,7 @@ class CommonAbilities:
         vendor_name = params.get("vendor_name", "")
         
         # Simple normalization: uppercase, remove extra spaces
-        normalized = " ".join(vendor_name.upper().split())
+        normalized = _WS_RE.sub(" ", vendor_name).strip().upper()
         
         return {
             "original_name": vendor_name,
@@ -79,14 +158,34 @@ class CommonAbilities:
             missing_info.append("po_reference")
         
         # Simulate risk score calculation
-        risk_score = random.uniform(0.1, 0.5)
+        risk_score = _uniform(0.1, 0.5)
         if invoice.get("amount", 0) > 50000:
             risk_score += 0.2
         
         return {
             "missing_info": missing_info,
             "risk_score": round(min(risk_score, 1.0), 2),
-            "flags_computed_at": datetime.utcnow().isoformat()
+            "flags_computed_at": _now_iso()
+        }
+    
+    @staticmethod
+    async def prepare_vendor(params: Dict[str, Any]) -> Dict[str, Any]:
+        """Normalize vendor, build its profile from enrichment data and compute flags in one call"""
+        vendor_name = params.get("vendor_name", "")
+        vendor_tax_id = params.get("vendor_tax_id", "")
+        enrichment = params.get("enrichment", {})
+        
+        normalized = await CommonAbilities.normalize_vendor({"vendor_name": vendor_name})
+        vendor_profile = build_vendor_profile(normalized["normalized_name"], vendor_tax_id, enrichment)
+        flags = await CommonAbilities.compute_flags({
+            "vendor_profile": vendor_profile,
+            "invoice": params.get("invoice_payload", {})
+        })
+        
+        return {
+            "normalized_name": normalized["normalized_name"],
+            "vendor_profile": vendor_profile,
+            "flags": flags
         }
     
     @staticmethod
@@ -100,36 +199,39 @@ class CommonAbilities:
         if not pos:
             return {
                 "match_score": 0.0,
-                "match_result": "FAILED",
+                "match_result": MatchStatus.FAILED.value,
                 "tolerance_pct": tolerance_pct,
                 "match_evidence": {"reason": "No POs found to match"}
             }
         
         # Simulate matching logic
         invoice_amount = invoice.get("amount", 0)
-        best_match = None
-        best_score = 0.0
+        # Line items match (simplified)
+        line_score = 0.8 if invoice.get("line_items") else 0.5
         
-        for po in pos:
-            po_amount = po.get("amount", 0)
-            if po_amount == 0:
-                continue
-            
-            # Calculate amount match
-            diff_pct = abs(invoice_amount - po_amount) / po_amount * 100
-            amount_score = max(0, 1 - (diff_pct / 100))
-            
-            # Line items match (simplified)
-            line_score = 0.8 if invoice.get("line_items") else 0.5
-            
-            # Combined score
-            score = (amount_score * 0.6) + (line_score * 0.4)
+        if len(pos) > _VECTOR_MIN_POS:
+            best_score, best_match = _best_po_vectorized(invoice_amount, pos, line_score)
+        else:
+            best_match = None
+            best_score = 0.0
             
-            if score > best_score:
-                best_score = score
-                best_match = po
-        
-        match_result = "MATCHED" if best_score >= threshold else "FAILED"
+            for po in pos:
+                po_amount = po.get("amount", 0)
+                if po_amount == 0:
+                    continue
+                
+                # Calculate amount match
+                diff_pct = abs(invoice_amount - po_amount) / po_amount * 100
+                amount_score = max(0, 1 - (diff_pct / 100))
+                
+                # Combined score
+                score = (amount_score * 0.6) + (line_score * 0.4)
+                
+                if score > best_score:
+                    best_score = score
+                    best_match = po
+        
+        match_result = (MatchStatus.MATCHED if best_score >= threshold else MatchStatus.FAILED).value
         
         return {
             "match_score": round(best_score, 3),
@@ -146,14 +248,14 @@ class CommonAbilities:
     @staticmethod
     async def create_checkpoint(params: Dict[str, Any]) -> Dict[str, Any]:
         """Create HITL checkpoint"""
-        checkpoint_id = f"CHKPT-{uuid.uuid4().hex[:8].upper()}"
+        checkpoint_id = _short_id("CHKPT")
         workflow_id = params.get("workflow_id", "unknown")
         
         return {
             "checkpoint_id": checkpoint_id,
             "review_url": f"/human-review/{checkpoint_id}",
             "paused_reason": params.get("reason", "Match score below threshold"),
-            "created_at": datetime.utcnow().isoformat()
+            "created_at": _now_iso()
         }
     
     @staticmethod
@@ -163,9 +265,12 @@ class CommonAbilities:
         amount = invoice.get("amount", 0)
         vendor = params.get("vendor_name", "Unknown Vendor")
         
+        # One 6-byte draw split into the two 6-hex-char entry ids
+        token = secrets.token_hex(6).upper()
+        
         entries = [
             {
-                "entry_id": f"JE-{uuid.uuid4().hex[:6].upper()}",
+                "entry_id": f"JE-{token[:6]}",
                 "account_code": "2100",
                 "account_name": "Accounts Payable",
                 "debit": 0,
@@ -173,7 +278,7 @@ class CommonAbilities:
                 "description": f"AP for invoice from {vendor}"
             },
             {
-                "entry_id": f"JE-{uuid.uuid4().hex[:6].upper()}",
+                "entry_id": f"JE-{token[6:]}",
                 "account_code": "5000",
                 "account_name": "Expense",
                 "debit": amount,
@@ -194,36 +299,39 @@ class CommonAbilities:
         """Finalize workflow and produce audit log"""
         return {
             "finalized": True,
-            "finalized_at": datetime.utcnow().isoformat(),
+            "finalized_at": _now_iso(),
             "status": params.get("status", "COMPLETED")
         }
 
 
+CommonAbilities._DISPATCH = MappingProxyType({
+    "validate_schema": CommonAbilities.validate_schema,
+    "persist_invoice": CommonAbilities.persist_invoice,
+    "normalize_vendor": CommonAbilities.normalize_vendor,
+    "compute_flags": CommonAbilities.compute_flags,
+    "prepare_vendor": CommonAbilities.prepare_vendor,
+    "compute_match_score": CommonAbilities.compute_match_score,
+    "create_checkpoint": CommonAbilities.create_checkpoint,
+    "build_accounting_entries": CommonAbilities.build_accounting_entries,
+    "finalize_workflow": CommonAbilities.finalize_workflow,
+})
+
+
 class AtlasAbilities:
     """
     ATLAS Server Abilities - External system interactions
     """
     
-    @staticmethod
-    async def execute(ability: str, params: Dict[str, Any]) -> Dict[str, Any]:
-        abilities = {
-            "ocr_extract": AtlasAbilities.ocr_extract,
-            "parse_line_items": AtlasAbilities.parse_line_items,
-            "enrich_vendor": AtlasAbilities.enrich_vendor,
-            "fetch_po": AtlasAbilities.fetch_po,
-            "fetch_grn": AtlasAbilities.fetch_grn,
-            "fetch_history": AtlasAbilities.fetch_history,
-            "apply_approval_policy": AtlasAbilities.apply_approval_policy,
-            "post_to_erp": AtlasAbilities.post_to_erp,
-            "schedule_payment": AtlasAbilities.schedule_payment,
-            "notify_vendor": AtlasAbilities.notify_vendor,
-            "notify_finance_team": AtlasAbilities.notify_finance_team,
-            "get_human_decision": AtlasAbilities.get_human_decision,
-        }
-        
-        if ability in abilities:
-            return await abilities[ability](params)
-        raise ValueError(f"Unknown ATLAS ability: {ability}")
+    # Static ability table, filled in after the class body (see below)
+    _DISPATCH: Mapping[str, Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]] = MappingProxyType({})
+    
+    @classmethod
+    async def execute(cls, ability: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        fn = cls._DISPATCH.get(ability)
+        if fn is None:
+            raise ValueError(f"Unknown ATLAS ability: {ability}")
+        with stamped():
+            return await fn(params)
     
     @staticmethod
     async def ocr_extract(params: Dict[str, Any]) -> Dict[str, Any]:
@@ -231,17 +339,31 @@ class AtlasAbilities:
         attachments = params.get("attachments", [])
         tool_used = params.get("ocr_tool", "tesseract")
         
-        # Simulate OCR extraction
+        # OCR every attachment concurrently (bounded); a payload without
+        # attachments is treated as one inline page
+        semaphore = asyncio.Semaphore(OCR_MAX_CONCURRENCY)
+        pages = await asyncio.gather(*(
+            AtlasAbilities._ocr_one(attachment, tool_used, semaphore)
+            for attachment in (attachments or [None])
+        ))
+        
         extracted_text = f"Invoice extracted using {tool_used}\n"
-        extracted_text += "INVOICE #12345\nDate: 2024-01-15\nAmount: $10,000.00"
+        extracted_text += "\n".join(text for text, _ in pages)
         
         return {
             "invoice_text": extracted_text,
             "ocr_tool_used": tool_used,
-            "pages_processed": len(attachments) or 1,
-            "confidence": 0.95
+            "pages_processed": len(pages),
+            "confidence": round(sum(conf for _, conf in pages) / len(pages), 2)
         }
     
+    @staticmethod
+    async def _ocr_one(attachment: Optional[str], tool_used: str, semaphore: asyncio.Semaphore):
+        """OCR a single attachment -> (text, confidence); real engines slot in here"""
+        async with semaphore:
+            # Simulate OCR extraction
+            return "INVOICE #12345\nDate: 2024-01-15\nAmount: $10,000.00", 0.95
+    
     @staticmethod
     async def parse_line_items(params: Dict[str, Any]) -> Dict[str, Any]:
         """Parse line items from OCR text"""
@@ -278,8 +400,8 @@ class AtlasAbilities:
                 "founded_year": 2010,
                 "headquarters": "New York, USA"
             },
-            "credit_score": round(random.uniform(650, 850), 0),
-            "risk_score": round(random.uniform(0.1, 0.4), 2),
+            "credit_score": round(_uniform(650, 850), 0),
+            "risk_score": round(_uniform(0.1, 0.4), 2),
             "verified_tax_id": tax_id or "TAX-UNKNOWN"
         }
     
@@ -294,9 +416,9 @@ class AtlasAbilities:
         pos = []
         if po_number or invoice_amount > 0:
             # Create a PO that may or may not match
-            po_amount = invoice_amount * random.uniform(0.85, 1.05)
+            po_amount = invoice_amount * _uniform(0.85, 1.05)
             pos.append({
-                "po_number": po_number or f"PO-{uuid.uuid4().hex[:6].upper()}",
+                "po_number": po_number or _short_id("PO", 3),
                 "vendor_name": vendor_name,
                 "amount": round(po_amount, 2),
                 "status": "APPROVED",
@@ -313,7 +435,7 @@ class AtlasAbilities:
         grns = []
         for po in po_numbers[:3]:  # Limit to 3
             grns.append({
-                "grn_number": f"GRN-{uuid.uuid4().hex[:6].upper()}",
+                "grn_number": _short_id("GRN", 3),
                 "po_number": po,
                 "received_date": "2024-01-10",
                 "status": "COMPLETE"
@@ -328,8 +450,8 @@ class AtlasAbilities:
         
         history = [
             {
-                "invoice_id": f"INV-{uuid.uuid4().hex[:6].upper()}",
-                "amount": random.uniform(5000, 50000),
+                "invoice_id": _short_id("INV", 3),
+                "amount": _uniform(5000, 50000),
                 "date": "2023-12-15",
                 "status": "PAID"
             }
@@ -363,9 +485,9 @@ class AtlasAbilities:
         
         return {
             "posted": True,
-            "erp_txn_id": f"ERP-TXN-{uuid.uuid4().hex[:8].upper()}",
+            "erp_txn_id": _short_id("ERP-TXN"),
             "entries_posted": len(entries),
-            "posted_at": datetime.utcnow().isoformat()
+            "posted_at": _now_iso()
         }
     
     @staticmethod
@@ -375,7 +497,7 @@ class AtlasAbilities:
         amount = params.get("amount", 0)
         
         return {
-            "scheduled_payment_id": f"PAY-{uuid.uuid4().hex[:8].upper()}",
+            "scheduled_payment_id": _short_id("PAY"),
             "scheduled_date": due_date,
             "amount": amount,
             "payment_method": "ACH"
@@ -392,7 +514,7 @@ class AtlasAbilities:
             "recipient": vendor_name,
             "channel": "email",
             "message": f"Invoice {invoice_id} has been processed",
-            "sent_at": datetime.utcnow().isoformat()
+            "sent_at": _now_iso()
         }
     
     @staticmethod
@@ -406,7 +528,7 @@ class AtlasAbilities:
             "recipient": "finance-team@company.com",
             "channel": "slack",
             "message": f"Invoice {invoice_id} status: {status}",
-            "sent_at": datetime.utcnow().isoformat()
+            "sent_at": _now_iso()
         }
     
     @staticmethod
@@ -418,6 +540,22 @@ class AtlasAbilities:
         return {
             "human_decision": decision,
             "reviewer_id": params.get("reviewer_id", ""),
-            "resume_token": f"RESUME-{uuid.uuid4().hex[:8].upper()}" if decision == "ACCEPT" else None,
+            "resume_token": _short_id("RESUME") if decision == "ACCEPT" else None,
             "next_stage": "RECONCILE" if decision == "ACCEPT" else "COMPLETE"
         }
+
+
+AtlasAbilities._DISPATCH = MappingProxyType({
+    "ocr_extract": AtlasAbilities.ocr_extract,
+    "parse_line_items": AtlasAbilities.parse_line_items,
+    "enrich_vendor": AtlasAbilities.enrich_vendor,
+    "fetch_po": AtlasAbilities.fetch_po,
+    "fetch_grn": AtlasAbilities.fetch_grn,
+    "fetch_history": AtlasAbilities.fetch_history,
+    "apply_approval_policy": AtlasAbilities.apply_approval_policy,
+    "post_to_erp": AtlasAbilities.post_to_erp,
+    "schedule_payment": AtlasAbilities.schedule_payment,
+    "notify_vendor": AtlasAbilities.notify_vendor,
+    "notify_finance_team": AtlasAbilities.notify_finance_team,
+    "get_human_decision": AtlasAbilities.get_human_decision,
+})
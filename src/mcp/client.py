@@ -2,21 +2,77 @@
 MCP (Model Context Protocol) Client for routing abilities to COMMON/ATLAS servers
 """
 import os
+import asyncio
+import hashlib
 import logging
-from typing import Dict, Any, Optional
+import time
+from collections import OrderedDict, deque
+from itertools import islice
+from typing import Awaitable, Callable, Deque, Dict, Any, List, Optional, Tuple
 from enum import Enum
 from dataclasses import dataclass
 import httpx
+import orjson
 
 logger = logging.getLogger(__name__)
 
+# Execution log entries kept in memory (oldest dropped first)
+MCP_LOG_MAX = int(os.getenv("MCP_LOG_MAX", "10000"))
+
+# Execution log entries are stored as tuples in this field order and only
+# turned into dicts when read
+_LOG_FIELDS = ("server", "ability", "success", "error", "cached", "params_keys", "result_keys")
+
+# Max abilities in flight for one execute_many fan-out
+MCP_MAX_CONCURRENCY = int(os.getenv("MCP_MAX_CONCURRENCY", "8"))
+# Max abilities in flight across the whole client (all workflows / fan-outs)
+MCP_MAX_INFLIGHT = int(os.getenv("MCP_MAX_INFLIGHT", "32"))
+
+# Pure abilities (result depends only on params) whose results are memoized.
+# validate_schema stamps its result with validation_ts, so it isn't one
+CACHEABLE_ABILITIES = frozenset({
+    "normalize_vendor",
+    "compute_match_score",
+    "apply_approval_policy",
+})
+MCP_CACHE_SIZE = int(os.getenv("MCP_CACHE_SIZE", "512"))
+MCP_CACHE_TTL = float(os.getenv("MCP_CACHE_TTL", "300"))
+
+# "simulated" runs abilities in-process; "http" POSTs them to the MCP servers
+MCP_TRANSPORT = os.getenv("MCP_TRANSPORT", "simulated").lower()
+
+# Pooling for the shared HTTP client (keep-alive avoids a handshake per call)
+MCP_HTTP_MAX_CONNECTIONS = int(os.getenv("MCP_HTTP_MAX_CONNECTIONS", "100"))
+MCP_HTTP_MAX_KEEPALIVE = int(os.getenv("MCP_HTTP_MAX_KEEPALIVE", "20"))
+MCP_HTTP_TIMEOUT = float(os.getenv("MCP_HTTP_TIMEOUT", "10"))
+MCP_HTTP_CONNECT_TIMEOUT = float(os.getenv("MCP_HTTP_CONNECT_TIMEOUT", "3"))
+
+# HTTP/2 lets concurrent execute_many calls share one connection as
+# multiplexed streams. httpx needs the h2 package for it (httpx[http2]); with
+# brotli installed (httpx[brotli]) it also advertises and decodes "br" bodies
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Extra attempts for a failed background (fire-and-forget) ability
+MCP_BACKGROUND_RETRIES = int(os.getenv("MCP_BACKGROUND_RETRIES", "2"))
+
+# Called with a background ability's final response (after any retries)
+BackgroundCallback = Callable[["MCPResponse"], Awaitable[None]]
+
 
 class MCPServer(str, Enum):
     COMMON = "COMMON"  # Internal abilities, no external data needed
     ATLAS = "ATLAS"    # External system interactions (ERP, enrichment)
 
 
-@dataclass
+class MCPBatchUnsupported(Exception):
+    """The server answered a JSON-RPC batch with something other than a response array"""
+
+
+@dataclass(slots=True, frozen=True)
 class MCPResponse:
     success: bool
     data: Dict[str, Any]
@@ -36,7 +92,18 @@ class MCPClient:
     def __init__(self):
         self.common_url = os.getenv("COMMON_SERVER_URL", "http://localhost:8000/mcp/common")
         self.atlas_url = os.getenv("ATLAS_SERVER_URL", "http://localhost:8000/mcp/atlas")
-        self.execution_log: list = []
+        self.execution_log: Deque[Tuple] = deque(maxlen=MCP_LOG_MAX)
+        # Side-effect abilities nobody waits on (plain deque: not loop-bound)
+        self._background: Deque[Tuple[MCPServer, str, Dict[str, Any], Optional[BackgroundCallback]]] = deque()
+        self._background_worker: Optional[asyncio.Task] = None
+        # Shared pooled HTTP client, created on first use inside the event loop
+        self._http: Optional[httpx.AsyncClient] = None
+        self._inflight: Optional[asyncio.Semaphore] = None
+        self._inflight_loop = None
+        # LRU of (expires_at, result) for CACHEABLE_ABILITIES
+        self._cache: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        # Servers that turned down a batch request; execute_batch skips them
+        self._no_batch: set = set()
     
     def _get_server_url(self, server: MCPServer) -> str:
         return self.common_url if server == MCPServer.COMMON else self.atlas_url
@@ -50,46 +117,310 @@ class MCPClient:
         """
         Execute an ability on the specified MCP server
         
-        For demo purposes, this simulates the MCP call locally.
-        In production, this would make HTTP calls to actual MCP servers.
+        For demo purposes, this simulates the MCP call locally. With
+        MCP_TRANSPORT=http it POSTs to the actual MCP servers instead.
         """
-        log_entry = {
-            "server": server.value,
-            "ability": ability,
-            "params_keys": list(params.keys())
-        }
+        cache_key = self._result_cache_key(server, ability, params)
         
         try:
-            # Simulate MCP execution (in production, use httpx to call actual servers)
-            result = await self._simulate_ability(server, ability, params)
+            cached = self._cache_get(cache_key) if cache_key else None
+            if cached is not None:
+                return self._record(server, ability, params, cached, cached=True)
             
-            log_entry["success"] = True
-            log_entry["result_keys"] = list(result.keys()) if result else []
-            self.execution_log.append(log_entry)
+            async with self._inflight_limit():
+                if MCP_TRANSPORT == "http":
+                    result = await self._call_server(server, ability, params)
+                else:
+                    result = await self._simulate_ability(server, ability, params)
             
-            logger.info(f"MCP [{server.value}] executed '{ability}' successfully")
-            
-            return MCPResponse(
-                success=True,
-                data=result,
-                server=server,
-                ability=ability
-            )
+            if cache_key:
+                self._cache_put(cache_key, result)
+            return self._record(server, ability, params, result)
             
         except Exception as e:
-            log_entry["success"] = False
-            log_entry["error"] = str(e)
-            self.execution_log.append(log_entry)
-            
-            logger.error(f"MCP [{server.value}] failed '{ability}': {e}")
+            return self._record(server, ability, params, error=str(e))
+    
+    def _record(
+        self,
+        server: MCPServer,
+        ability: str,
+        params: Dict[str, Any],
+        result: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None,
+        cached: bool = False
+    ) -> MCPResponse:
+        """Log an ability's outcome and wrap it in an MCPResponse"""
+        success = error is None
+        
+        self.execution_log.append((
+            server.value, ability, success, error, cached,
+            tuple(params), tuple(result or ()) if success else None
+        ))
+        
+        if success:
+            logger.info(f"MCP [{server.value}] executed '{ability}' successfully")
+        else:
+            logger.error(f"MCP [{server.value}] failed '{ability}': {error}")
+        
+        return MCPResponse(
+            success=success,
+            data=result if success else {},
+            server=server,
+            ability=ability,
+            error=error
+        )
+    
+    def _inflight_limit(self) -> asyncio.Semaphore:
+        """Client-wide cap on executing abilities, per event loop (cache hits skip it)"""
+        loop = asyncio.get_running_loop()
+        if self._inflight is None or self._inflight_loop is not loop:
+            self._inflight = asyncio.Semaphore(MCP_MAX_INFLIGHT)
+            self._inflight_loop = loop
+        return self._inflight
+    
+    def _result_cache_key(self, server: MCPServer, ability: str, params: Dict[str, Any]) -> Optional[str]:
+        """Cache key for a pure ability's result, None when it isn't memoized"""
+        if ability in CACHEABLE_ABILITIES and MCP_CACHE_SIZE > 0:
+            return self._cache_key(server, ability, params)
+        return None
+    
+    @staticmethod
+    def _cache_key(server: MCPServer, ability: str, params: Dict[str, Any]) -> str:
+        raw = orjson.dumps([server.value, ability, params], option=orjson.OPT_SORT_KEYS, default=str)
+        return hashlib.blake2b(raw, digest_size=16).hexdigest()
+    
+    def _cache_get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        expires_at, result = entry
+        if expires_at < time.monotonic():
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        # Shallow copy so callers can't edit the cached dict's top level
+        return dict(result)
+    
+    def _cache_put(self, key: str, result: Dict[str, Any]):
+        self._cache[key] = (time.monotonic() + MCP_CACHE_TTL, dict(result))
+        self._cache.move_to_end(key)
+        while len(self._cache) > MCP_CACHE_SIZE:
+            self._cache.popitem(last=False)
+    
+    def clear_cache(self):
+        self._cache.clear()
+    
+    async def execute_many(
+        self,
+        calls: List[Tuple[MCPServer, str, Dict[str, Any]]]
+    ) -> List[MCPResponse]:
+        """
+        Execute independent abilities concurrently
+        
+        Args:
+            calls: (server, ability, params) for each ability
+        
+        Returns:
+            MCPResponse per call, in call order (failures are returned, not raised)
+        """
+        semaphore = asyncio.Semaphore(MCP_MAX_CONCURRENCY)
+        
+        async def _bounded(server: MCPServer, ability: str, params: Dict[str, Any]) -> MCPResponse:
+            async with semaphore:
+                return await self.execute_ability(server, ability, params)
+        
+        # One timestamp for the whole fan-out; gathered tasks copy the context
+        from .abilities import stamped
+        with stamped():
+            return list(await asyncio.gather(*(_bounded(*call) for call in calls)))
+
+    async def execute_batch(
+        self,
+        calls: List[Tuple[MCPServer, str, Dict[str, Any]]]
+    ) -> List[MCPResponse]:
+        """
+        Execute independent abilities with one round trip per server
+        
+        Over the http transport the calls for each server go out as a single
+        JSON-RPC 2.0 batch request (cache hits are answered locally first).
+        The simulated transport has no round trip to save, and servers that
+        reject batching are remembered; both get execute_many instead.
+        
+        Args:
+            calls: (server, ability, params) for each ability
+        
+        Returns:
+            MCPResponse per call, in call order (failures are returned, not raised)
+        """
+        if MCP_TRANSPORT != "http":
+            return await self.execute_many(calls)
+        
+        responses: List[Optional[MCPResponse]] = [None] * len(calls)
+        # server -> [(call index, cache key)] still to execute
+        pending: Dict[MCPServer, List[Tuple[int, Optional[str]]]] = {}
+        for i, (server, ability, params) in enumerate(calls):
+            cache_key = self._result_cache_key(server, ability, params)
+            cached = self._cache_get(cache_key) if cache_key else None
+            if cached is not None:
+                responses[i] = self._record(server, ability, params, cached, cached=True)
+            else:
+                pending.setdefault(server, []).append((i, cache_key))
+        
+        async def _run(server: MCPServer, entries: List[Tuple[int, Optional[str]]]):
+            if len(entries) > 1 and server not in self._no_batch:
+                try:
+                    async with self._inflight_limit():
+                        replies = await self._call_server_batch(
+                            server, [calls[i][1:] for i, _ in entries]
+                        )
+                except MCPBatchUnsupported as e:
+                    logger.warning(f"MCP [{server.value}] does not accept batches ({e}); sending calls individually")
+                    self._no_batch.add(server)
+                except Exception as e:
+                    for i, _ in entries:
+                        responses[i] = self._record(server, calls[i][1], calls[i][2], error=str(e))
+                    return
+                else:
+                    for (i, cache_key), (result, error) in zip(entries, replies):
+                        if error is None and cache_key:
+                            self._cache_put(cache_key, result)
+                        responses[i] = self._record(server, calls[i][1], calls[i][2], result, error)
+                    return
             
-            return MCPResponse(
-                success=False,
-                data={},
-                server=server,
-                ability=ability,
-                error=str(e)
+            results = await self.execute_many([calls[i] for i, _ in entries])
+            for (i, _), response in zip(entries, results):
+                responses[i] = response
+        
+        await asyncio.gather(*(_run(server, entries) for server, entries in pending.items()))
+        return responses
+    
+    def submit_background(
+        self,
+        calls: List[Tuple[MCPServer, str, Dict[str, Any]]],
+        on_result: Optional[BackgroundCallback] = None
+    ):
+        """
+        Queue side-effect abilities to run after the caller moves on
+        
+        A worker task on the current loop executes them concurrently and
+        retries failures up to MCP_BACKGROUND_RETRIES times. Each call's final
+        response lands in the execution log and, when given, is passed to
+        on_result (a call that raises is reported as a failed response).
+        """
+        loop = asyncio.get_running_loop()
+        self._background.extend((*call, on_result) for call in calls)
+        
+        worker = self._background_worker
+        if worker is None or worker.done() or worker.get_loop() is not loop:
+            self._background_worker = loop.create_task(self._drain_background())
+    
+    async def flush_background(self):
+        """Wait until queued background abilities have run (e.g. at shutdown)"""
+        worker = self._background_worker
+        if worker is not None and not worker.done() and worker.get_loop() is asyncio.get_running_loop():
+            await asyncio.shield(worker)
+    
+    async def _drain_background(self):
+        semaphore = asyncio.Semaphore(MCP_MAX_CONCURRENCY)
+        
+        async def _with_retries(server: MCPServer, ability: str, params: Dict[str, Any]) -> MCPResponse:
+            async with semaphore:
+                for attempt in range(MCP_BACKGROUND_RETRIES + 1):
+                    response = await self.execute_ability(server, ability, params)
+                    if response.success:
+                        return response
+                    logger.warning(f"Background '{ability}' attempt {attempt + 1} failed: {response.error}")
+                logger.error(f"Background '{ability}' gave up after {MCP_BACKGROUND_RETRIES + 1} attempts")
+                return response
+        
+        while self._background:
+            batch = [self._background.popleft() for _ in range(len(self._background))]
+            # One call blowing up must not stop its siblings or strand the
+            # rest of the queue
+            results = await asyncio.gather(*(_with_retries(*call[:3]) for call in batch), return_exceptions=True)
+            for (server, ability, _, on_result), result in zip(batch, results):
+                if isinstance(result, Exception):
+                    logger.error(f"Background '{ability}' raised: {result}")
+                    result = MCPResponse(success=False, data={}, server=server, ability=ability, error=str(result))
+                if on_result is not None:
+                    try:
+                        await on_result(result)
+                    except Exception as e:
+                        logger.error(f"Background '{ability}' result callback raised: {e}")
+    
+    def _get_http(self) -> httpx.AsyncClient:
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=MCP_HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=MCP_HTTP_MAX_KEEPALIVE
+                ),
+                timeout=httpx.Timeout(MCP_HTTP_TIMEOUT, connect=MCP_HTTP_CONNECT_TIMEOUT),
+                http2=HTTP2_AVAILABLE
             )
+        return self._http
+    
+    async def _call_server(
+        self,
+        server: MCPServer,
+        ability: str,
+        params: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Execute an ability on a real MCP server over the shared connection pool"""
+        response = await self._get_http().post(
+            self._get_server_url(server),
+            json={"ability": ability, "params": params}
+        )
+        response.raise_for_status()
+        return response.json()
+    
+    async def _call_server_batch(
+        self,
+        server: MCPServer,
+        calls: List[Tuple[str, Dict[str, Any]]]
+    ) -> List[Tuple[Optional[Dict[str, Any]], Optional[str]]]:
+        """
+        Execute several abilities on one MCP server as a JSON-RPC 2.0 batch
+        
+        Returns (result, error) per call, in call order. Raises
+        MCPBatchUnsupported if the server doesn't answer with a response array.
+        """
+        payload = [
+            {
+                "jsonrpc": "2.0",
+                "id": i,
+                "method": "execute_ability",
+                "params": {"server": server.value, "ability": ability, "params": params}
+            }
+            for i, (ability, params) in enumerate(calls)
+        ]
+        response = await self._get_http().post(self._get_server_url(server), json=payload)
+        if response.status_code in (400, 404, 405, 415, 501):
+            raise MCPBatchUnsupported(f"HTTP {response.status_code}")
+        response.raise_for_status()
+        
+        replies = response.json()
+        if not isinstance(replies, list):
+            raise MCPBatchUnsupported("non-array response")
+        
+        by_id = {reply.get("id"): reply for reply in replies if isinstance(reply, dict)}
+        outcomes = []
+        for i in range(len(calls)):
+            reply = by_id.get(i)
+            if reply is None:
+                outcomes.append((None, "No response for call in batch"))
+            elif reply.get("error") is not None:
+                error = reply["error"]
+                outcomes.append((None, error.get("message", str(error)) if isinstance(error, dict) else str(error)))
+            else:
+                outcomes.append((reply.get("result") or {}, None))
+        return outcomes
+    
+    async def aclose(self):
+        """Close the pooled HTTP client (app shutdown)"""
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
     
     async def _simulate_ability(
         self, 
@@ -108,11 +439,16 @@ class MCPClient:
         else:
             return await AtlasAbilities.execute(ability, params)
     
-    def get_execution_log(self) -> list:
-        return self.execution_log
+    def get_execution_log(self, offset: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Execution log entries (oldest first) as dicts, built only for the requested page"""
+        stop = None if limit is None else offset + limit
+        return [
+            {field: value for field, value in zip(_LOG_FIELDS, entry) if value is not None}
+            for entry in islice(self.execution_log, offset, stop)
+        ]
     
     def clear_log(self):
-        self.execution_log = []
+        self.execution_log.clear()
 
 
 # Global instance
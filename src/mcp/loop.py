@@ -0,0 +1,94 @@
+"""
+Synchronous bridge to the async MCP client
+
+Sync code (scripts, sync tests, worker threads) submits coroutines to one
+long-lived event loop running in a background thread instead of paying for
+an asyncio.run() loop per call. Calls from several threads run concurrently
+on that loop.
+"""
+import asyncio
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from .client import MCPClient, MCPResponse, MCPServer
+
+
+class AsyncLoopThread(threading.Thread):
+    """Daemon thread that owns an event loop and runs it forever"""
+    
+    def __init__(self):
+        super().__init__(name="mcp-loop", daemon=True)
+        self.loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+    
+    def run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.call_soon(self._ready.set)
+        self.loop.run_forever()
+        self.loop.close()
+    
+    def start(self):
+        super().start()
+        self._ready.wait()
+    
+    def submit(self, coro) -> Any:
+        """Run a coroutine on the loop and block until it returns"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+    
+    def stop(self):
+        if self.loop.is_running():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+        self.join()
+
+
+class MCPClientWrapper:
+    """
+    Blocking facade over MCPClient
+    
+    The wrapped client gets its own instance rather than the global one:
+    its semaphores, background worker and pooled HTTP client then only ever
+    see the loop thread's event loop.
+    """
+    
+    def __init__(self, client: Optional[MCPClient] = None):
+        self._async = client or MCPClient()
+        self._thread = AsyncLoopThread()
+        self._thread.start()
+    
+    @property
+    def client(self) -> MCPClient:
+        return self._async
+    
+    def execute_ability_sync(
+        self,
+        server: MCPServer,
+        ability: str,
+        params: Dict[str, Any]
+    ) -> MCPResponse:
+        return self._thread.submit(self._async.execute_ability(server, ability, params))
+    
+    def execute_many_sync(
+        self,
+        calls: List[Tuple[MCPServer, str, Dict[str, Any]]]
+    ) -> List[MCPResponse]:
+        return self._thread.submit(self._async.execute_many(calls))
+    
+    def close(self):
+        """Flush background abilities, close the HTTP pool and stop the loop"""
+        self._thread.submit(self._async.flush_background())
+        self._thread.submit(self._async.aclose())
+        self._thread.stop()
+
+
+# Global sync client (starts its loop thread on first use)
+_mcp_client_sync = None
+_mcp_client_sync_lock = threading.Lock()
+
+
+def get_mcp_client_sync() -> MCPClientWrapper:
+    global _mcp_client_sync
+    if _mcp_client_sync is None:
+        with _mcp_client_sync_lock:
+            if _mcp_client_sync is None:
+                _mcp_client_sync = MCPClientWrapper()
+    return _mcp_client_sync
@@ -1,7 +1,8 @@
 # Models package
-from .state import InvoiceState, WorkflowStatus
+from .state import InvoiceState, WorkflowStatus, MatchStatus
+from .deltas import MatchDelta, delta_items
 from .schemas import (
     InvoicePayload, LineItem, VendorProfile, 
     MatchResult, CheckpointData, HumanReviewItem,
-    HumanDecision, AccountingEntry
+    HumanDecision, DecisionEnum, AccountingEntry
 )
@@ -0,0 +1,27 @@
+"""
+Typed state deltas returned by workflow nodes
+
+LangGraph accepts a dataclass as a node's update and reads the fields named
+in InvoiceState off it directly, so a node can return one of these instead
+of building a dict.
+"""
+from dataclasses import dataclass, fields
+from typing import Any, Dict
+
+
+@dataclass(slots=True)
+class MatchDelta:
+    """MATCH_TWO_WAY stage outputs"""
+    current_stage: str
+    match_score: float
+    match_result: str
+    tolerance_pct: float
+    match_evidence: Dict[str, Any]
+    updated_at: str
+
+
+def delta_items(delta: Any) -> Dict[str, Any]:
+    """A node update as a plain dict (dicts pass through; no deep copy, unlike asdict)"""
+    if isinstance(delta, dict):
+        return delta
+    return {f.name: getattr(delta, f.name) for f in fields(delta)}
@@ -1,13 +1,15 @@
 """
 Pydantic schemas for API requests/responses
 """
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 from enum import Enum
 
 
 class LineItem(BaseModel):
+    model_config = ConfigDict(frozen=True)
+    
     desc: str
     qty: float
     unit_price: float
@@ -15,6 +17,9 @@ class LineItem(BaseModel):
 
 
 class InvoicePayload(BaseModel):
+    # Request payloads are read-only once validated
+    model_config = ConfigDict(frozen=True)
+    
     invoice_id: str
     vendor_name: str
     vendor_tax_id: str
@@ -1,9 +1,15 @@
 """
 LangGraph State Definition for Invoice Processing Workflow
 """
-from typing import TypedDict, Optional, List, Dict, Any
+import operator
+from typing import Annotated, Required, TypedDict, Optional, List, Dict, Any
 from enum import Enum
-from datetime import datetime
+from datetime import datetime, timezone
+
+
+def utc_now_iso() -> str:
+    """Current UTC time as a naive ISO-8601 string (the format of every state timestamp)"""
+    return datetime.now(timezone.utc).replace(tzinfo=None).isoformat()
 
 
 class WorkflowStatus(str, Enum):
@@ -15,18 +21,24 @@ class WorkflowStatus(str, Enum):
     MANUAL_HANDOFF = "MANUAL_HANDOFF"
 
 
+class MatchStatus(str, Enum):
+    MATCHED = "MATCHED"
+    FAILED = "FAILED"
+
+
 class InvoiceState(TypedDict, total=False):
     """Main state object passed through all LangGraph nodes"""
     
-    # Workflow metadata
-    workflow_id: str
+    # Workflow metadata (workflow_id and invoice_payload are set on every
+    # start and resume, so nodes index them directly)
+    workflow_id: Required[str]
     workflow_status: str
     current_stage: str
     started_at: str
     updated_at: str
     
     # Original input
-    invoice_payload: Dict[str, Any]
+    invoice_payload: Required[Dict[str, Any]]
     
     # INTAKE stage outputs
     raw_id: str
@@ -93,4 +105,5 @@ class InvoiceState(TypedDict, total=False):
     errors: List[Dict[str, Any]]
     
     # Bigtool selections log
-    bigtool_selections: Dict[str, str]
+    # Nodes return only their own pick; the reducer merges them with dict |
+    bigtool_selections: Annotated[Dict[str, str], operator.or_]
@@ -3,9 +3,8 @@ APPROVE Node - Apply invoice approval policy
 Server: ATLAS
 """
 import logging
-from datetime import datetime
 from typing import Dict, Any
-from src.models.state import InvoiceState
+from src.models.state import InvoiceState, utc_now_iso
 from src.mcp.client import get_mcp_client, MCPServer
 
 logger = logging.getLogger(__name__)
@@ -18,13 +17,11 @@ async def approve_node(state: InvoiceState) -> Dict[str, Any]:
     This is a DETERMINISTIC node.
     Server: ATLAS (if integration needed)
     """
-    logger.info("=" * 50)
-    logger.info("STAGE: APPROVE - Applying approval policy")
-    logger.info("=" * 50)
+    logger.info("=" * 50 + "\nSTAGE: APPROVE - Applying approval policy\n" + "=" * 50)
     
     mcp = get_mcp_client()
     
-    invoice_payload = state.get("invoice_payload", {})
+    invoice_payload = state["invoice_payload"]
     normalized_invoice = state.get("normalized_invoice", {})
     
     amount = normalized_invoice.get("amount", invoice_payload.get("amount", 0))
@@ -45,14 +42,14 @@ async def approve_node(state: InvoiceState) -> Dict[str, Any]:
     approver_id = approval_result.data.get("approver_id")
     approval_reason = approval_result.data.get("approval_reason", "")
     
-    logger.info(f"Approval status: {approval_status}")
+    logger.info("Approval status: %s", approval_status)
     if approver_id:
-        logger.info(f"Approver: {approver_id}")
-    logger.info(f"Reason: {approval_reason}")
+        logger.info("Approver: %s", approver_id)
+    logger.info("Reason: %s", approval_reason)
     
     return {
         "current_stage": "APPROVE",
         "approval_status": approval_status,
         "approver_id": approver_id,
-        "updated_at": datetime.utcnow().isoformat()
+        "updated_at": utc_now_iso()
     }
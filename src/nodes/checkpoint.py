@@ -2,19 +2,22 @@
 CHECKPOINT_HITL Node - Create checkpoint for human review
 Server: COMMON
 """
+import asyncio
 import logging
-import uuid
-import json
-from datetime import datetime
+import secrets
 from typing import Dict, Any
-from src.models.state import InvoiceState, WorkflowStatus
+from src.models.state import InvoiceState, WorkflowStatus, utc_now_iso
 from src.mcp.client import get_mcp_client, MCPServer
 from src.bigtool.picker import get_bigtool_picker
-from src.database import get_db
-from src.database.models import CheckpointModel
+from sqlalchemy import update
+from src.database import get_db, get_write_queue
+from src.database.models import CheckpointModel, WorkflowStateModel
 
 logger = logging.getLogger(__name__)
 
+# Bigtool candidates: databases
+_DB_POOL = ("postgres", "sqlite", "dynamodb")
+
 
 async def checkpoint_hitl_node(state: InvoiceState) -> Dict[str, Any]:
     """
@@ -33,45 +36,43 @@ async def checkpoint_hitl_node(state: InvoiceState) -> Dict[str, Any]:
     Server: COMMON
     Bigtool selects DB tool (Postgres / SQLite / Dynamo)
     """
-    logger.info("=" * 50)
-    logger.info("STAGE: CHECKPOINT_HITL - Creating human review checkpoint")
-    logger.info("=" * 50)
+    logger.info("=" * 50 + "\nSTAGE: CHECKPOINT_HITL - Creating human review checkpoint\n" + "=" * 50)
     
     mcp = get_mcp_client()
     bigtool = get_bigtool_picker()
-    db = get_db()
     
-    invoice_payload = state.get("invoice_payload", {})
-    workflow_id = state.get("workflow_id", "")
+    invoice_payload = state["invoice_payload"]
+    workflow_id = state["workflow_id"]
     match_score = state.get("match_score", 0)
     match_evidence = state.get("match_evidence", {})
+    bigtool_selections = state.get("bigtool_selections", {})
     
-    # Select DB tool using Bigtool
-    db_tool = bigtool.select(
-        capability="db",
-        context={"workflow_id": workflow_id},
-        pool_hint=["postgres", "sqlite", "dynamodb"]
-    )
-    logger.info(f"Bigtool selected DB: {db_tool.name}")
-    
-    # Create checkpoint via COMMON server
-    checkpoint_result = await mcp.execute_ability(
+    # Create checkpoint via COMMON server, overlapped with tool selection
+    # and building the state blob
+    checkpoint_task = asyncio.create_task(mcp.execute_ability(
         server=MCPServer.COMMON,
         ability="create_checkpoint",
         params={
             "workflow_id": workflow_id,
             "reason": f"Match score {match_score:.3f} below threshold"
         }
-    )
+    ))
     
-    checkpoint_id = checkpoint_result.data.get("checkpoint_id", f"CHKPT-{uuid.uuid4().hex[:8].upper()}")
-    review_url = checkpoint_result.data.get("review_url", f"/human-review/{checkpoint_id}")
-    paused_reason = checkpoint_result.data.get("paused_reason", "Match score below threshold")
+    # Select DB tool using Bigtool
+    db_tool = bigtool.select(
+        capability="db",
+        context={"workflow_id": workflow_id},
+        pool_hint=_DB_POOL
+    )
+    logger.info("Bigtool selected DB: %s", db_tool.name)
     
-    # Prepare state blob for persistence (exclude non-serializable items)
+    # Prepare state blob for persistence: what the resumed stages and the
+    # reviewer need. The invoice payload is already stored
+    # (invoices.raw_payload, keyed by workflow_id) and is rehydrated from
+    # there on resume and in the review details
     state_blob = {
         "workflow_id": workflow_id,
-        "invoice_payload": invoice_payload,
+        "raw_id": state.get("raw_id"),
         "vendor_profile": state.get("vendor_profile", {}),
         "normalized_invoice": state.get("normalized_invoice", {}),
         "matched_pos": state.get("matched_pos", []),
@@ -79,12 +80,21 @@ async def checkpoint_hitl_node(state: InvoiceState) -> Dict[str, Any]:
         "match_result": state.get("match_result", "FAILED"),
         "match_evidence": match_evidence,
         "flags": state.get("flags", {}),
-        "bigtool_selections": state.get("bigtool_selections", {})
+        "bigtool_selections": bigtool_selections | {"db": db_tool.name}
     }
     
-    # Persist checkpoint to database
-    with db.get_session() as session:
-        checkpoint = CheckpointModel(
+    checkpoint_result = await checkpoint_task
+    # Fallback id only minted when the server didn't return one
+    checkpoint_id = checkpoint_result.data.get("checkpoint_id") or f"CHKPT-{secrets.token_hex(4).upper()}"
+    review_url = checkpoint_result.data.get("review_url", f"/human-review/{checkpoint_id}")
+    paused_reason = checkpoint_result.data.get("paused_reason", "Match score below threshold")
+    
+    # Persist checkpoint through the write-behind queue: it shares a commit
+    # with the workflow's start rows (or other workflows' writes) instead of
+    # opening its own transaction. start_workflow waits for it before
+    # reporting PAUSED, so the review queue never shows a missing row
+    get_write_queue().submit(workflow_id, [
+        CheckpointModel(
             checkpoint_id=checkpoint_id,
             workflow_id=workflow_id,
             invoice_id=invoice_payload.get("invoice_id", ""),
@@ -95,16 +105,35 @@ async def checkpoint_hitl_node(state: InvoiceState) -> Dict[str, Any]:
             review_url=review_url,
             status="PENDING"
         )
-        session.add(checkpoint)
-        session.commit()
+    ])
     
-    logger.info(f"Checkpoint created: {checkpoint_id}")
-    logger.info(f"Review URL: {review_url}")
-    logger.info("Workflow PAUSED - Awaiting human decision")
+    # Record the pause on the workflow_states row (status reads come from
+    # there) once the start rows and the checkpoint are committed
+    await get_write_queue().wait(workflow_id)
+    async with get_db().get_async_session() as session:
+        await session.execute(
+            update(WorkflowStateModel)
+            .where(WorkflowStateModel.workflow_id == workflow_id)
+            .values(
+                status=WorkflowStatus.PAUSED.value,
+                current_stage="CHECKPOINT_HITL",
+                state_data=state_blob | {
+                    "workflow_status": WorkflowStatus.PAUSED.value,
+                    "current_stage": "CHECKPOINT_HITL",
+                    "started_at": state.get("started_at"),
+                    "invoice_payload": invoice_payload,
+                    "hitl_checkpoint_id": checkpoint_id,
+                    "review_url": review_url,
+                    "paused_reason": paused_reason,
+                    "errors": state.get("errors", [])
+                }
+            )
+            .execution_options(synchronize_session=False)
+        )
     
-    # Update bigtool selections
-    bigtool_selections = state.get("bigtool_selections", {})
-    bigtool_selections["db"] = db_tool.name
+    logger.info("Checkpoint created: %s", checkpoint_id)
+    logger.info("Review URL: %s", review_url)
+    logger.info("Workflow PAUSED - Awaiting human decision")
     
     return {
         "current_stage": "CHECKPOINT_HITL",
@@ -113,6 +142,7 @@ async def checkpoint_hitl_node(state: InvoiceState) -> Dict[str, Any]:
         "review_url": review_url,
         "paused_reason": paused_reason,
         "db_tool_used": db_tool.name,
-        "updated_at": datetime.utcnow().isoformat(),
-        "bigtool_selections": bigtool_selections
+        "updated_at": utc_now_iso(),
+        # Merged into the state's selections by the field's reducer
+        "bigtool_selections": {"db": db_tool.name}
     }
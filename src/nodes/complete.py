@@ -2,18 +2,24 @@
 COMPLETE Node - Finalize workflow and output final payload
 Server: COMMON
 """
+import asyncio
 import logging
-import uuid
-from datetime import datetime
+import secrets
+from datetime import datetime, timedelta, timezone
 from typing import Dict, Any
-from src.models.state import InvoiceState, WorkflowStatus
+from sqlalchemy import update
+from src.models.state import InvoiceState, WorkflowStatus, MatchStatus
+from src.models.schemas import DecisionEnum
 from src.mcp.client import get_mcp_client, MCPServer
 from src.bigtool.picker import get_bigtool_picker
-from src.database import get_db
-from src.database.models import AuditLogModel, WorkflowStateModel
+from src.database import get_db, get_write_queue, log_events_bulk
+from src.database.models import WorkflowStateModel
 
 logger = logging.getLogger(__name__)
 
+# Bigtool candidates: databases
+_DB_POOL = ("postgres", "sqlite", "dynamodb")
+
 
 async def complete_node(state: InvoiceState) -> Dict[str, Any]:
     """
@@ -23,34 +29,54 @@ async def complete_node(state: InvoiceState) -> Dict[str, Any]:
     Bigtool selects DB tool.
     Server: COMMON
     """
-    logger.info("=" * 50)
-    logger.info("STAGE: COMPLETE - Finalizing workflow")
-    logger.info("=" * 50)
+    logger.info("=" * 50 + "\nSTAGE: COMPLETE - Finalizing workflow\n" + "=" * 50)
     
     mcp = get_mcp_client()
+    # One clock read for every timestamp this node writes
+    now = datetime.now(timezone.utc)
+    now_iso = now.replace(tzinfo=None).isoformat()
     bigtool = get_bigtool_picker()
     db = get_db()
     
-    workflow_id = state.get("workflow_id", "")
-    invoice_payload = state.get("invoice_payload", {})
+    workflow_id = state["workflow_id"]
+    invoice_payload = state["invoice_payload"]
     workflow_status = state.get("workflow_status", WorkflowStatus.COMPLETED.value)
+    # Fields read by both the final payload and the audit log, looked up once
+    updated_at = state.get("updated_at")
+    match_result = state.get("match_result")
+    match_score = state.get("match_score")
+    approval_status = state.get("approval_status")
+    posted = state.get("posted", False)
+    notified_parties = state.get("notified_parties", [])
+    hitl_checkpoint_id = state.get("hitl_checkpoint_id")
     
     # Determine final status
     human_decision = state.get("human_decision")
-    if human_decision == "REJECT":
+    if human_decision == DecisionEnum.REJECT:
         final_status = WorkflowStatus.MANUAL_HANDOFF.value
     elif workflow_status == WorkflowStatus.PAUSED.value:
         final_status = WorkflowStatus.PAUSED.value
     else:
         final_status = WorkflowStatus.COMPLETED.value
     
+    # Finalize via COMMON server while the payload, audit log and DB writes
+    # below are prepared (it only needs the id and status)
+    finalize_task = asyncio.create_task(mcp.execute_ability(
+        server=MCPServer.COMMON,
+        ability="finalize_workflow",
+        params={
+            "workflow_id": workflow_id,
+            "status": final_status
+        }
+    ))
+    
     # Select DB tool using Bigtool
     db_tool = bigtool.select(
         capability="db",
         context={"workflow_id": workflow_id},
-        pool_hint=["postgres", "sqlite", "dynamodb"]
+        pool_hint=_DB_POOL
     )
-    logger.info(f"Bigtool selected DB: {db_tool.name}")
+    logger.info("Bigtool selected DB: %s", db_tool.name)
     
     # Build final payload
     final_payload = {
@@ -60,101 +86,118 @@ async def complete_node(state: InvoiceState) -> Dict[str, Any]:
         "amount": invoice_payload.get("amount"),
         "currency": invoice_payload.get("currency", "USD"),
         "status": final_status,
-        "match_score": state.get("match_score"),
-        "match_result": state.get("match_result"),
-        "approval_status": state.get("approval_status"),
-        "posted": state.get("posted", False),
+        "match_score": match_score,
+        "match_result": match_result,
+        "approval_status": approval_status,
+        "posted": posted,
         "erp_txn_id": state.get("erp_txn_id"),
         "scheduled_payment_id": state.get("scheduled_payment_id"),
         "accounting_entries_count": len(state.get("accounting_entries", [])),
-        "notified_parties": state.get("notified_parties", []),
+        "notified_parties": notified_parties,
         "bigtool_selections": state.get("bigtool_selections", {}),
-        "completed_at": datetime.utcnow().isoformat()
+        "completed_at": now_iso
     }
     
     # Build audit log
     audit_log = [
         {"stage": "INTAKE", "timestamp": state.get("ingest_ts"), "action": "Invoice ingested"},
-        {"stage": "UNDERSTAND", "timestamp": state.get("updated_at"), "action": f"OCR via {state.get('ocr_tool_used', 'unknown')}"},
-        {"stage": "PREPARE", "timestamp": state.get("updated_at"), "action": f"Enrichment via {state.get('enrichment_tool_used', 'unknown')}"},
-        {"stage": "RETRIEVE", "timestamp": state.get("updated_at"), "action": f"ERP fetch via {state.get('erp_tool_used', 'unknown')}"},
-        {"stage": "MATCH_TWO_WAY", "timestamp": state.get("updated_at"), "action": f"Match score: {state.get('match_score', 0):.3f}"},
+        {"stage": "UNDERSTAND", "timestamp": updated_at, "action": f"OCR via {state.get('ocr_tool_used', 'unknown')}"},
+        {"stage": "PREPARE", "timestamp": updated_at, "action": f"Enrichment via {state.get('enrichment_tool_used', 'unknown')}"},
+        {"stage": "RETRIEVE", "timestamp": updated_at, "action": f"ERP fetch via {state.get('erp_tool_used', 'unknown')}"},
+        {"stage": "MATCH_TWO_WAY", "timestamp": updated_at, "action": f"Match score: {match_score or 0:.3f}"},
     ]
     
-    if state.get("hitl_checkpoint_id"):
+    if hitl_checkpoint_id:
         audit_log.append({
             "stage": "CHECKPOINT_HITL",
-            "timestamp": state.get("updated_at"),
-            "action": f"Checkpoint created: {state.get('hitl_checkpoint_id')}"
+            "timestamp": updated_at,
+            "action": f"Checkpoint created: {hitl_checkpoint_id}"
         })
     
     if human_decision:
         audit_log.append({
             "stage": "HITL_DECISION",
-            "timestamp": state.get("updated_at"),
+            "timestamp": updated_at,
             "action": f"Human decision: {human_decision} by {state.get('reviewer_id', 'unknown')}"
         })
     
-    if state.get("match_result") == "MATCHED" or human_decision == "ACCEPT":
+    if match_result == MatchStatus.MATCHED or human_decision == DecisionEnum.ACCEPT:
         audit_log.extend([
-            {"stage": "RECONCILE", "timestamp": state.get("updated_at"), "action": "Accounting entries created"},
-            {"stage": "APPROVE", "timestamp": state.get("updated_at"), "action": f"Approval: {state.get('approval_status', 'N/A')}"},
-            {"stage": "POSTING", "timestamp": state.get("updated_at"), "action": f"Posted: {state.get('posted', False)}"},
-            {"stage": "NOTIFY", "timestamp": state.get("updated_at"), "action": f"Notified: {state.get('notified_parties', [])}"},
+            {"stage": "RECONCILE", "timestamp": updated_at, "action": "Accounting entries created"},
+            {"stage": "APPROVE", "timestamp": updated_at, "action": f"Approval: {approval_status or 'N/A'}"},
+            {"stage": "POSTING", "timestamp": updated_at, "action": f"Posted: {posted}"},
+            {"stage": "NOTIFY", "timestamp": updated_at, "action": f"Notifications queued for: {notified_parties}"},
         ])
     
     audit_log.append({
         "stage": "COMPLETE",
-        "timestamp": datetime.utcnow().isoformat(),
+        "timestamp": now_iso,
         "action": f"Workflow completed with status: {final_status}"
     })
     
-    # Persist audit log to database
-    with db.get_session() as session:
-        for entry in audit_log:
-            audit = AuditLogModel(
-                id=f"AUDIT-{uuid.uuid4().hex[:8]}",
-                workflow_id=workflow_id,
-                stage=entry["stage"],
-                action=entry["action"],
-                details=entry,
-                timestamp=datetime.utcnow()
-            )
-            session.add(audit)
-        
-        # Update workflow state
-        workflow_state = session.query(WorkflowStateModel).filter(
-            WorkflowStateModel.workflow_id == workflow_id
-        ).first()
-        
-        if workflow_state:
-            workflow_state.status = final_status
-            workflow_state.current_stage = "COMPLETE"
-            workflow_state.completed_at = datetime.utcnow()
+    # The workflow state row may still be in the start-time write queue
+    await get_write_queue().wait(workflow_id)
+    
+    # Persist audit log to database. Ids come from one CSPRNG read (8 hex
+    # chars each); timestamps step by 1us so the audit view keeps this order
+    audit_ids = secrets.token_hex(4 * len(audit_log))
+    async with db.get_async_session() as session:
+        await log_events_bulk(session, [
+            {
+                "id": f"AUDIT-{audit_ids[i * 8:(i + 1) * 8]}",
+                "workflow_id": workflow_id,
+                "stage": entry["stage"],
+                "action": entry["action"],
+                "details": entry,
+                "timestamp": now + timedelta(microseconds=i)
+            }
+            for i, entry in enumerate(audit_log)
+        ])
         
-        session.commit()
+        # Update workflow state with a plain UPDATE
+        # (no SELECT round-trip / ORM load first)
+        await session.execute(
+            update(WorkflowStateModel)
+            .where(WorkflowStateModel.workflow_id == workflow_id)
+            .values(
+                status=final_status,
+                current_stage="COMPLETE",
+                completed_at=now,
+                # Keep the final payload with the row so status reads don't
+                # need the in-process graph result
+                state_data={
+                    "workflow_id": workflow_id,
+                    "workflow_status": final_status,
+                    "current_stage": "COMPLETE",
+                    "started_at": state.get("started_at"),
+                    "updated_at": updated_at,
+                    "invoice_payload": invoice_payload,
+                    "vendor_profile": state.get("vendor_profile", {}),
+                    "matched_pos": state.get("matched_pos", []),
+                    "match_score": state.get("match_score"),
+                    "match_result": state.get("match_result"),
+                    "match_evidence": state.get("match_evidence", {}),
+                    "flags": state.get("flags", {}),
+                    "errors": state.get("errors", []),
+                    "bigtool_selections": state.get("bigtool_selections", {}),
+                    "final_payload": final_payload
+                }
+            )
+            .execution_options(synchronize_session=False)
+        )
     
-    # Finalize via COMMON server
-    await mcp.execute_ability(
-        server=MCPServer.COMMON,
-        ability="finalize_workflow",
-        params={
-            "workflow_id": workflow_id,
-            "status": final_status
-        }
-    )
+    await finalize_task
     
-    logger.info(f"Workflow {workflow_id} completed with status: {final_status}")
-    logger.info("=" * 50)
-    logger.info("FINAL PAYLOAD:")
-    for key, value in final_payload.items():
-        logger.info(f"  {key}: {value}")
-    logger.info("=" * 50)
+    logger.info("Workflow %s completed with status: %s", workflow_id, final_status)
+    # Payload dump as a single record, only formatted when INFO is on
+    if logger.isEnabledFor(logging.INFO):
+        lines = "\n".join(f"  {key}: {value}" for key, value in final_payload.items())
+        logger.info("=" * 50 + "\nFINAL PAYLOAD:\n" + lines + "\n" + "=" * 50)
     
     return {
         "current_stage": "COMPLETE",
         "workflow_status": final_status,
         "final_payload": final_payload,
         "audit_log": audit_log,
-        "updated_at": datetime.utcnow().isoformat()
+        "updated_at": now_iso
     }
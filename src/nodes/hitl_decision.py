@@ -3,12 +3,10 @@ HITL_DECISION Node - Process human decision (Accept/Reject)
 Server: ATLAS
 """
 import logging
-from datetime import datetime
 from typing import Dict, Any
-from src.models.state import InvoiceState, WorkflowStatus
+from src.models.state import InvoiceState, WorkflowStatus, utc_now_iso
+from src.models.schemas import DecisionEnum
 from src.mcp.client import get_mcp_client, MCPServer
-from src.database import get_db
-from src.database.models import CheckpointModel
 
 logger = logging.getLogger(__name__)
 
@@ -27,12 +25,9 @@ async def hitl_decision_node(state: InvoiceState) -> Dict[str, Any]:
     
     Server: ATLAS
     """
-    logger.info("=" * 50)
-    logger.info("STAGE: HITL_DECISION - Processing human decision")
-    logger.info("=" * 50)
+    logger.info("=" * 50 + "\nSTAGE: HITL_DECISION - Processing human decision\n" + "=" * 50)
     
     mcp = get_mcp_client()
-    db = get_db()
     
     checkpoint_id = state.get("hitl_checkpoint_id", "")
     human_decision = state.get("human_decision", "")
@@ -45,39 +40,29 @@ async def hitl_decision_node(state: InvoiceState) -> Dict[str, Any]:
             "errors": state.get("errors", []) + [{
                 "stage": "HITL_DECISION",
                 "error": "No human decision provided",
-                "timestamp": datetime.utcnow().isoformat()
+                "timestamp": utc_now_iso()
             }]
         }
     
-    logger.info(f"Human decision: {human_decision} by reviewer: {reviewer_id}")
+    logger.info("Human decision: %s by reviewer: %s", human_decision, reviewer_id)
     
-    # Get decision details via ATLAS server
-    decision_result = await mcp.execute_ability(
-        server=MCPServer.ATLAS,
-        ability="get_human_decision",
-        params={
-            "checkpoint_id": checkpoint_id,
-            "decision": human_decision,
-            "reviewer_id": reviewer_id
-        }
-    )
-    
-    resume_token = decision_result.data.get("resume_token")
-    next_stage = decision_result.data.get("next_stage", "COMPLETE")
+    # resume_workflow already moved the checkpoint row off PENDING (its claim
+    # on the resume), so there is nothing to write here
     
-    # Update checkpoint in database
-    with db.get_session() as session:
-        checkpoint = session.query(CheckpointModel).filter(
-            CheckpointModel.checkpoint_id == checkpoint_id
-        ).first()
+    if human_decision == DecisionEnum.ACCEPT:
+        # Only an accepted invoice resumes, so only it needs a resume token;
+        # a rejection goes straight to COMPLETE without the ATLAS round trip
+        decision_result = await mcp.execute_ability(
+            server=MCPServer.ATLAS,
+            ability="get_human_decision",
+            params={
+                "checkpoint_id": checkpoint_id,
+                "decision": human_decision,
+                "reviewer_id": reviewer_id
+            }
+        )
+        resume_token = decision_result.data.get("resume_token")
         
-        if checkpoint:
-            checkpoint.status = "ACCEPTED" if human_decision == "ACCEPT" else "REJECTED"
-            checkpoint.reviewer_id = reviewer_id
-            checkpoint.decision_at = datetime.utcnow()
-            session.commit()
-    
-    if human_decision == "ACCEPT":
         logger.info("Invoice ACCEPTED - Resuming workflow at RECONCILE")
         return {
             "current_stage": "HITL_DECISION",
@@ -86,7 +71,7 @@ async def hitl_decision_node(state: InvoiceState) -> Dict[str, Any]:
             "reviewer_id": reviewer_id,
             "resume_token": resume_token,
             "next_stage": "RECONCILE",
-            "updated_at": datetime.utcnow().isoformat()
+            "updated_at": utc_now_iso()
         }
     else:
         logger.info("Invoice REJECTED - Finalizing with MANUAL_HANDOFF status")
@@ -97,5 +82,5 @@ async def hitl_decision_node(state: InvoiceState) -> Dict[str, Any]:
             "reviewer_id": reviewer_id,
             "resume_token": None,
             "next_stage": "COMPLETE",
-            "updated_at": datetime.utcnow().isoformat()
+            "updated_at": utc_now_iso()
         }
@@ -3,14 +3,16 @@ INTAKE Node - Accept and validate invoice payload
 Server: COMMON
 """
 import logging
-from datetime import datetime
 from typing import Dict, Any
-from src.models.state import InvoiceState
+from src.models.state import InvoiceState, utc_now_iso
 from src.mcp.client import get_mcp_client, MCPServer
 from src.bigtool.picker import get_bigtool_picker
 
 logger = logging.getLogger(__name__)
 
+# Bigtool candidates: storage backends
+_STORAGE_POOL = ("s3", "gcs", "local_fs")
+
 
 async def intake_node(state: InvoiceState) -> Dict[str, Any]:
     """
@@ -19,22 +21,20 @@ async def intake_node(state: InvoiceState) -> Dict[str, Any]:
     This is a DETERMINISTIC node - always executes the same sequence.
     Server: COMMON
     """
-    logger.info("=" * 50)
-    logger.info("STAGE: INTAKE - Accepting invoice payload")
-    logger.info("=" * 50)
+    logger.info("=" * 50 + "\nSTAGE: INTAKE - Accepting invoice payload\n" + "=" * 50)
     
     mcp = get_mcp_client()
     bigtool = get_bigtool_picker()
     
-    invoice_payload = state.get("invoice_payload", {})
+    invoice_payload = state["invoice_payload"]
     
     # Select storage tool using Bigtool
     storage_tool = bigtool.select(
         capability="storage",
         context={"attachments": invoice_payload.get("attachments", [])},
-        pool_hint=["s3", "gcs", "local_fs"]
+        pool_hint=_STORAGE_POOL
     )
-    logger.info(f"Bigtool selected storage: {storage_tool.name}")
+    logger.info("Bigtool selected storage: %s", storage_tool.name)
     
     # Validate schema via COMMON server
     validation_result = await mcp.execute_ability(
@@ -44,14 +44,14 @@ async def intake_node(state: InvoiceState) -> Dict[str, Any]:
     )
     
     if not validation_result.success:
-        logger.error(f"Schema validation failed: {validation_result.error}")
+        logger.error("Schema validation failed: %s", validation_result.error)
         return {
             "current_stage": "INTAKE",
             "validated": False,
             "errors": state.get("errors", []) + [{
                 "stage": "INTAKE",
                 "error": validation_result.error,
-                "timestamp": datetime.utcnow().isoformat()
+                "timestamp": utc_now_iso()
             }]
         }
     
@@ -59,14 +59,14 @@ async def intake_node(state: InvoiceState) -> Dict[str, Any]:
     
     if not validated:
         missing = validation_result.data.get("missing_fields", [])
-        logger.warning(f"Invoice validation failed. Missing fields: {missing}")
+        logger.warning("Invoice validation failed. Missing fields: %s", missing)
         return {
             "current_stage": "INTAKE",
             "validated": False,
             "errors": state.get("errors", []) + [{
                 "stage": "INTAKE",
                 "error": f"Missing required fields: {missing}",
-                "timestamp": datetime.utcnow().isoformat()
+                "timestamp": utc_now_iso()
             }]
         }
     
@@ -82,19 +82,17 @@ async def intake_node(state: InvoiceState) -> Dict[str, Any]:
     )
     
     raw_id = persist_result.data.get("raw_id", "")
-    ingest_ts = persist_result.data.get("ingest_ts", datetime.utcnow().isoformat())
-    
-    logger.info(f"Invoice ingested successfully. raw_id={raw_id}")
+    now = utc_now_iso()
+    ingest_ts = persist_result.data.get("ingest_ts") or now
     
-    # Update bigtool selections
-    bigtool_selections = state.get("bigtool_selections", {})
-    bigtool_selections["storage"] = storage_tool.name
+    logger.info("Invoice ingested successfully. raw_id=%s", raw_id)
     
     return {
         "current_stage": "INTAKE",
         "raw_id": raw_id,
         "ingest_ts": ingest_ts,
         "validated": True,
-        "updated_at": datetime.utcnow().isoformat(),
-        "bigtool_selections": bigtool_selections
+        "updated_at": now,
+        # Merged into the state's selections by the field's reducer
+        "bigtool_selections": {"storage": storage_tool.name}
     }
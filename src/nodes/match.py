@@ -4,15 +4,25 @@ Server: COMMON
 """
 import logging
 import os
-from datetime import datetime
-from typing import Dict, Any
-from src.models.state import InvoiceState
+from src.models.state import InvoiceState, MatchStatus, utc_now_iso
+from src.models.deltas import MatchDelta
 from src.mcp.client import get_mcp_client, MCPServer
 
 logger = logging.getLogger(__name__)
 
+# Match configuration, read once at import (see refresh_match_config)
+_MATCH_THRESHOLD = float(os.getenv("MATCH_THRESHOLD", "0.90"))
+_TOLERANCE_PCT = float(os.getenv("TWO_WAY_TOLERANCE_PCT", "5"))
 
-async def match_two_way_node(state: InvoiceState) -> Dict[str, Any]:
+
+def refresh_match_config():
+    """Re-read MATCH_THRESHOLD / TWO_WAY_TOLERANCE_PCT (e.g. after a test changes them)"""
+    global _MATCH_THRESHOLD, _TOLERANCE_PCT
+    _MATCH_THRESHOLD = float(os.getenv("MATCH_THRESHOLD", "0.90"))
+    _TOLERANCE_PCT = float(os.getenv("TWO_WAY_TOLERANCE_PCT", "5"))
+
+
+async def match_two_way_node(state: InvoiceState) -> MatchDelta:
     """
     MATCH_TWO_WAY Stage: Compute 2-way match score between invoice and PO
     
@@ -20,19 +30,16 @@ async def match_two_way_node(state: InvoiceState) -> Dict[str, Any]:
     If match_score < threshold → mark for HITL CHECKPOINT
     Server: COMMON
     """
-    logger.info("=" * 50)
-    logger.info("STAGE: MATCH_TWO_WAY - Computing match score")
-    logger.info("=" * 50)
+    logger.info("=" * 50 + "\nSTAGE: MATCH_TWO_WAY - Computing match score\n" + "=" * 50)
     
     mcp = get_mcp_client()
     
-    invoice_payload = state.get("invoice_payload", {})
+    invoice_payload = state["invoice_payload"]
     normalized_invoice = state.get("normalized_invoice", {})
     matched_pos = state.get("matched_pos", [])
     
-    # Get threshold from config
-    threshold = float(os.getenv("MATCH_THRESHOLD", "0.90"))
-    tolerance_pct = float(os.getenv("TWO_WAY_TOLERANCE_PCT", "5"))
+    threshold = _MATCH_THRESHOLD
+    tolerance_pct = _TOLERANCE_PCT
     
     # Prepare invoice data for matching
     invoice_for_match = {
@@ -55,22 +62,22 @@ async def match_two_way_node(state: InvoiceState) -> Dict[str, Any]:
     )
     
     match_score = match_result.data.get("match_score", 0.0)
-    match_status = match_result.data.get("match_result", "FAILED")
+    match_status = match_result.data.get("match_result", MatchStatus.FAILED.value)
     match_evidence = match_result.data.get("match_evidence", {})
     
-    logger.info(f"Match score: {match_score:.3f} (threshold: {threshold})")
-    logger.info(f"Match result: {match_status}")
+    logger.info("Match score: %.3f (threshold: %s)", match_score, threshold)
+    logger.info("Match result: %s", match_status)
     
-    if match_status == "FAILED":
+    if match_status == MatchStatus.FAILED:
         logger.warning("Match FAILED - Invoice will be routed to HITL checkpoint")
     else:
         logger.info("Match PASSED - Invoice will proceed to reconciliation")
     
-    return {
-        "current_stage": "MATCH_TWO_WAY",
-        "match_score": match_score,
-        "match_result": match_status,
-        "tolerance_pct": tolerance_pct,
-        "match_evidence": match_evidence,
-        "updated_at": datetime.utcnow().isoformat()
-    }
+    return MatchDelta(
+        current_stage="MATCH_TWO_WAY",
+        match_score=match_score,
+        match_result=match_status,
+        tolerance_pct=tolerance_pct,
+        match_evidence=match_evidence,
+        updated_at=utc_now_iso()
+    )
@@ -3,14 +3,45 @@ NOTIFY Node - Send notifications to vendor and finance team
 Server: ATLAS
 """
 import logging
-from datetime import datetime
+import secrets
 from typing import Dict, Any
-from src.models.state import InvoiceState
-from src.mcp.client import get_mcp_client, MCPServer
+from src.models.state import InvoiceState, utc_now_iso
+from src.mcp.client import get_mcp_client, MCPResponse, MCPServer
 from src.bigtool.picker import get_bigtool_picker
+from src.database import get_db, log_events_bulk
 
 logger = logging.getLogger(__name__)
 
+# Bigtool candidates: email providers
+_EMAIL_POOL = ("sendgrid", "smartlead", "ses")
+
+# Recipient and channel behind each notification ability
+_RECIPIENTS = {"notify_vendor": ("vendor", "email"), "notify_finance_team": ("finance", "slack")}
+
+
+def _delivery_recorder(workflow_id: str):
+    """Background callback writing each send's outcome to the audit log"""
+    async def record(response: MCPResponse):
+        recipient, channel = _RECIPIENTS[response.ability]
+        delivery = "delivered" if response.success else "failed"
+        details = {"recipient": recipient, "channel": channel, "delivery": delivery, "error": response.error}
+        if response.success:
+            action = f"Notification delivered to {recipient} via {channel}"
+        else:
+            action = f"Notification to {recipient} failed: {response.error}"
+        
+        async with get_db().get_async_session() as session:
+            await log_events_bulk(session, [{
+                "id": f"AUDIT-{secrets.token_hex(4)}",
+                "workflow_id": workflow_id,
+                "stage": "NOTIFY",
+                "action": action,
+                "details": details,
+                "mcp_server": response.server.value
+            }])
+    
+    return record
+
 
 async def notify_node(state: InvoiceState) -> Dict[str, Any]:
     """
@@ -20,14 +51,12 @@ async def notify_node(state: InvoiceState) -> Dict[str, Any]:
     Bigtool selects email provider.
     Server: ATLAS
     """
-    logger.info("=" * 50)
-    logger.info("STAGE: NOTIFY - Sending notifications")
-    logger.info("=" * 50)
+    logger.info("=" * 50 + "\nSTAGE: NOTIFY - Sending notifications\n" + "=" * 50)
     
     mcp = get_mcp_client()
     bigtool = get_bigtool_picker()
     
-    invoice_payload = state.get("invoice_payload", {})
+    invoice_payload = state["invoice_payload"]
     workflow_status = state.get("workflow_status", "COMPLETED")
     
     invoice_id = invoice_payload.get("invoice_id", "")
@@ -37,58 +66,47 @@ async def notify_node(state: InvoiceState) -> Dict[str, Any]:
     email_tool = bigtool.select(
         capability="email",
         context={"vendor_name": vendor_name},
-        pool_hint=["sendgrid", "smartlead", "ses"]
+        pool_hint=_EMAIL_POOL
     )
-    logger.info(f"Bigtool selected email: {email_tool.name}")
+    logger.info("Bigtool selected email: %s", email_tool.name)
     
-    # Notify vendor via ATLAS server
-    vendor_notify_result = await mcp.execute_ability(
-        server=MCPServer.ATLAS,
-        ability="notify_vendor",
-        params={
+    # Notify vendor and finance team via ATLAS server; nothing downstream
+    # needs the delivery receipts, so the sends run in the background and
+    # report their outcome to the audit log once they finish
+    mcp.submit_background([
+        (MCPServer.ATLAS, "notify_vendor", {
             "invoice_id": invoice_id,
             "vendor_name": vendor_name,
             "status": workflow_status,
             "email_tool": email_tool.name
-        }
-    )
-    
-    # Notify finance team via ATLAS server
-    finance_notify_result = await mcp.execute_ability(
-        server=MCPServer.ATLAS,
-        ability="notify_finance_team",
-        params={
+        }),
+        (MCPServer.ATLAS, "notify_finance_team", {
             "invoice_id": invoice_id,
             "vendor_name": vendor_name,
             "status": workflow_status,
             "amount": invoice_payload.get("amount", 0)
-        }
-    )
+        })
+    ], on_result=_delivery_recorder(state["workflow_id"]))
     
+    # Nothing has been sent yet, only queued
     notify_status = {
-        "vendor_notified": vendor_notify_result.data.get("notification_sent", False),
-        "vendor_channel": vendor_notify_result.data.get("channel", "email"),
-        "finance_notified": finance_notify_result.data.get("notification_sent", False),
-        "finance_channel": finance_notify_result.data.get("channel", "slack")
+        "vendor_channel": "email",
+        "vendor_delivery": "queued",
+        "finance_channel": "slack",
+        "finance_delivery": "queued"
     }
     
-    notified_parties = []
-    if notify_status["vendor_notified"]:
-        notified_parties.append(vendor_name)
-    if notify_status["finance_notified"]:
-        notified_parties.append("finance-team")
-    
-    logger.info(f"Notified parties: {notified_parties}")
+    # Parties the notifications are queued for
+    notified_parties = [vendor_name, "finance-team"]
     
-    # Update bigtool selections
-    bigtool_selections = state.get("bigtool_selections", {})
-    bigtool_selections["email"] = email_tool.name
+    logger.info("Notifications queued for: %s", notified_parties)
     
     return {
         "current_stage": "NOTIFY",
         "notify_status": notify_status,
         "notified_parties": notified_parties,
         "email_tool_used": email_tool.name,
-        "updated_at": datetime.utcnow().isoformat(),
-        "bigtool_selections": bigtool_selections
+        "updated_at": utc_now_iso(),
+        # Merged into the state's selections by the field's reducer
+        "bigtool_selections": {"email": email_tool.name}
     }
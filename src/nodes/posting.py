@@ -3,14 +3,20 @@ POSTING Node - Post to ERP and schedule payment
 Server: ATLAS
 """
 import logging
-from datetime import datetime
+import os
 from typing import Dict, Any
-from src.models.state import InvoiceState
+from src.models.state import InvoiceState, utc_now_iso
 from src.mcp.client import get_mcp_client, MCPServer
 from src.bigtool.picker import get_bigtool_picker
 
 logger = logging.getLogger(__name__)
 
+# Bigtool candidates: ERP connectors
+_ERP_POOL = ("sap_sandbox", "netsuite", "mock_erp")
+
+# Schedule the payment only after the ERP post has returned
+STRICT_POST_BEFORE_PAY = os.getenv("STRICT_POST_BEFORE_PAY", "false").lower() == "true"
+
 
 async def posting_node(state: InvoiceState) -> Dict[str, Any]:
     """
@@ -20,63 +26,63 @@ async def posting_node(state: InvoiceState) -> Dict[str, Any]:
     Bigtool selects ERP connector.
     Server: ATLAS
     """
-    logger.info("=" * 50)
-    logger.info("STAGE: POSTING - Posting to ERP and scheduling payment")
-    logger.info("=" * 50)
+    logger.info("=" * 50 + "\nSTAGE: POSTING - Posting to ERP and scheduling payment\n" + "=" * 50)
     
     mcp = get_mcp_client()
     bigtool = get_bigtool_picker()
     
-    invoice_payload = state.get("invoice_payload", {})
+    invoice_payload = state["invoice_payload"]
     normalized_invoice = state.get("normalized_invoice", {})
     accounting_entries = state.get("accounting_entries", [])
     
+    invoice_id = invoice_payload.get("invoice_id")
+    vendor_name = invoice_payload.get("vendor_name")
     amount = normalized_invoice.get("amount", invoice_payload.get("amount", 0))
     due_date = invoice_payload.get("due_date", "")
     
-    # Select ERP connector using Bigtool (may reuse previous selection)
-    erp_tool = bigtool.select(
+    # Post through the ERP connector RETRIEVE read from when it is still
+    # available; otherwise select one using Bigtool
+    previous_erp = state.get("bigtool_selections", {}).get("erp_connector")
+    erp_tool = (previous_erp and bigtool.get_by_name("erp_connector", previous_erp)) or bigtool.select(
         capability="erp_connector",
         context={"amount": amount},
-        pool_hint=["sap_sandbox", "netsuite", "mock_erp"]
+        pool_hint=_ERP_POOL
     )
-    logger.info(f"Bigtool selected ERP connector: {erp_tool.name}")
+    logger.info("Bigtool selected ERP connector: %s", erp_tool.name)
     
-    # Post to ERP via ATLAS server
-    post_result = await mcp.execute_ability(
-        server=MCPServer.ATLAS,
-        ability="post_to_erp",
-        params={
-            "invoice_id": invoice_payload.get("invoice_id"),
-            "accounting_entries": accounting_entries,
-            "erp_tool": erp_tool.name
-        }
-    )
+    post_call = (MCPServer.ATLAS, "post_to_erp", {
+        "invoice_id": invoice_id,
+        "accounting_entries": accounting_entries,
+        "erp_tool": erp_tool.name
+    })
+    payment_call = (MCPServer.ATLAS, "schedule_payment", {
+        "invoice_id": invoice_id,
+        "amount": amount,
+        "due_date": due_date,
+        "vendor_name": vendor_name
+    })
+    
+    # Post to ERP and schedule payment via ATLAS server; neither call reads
+    # the other's result, so they run together unless policy wants the
+    # ledger entry in place before a payment exists
+    if STRICT_POST_BEFORE_PAY:
+        post_result = await mcp.execute_ability(*post_call)
+        payment_result = await mcp.execute_ability(*payment_call)
+    else:
+        post_result, payment_result = await mcp.execute_batch([post_call, payment_call])
     
     posted = post_result.data.get("posted", False)
     erp_txn_id = post_result.data.get("erp_txn_id")
     
-    # Schedule payment via ATLAS server
-    payment_result = await mcp.execute_ability(
-        server=MCPServer.ATLAS,
-        ability="schedule_payment",
-        params={
-            "invoice_id": invoice_payload.get("invoice_id"),
-            "amount": amount,
-            "due_date": due_date,
-            "vendor_name": invoice_payload.get("vendor_name")
-        }
-    )
-    
     scheduled_payment_id = payment_result.data.get("scheduled_payment_id")
     
-    logger.info(f"Posted to ERP: {posted}, txn_id: {erp_txn_id}")
-    logger.info(f"Payment scheduled: {scheduled_payment_id}")
+    logger.info("Posted to ERP: %s, txn_id: %s", posted, erp_txn_id)
+    logger.info("Payment scheduled: %s", scheduled_payment_id)
     
     return {
         "current_stage": "POSTING",
         "posted": posted,
         "erp_txn_id": erp_txn_id,
         "scheduled_payment_id": scheduled_payment_id,
-        "updated_at": datetime.utcnow().isoformat()
+        "updated_at": utc_now_iso()
     }
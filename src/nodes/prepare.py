@@ -3,14 +3,23 @@ PREPARE Node - Normalize vendor, enrich data, compute flags
 Server: COMMON (normalize, flags), ATLAS (enrichment)
 """
 import logging
-from datetime import datetime
+import os
 from typing import Dict, Any
-from src.models.state import InvoiceState
+from src.models.state import InvoiceState, utc_now_iso
+from src.mcp.abilities import build_vendor_profile
 from src.mcp.client import get_mcp_client, MCPServer
 from src.bigtool.picker import get_bigtool_picker
 
 logger = logging.getLogger(__name__)
 
+# Bigtool candidates: enrichment providers
+_ENRICHMENT_POOL = ("clearbit", "people_data_labs", "vendor_db")
+
+# COMMON's composite prepare_vendor ability (normalize + profile + flags in
+# one call, issued after enrich_vendor). Off by default: the separate
+# abilities let normalize_vendor overlap enrich_vendor
+PREPARE_VENDOR_COMPOSITE = os.getenv("PREPARE_VENDOR_COMPOSITE", "false").lower() == "true"
+
 
 async def prepare_node(state: InvoiceState) -> Dict[str, Any]:
     """
@@ -20,27 +29,17 @@ async def prepare_node(state: InvoiceState) -> Dict[str, Any]:
     Bigtool selects enrichment provider (Clearbit / PDL / Vendor DB)
     Server: COMMON for normalization/flags, ATLAS for enrichment
     """
-    logger.info("=" * 50)
-    logger.info("STAGE: PREPARE - Vendor normalization and enrichment")
-    logger.info("=" * 50)
+    logger.info("=" * 50 + "\nSTAGE: PREPARE - Vendor normalization and enrichment\n" + "=" * 50)
     
     mcp = get_mcp_client()
     bigtool = get_bigtool_picker()
     
-    invoice_payload = state.get("invoice_payload", {})
+    invoice_payload = state["invoice_payload"]
     parsed_invoice = state.get("parsed_invoice", {})
     
     vendor_name = invoice_payload.get("vendor_name", "")
     vendor_tax_id = invoice_payload.get("vendor_tax_id", "")
-    
-    # Normalize vendor via COMMON server
-    normalize_result = await mcp.execute_ability(
-        server=MCPServer.COMMON,
-        ability="normalize_vendor",
-        params={"vendor_name": vendor_name}
-    )
-    
-    normalized_name = normalize_result.data.get("normalized_name", vendor_name)
+    amount = invoice_payload.get("amount", 0)
     
     # Select enrichment tool using Bigtool
     enrichment_tool = bigtool.select(
@@ -48,58 +47,71 @@ async def prepare_node(state: InvoiceState) -> Dict[str, Any]:
         context={
             "vendor_name": vendor_name,
             "vendor_tax_id": vendor_tax_id,
-            "amount": invoice_payload.get("amount", 0)
+            "amount": amount
         },
-        pool_hint=["clearbit", "people_data_labs", "vendor_db"]
-    )
-    logger.info(f"Bigtool selected enrichment: {enrichment_tool.name}")
-    
-    # Enrich vendor via ATLAS server
-    enrich_result = await mcp.execute_ability(
-        server=MCPServer.ATLAS,
-        ability="enrich_vendor",
-        params={
-            "vendor_name": vendor_name,
-            "vendor_tax_id": vendor_tax_id,
-            "enrichment_tool": enrichment_tool.name
-        }
+        pool_hint=_ENRICHMENT_POOL
     )
+    logger.info("Bigtool selected enrichment: %s", enrichment_tool.name)
     
-    vendor_profile = {
-        "normalized_name": normalized_name,
-        "tax_id": enrich_result.data.get("verified_tax_id", vendor_tax_id),
-        "enrichment_meta": enrich_result.data.get("enrichment_meta", {}),
-        "credit_score": enrich_result.data.get("credit_score"),
-        "risk_score": enrich_result.data.get("risk_score")
-    }
+    enrich_call = (MCPServer.ATLAS, "enrich_vendor", {
+        "vendor_name": vendor_name,
+        "vendor_tax_id": vendor_tax_id,
+        "enrichment_tool": enrichment_tool.name
+    })
     
-    # Compute flags via COMMON server
-    flags_result = await mcp.execute_ability(
-        server=MCPServer.COMMON,
-        ability="compute_flags",
-        params={
-            "vendor_profile": vendor_profile,
-            "invoice": invoice_payload
-        }
-    )
+    if PREPARE_VENDOR_COMPOSITE:
+        # Enrich via ATLAS server, then normalize, build the profile and
+        # compute flags via COMMON server in a single call
+        enrich_result = await mcp.execute_ability(*enrich_call)
+        prepared = await mcp.execute_ability(
+            server=MCPServer.COMMON,
+            ability="prepare_vendor",
+            params={
+                "vendor_name": vendor_name,
+                "vendor_tax_id": vendor_tax_id,
+                "invoice_payload": invoice_payload,
+                "enrichment": enrich_result.data
+            }
+        )
+        normalized_name = prepared.data.get("normalized_name", vendor_name)
+        vendor_profile = prepared.data.get("vendor_profile", {})
+        flags_data = prepared.data.get("flags", {})
+    else:
+        # Normalize vendor via COMMON server and enrich via ATLAS server;
+        # both work off the raw vendor name, so run them together
+        normalize_result, enrich_result = await mcp.execute_batch([
+            (MCPServer.COMMON, "normalize_vendor", {"vendor_name": vendor_name}),
+            enrich_call
+        ])
+        
+        normalized_name = normalize_result.data.get("normalized_name", vendor_name)
+        
+        vendor_profile = build_vendor_profile(normalized_name, vendor_tax_id, enrich_result.data)
+        
+        # Compute flags via COMMON server
+        flags_result = await mcp.execute_ability(
+            server=MCPServer.COMMON,
+            ability="compute_flags",
+            params={
+                "vendor_profile": vendor_profile,
+                "invoice": invoice_payload
+            }
+        )
+        flags_data = flags_result.data
     
     flags = {
-        "missing_info": flags_result.data.get("missing_info", []),
-        "risk_score": flags_result.data.get("risk_score", 0)
+        "missing_info": flags_data.get("missing_info", []),
+        "risk_score": flags_data.get("risk_score", 0)
     }
     
     # Normalized invoice data
     normalized_invoice = {
-        "amount": invoice_payload.get("amount", 0),
+        "amount": amount,
         "currency": parsed_invoice.get("currency", invoice_payload.get("currency", "USD")),
         "line_items": parsed_invoice.get("parsed_line_items", invoice_payload.get("line_items", []))
     }
     
-    logger.info(f"Vendor enriched: {normalized_name}, risk_score={flags['risk_score']}")
-    
-    # Update bigtool selections
-    bigtool_selections = state.get("bigtool_selections", {})
-    bigtool_selections["enrichment"] = enrichment_tool.name
+    logger.info("Vendor enriched: %s, risk_score=%s", normalized_name, flags['risk_score'])
     
     return {
         "current_stage": "PREPARE",
@@ -107,6 +119,7 @@ async def prepare_node(state: InvoiceState) -> Dict[str, Any]:
         "normalized_invoice": normalized_invoice,
         "flags": flags,
         "enrichment_tool_used": enrichment_tool.name,
-        "updated_at": datetime.utcnow().isoformat(),
-        "bigtool_selections": bigtool_selections
+        "updated_at": utc_now_iso(),
+        # Merged into the state's selections by the field's reducer
+        "bigtool_selections": {"enrichment": enrichment_tool.name}
     }
@@ -3,9 +3,9 @@ RECONCILE Node - Build accounting entries
 Server: COMMON
 """
 import logging
-from datetime import datetime
 from typing import Dict, Any
-from src.models.state import InvoiceState
+from src.models.state import InvoiceState, MatchStatus, utc_now_iso
+from src.models.schemas import DecisionEnum
 from src.mcp.client import get_mcp_client, MCPServer
 
 logger = logging.getLogger(__name__)
@@ -19,16 +19,25 @@ async def reconcile_node(state: InvoiceState) -> Dict[str, Any]:
     Executed if invoice matched OR human accepted.
     Server: COMMON
     """
-    logger.info("=" * 50)
-    logger.info("STAGE: RECONCILE - Building accounting entries")
-    logger.info("=" * 50)
+    logger.info("=" * 50 + "\nSTAGE: RECONCILE - Building accounting entries\n" + "=" * 50)
+    
+    # The graph only routes here on a match or an ACCEPT; anything else
+    # (e.g. a direct call on a failed match) has nothing to book
+    if (state.get("match_result") == MatchStatus.FAILED
+            and state.get("human_decision") != DecisionEnum.ACCEPT):
+        logger.warning("Match FAILED and not accepted by a reviewer - skipping reconciliation")
+        return {
+            "current_stage": "RECONCILE",
+            "updated_at": utc_now_iso()
+        }
     
     mcp = get_mcp_client()
     
-    invoice_payload = state.get("invoice_payload", {})
+    invoice_payload = state["invoice_payload"]
     normalized_invoice = state.get("normalized_invoice", {})
     vendor_profile = state.get("vendor_profile", {})
     
+    invoice_id = invoice_payload.get("invoice_id")
     vendor_name = vendor_profile.get("normalized_name", invoice_payload.get("vendor_name", ""))
     amount = normalized_invoice.get("amount", invoice_payload.get("amount", 0))
     
@@ -38,7 +47,7 @@ async def reconcile_node(state: InvoiceState) -> Dict[str, Any]:
         ability="build_accounting_entries",
         params={
             "invoice": {
-                "invoice_id": invoice_payload.get("invoice_id"),
+                "invoice_id": invoice_id,
                 "amount": amount,
                 "currency": normalized_invoice.get("currency", "USD"),
                 "line_items": normalized_invoice.get("line_items", [])
@@ -48,24 +57,25 @@ async def reconcile_node(state: InvoiceState) -> Dict[str, Any]:
     )
     
     accounting_entries = accounting_result.data.get("accounting_entries", [])
+    now = utc_now_iso()
     
     reconciliation_report = {
-        "invoice_id": invoice_payload.get("invoice_id"),
+        "invoice_id": invoice_id,
         "vendor_name": vendor_name,
         "total_amount": amount,
         "entries_count": len(accounting_entries),
         "total_debit": accounting_result.data.get("total_debit", 0),
         "total_credit": accounting_result.data.get("total_credit", 0),
         "balanced": accounting_result.data.get("balanced", True),
-        "reconciled_at": datetime.utcnow().isoformat()
+        "reconciled_at": now
     }
     
-    logger.info(f"Created {len(accounting_entries)} accounting entries")
-    logger.info(f"Total debit: {reconciliation_report['total_debit']}, Total credit: {reconciliation_report['total_credit']}")
+    logger.info("Created %d accounting entries", len(accounting_entries))
+    logger.info("Total debit: %s, Total credit: %s", reconciliation_report['total_debit'], reconciliation_report['total_credit'])
     
     return {
         "current_stage": "RECONCILE",
         "accounting_entries": accounting_entries,
         "reconciliation_report": reconciliation_report,
-        "updated_at": datetime.utcnow().isoformat()
+        "updated_at": now
     }
@@ -2,15 +2,18 @@
 RETRIEVE Node - Fetch PO, GRN, and historical data from ERP
 Server: ATLAS
 """
+import asyncio
 import logging
-from datetime import datetime
 from typing import Dict, Any
-from src.models.state import InvoiceState
+from src.models.state import InvoiceState, utc_now_iso
 from src.mcp.client import get_mcp_client, MCPServer
 from src.bigtool.picker import get_bigtool_picker
 
 logger = logging.getLogger(__name__)
 
+# Bigtool candidates: ERP connectors
+_ERP_POOL = ("sap_sandbox", "netsuite", "mock_erp")
+
 
 async def retrieve_node(state: InvoiceState) -> Dict[str, Any]:
     """
@@ -20,14 +23,12 @@ async def retrieve_node(state: InvoiceState) -> Dict[str, Any]:
     Bigtool selects ERP connector (SAP / NetSuite / Mock ERP)
     Server: ATLAS
     """
-    logger.info("=" * 50)
-    logger.info("STAGE: RETRIEVE - Fetching ERP data")
-    logger.info("=" * 50)
+    logger.info("=" * 50 + "\nSTAGE: RETRIEVE - Fetching ERP data\n" + "=" * 50)
     
     mcp = get_mcp_client()
     bigtool = get_bigtool_picker()
     
-    invoice_payload = state.get("invoice_payload", {})
+    invoice_payload = state["invoice_payload"]
     vendor_profile = state.get("vendor_profile", {})
     parsed_invoice = state.get("parsed_invoice", {})
     
@@ -44,9 +45,20 @@ async def retrieve_node(state: InvoiceState) -> Dict[str, Any]:
             "vendor_name": vendor_name,
             "amount": amount
         },
-        pool_hint=["sap_sandbox", "netsuite", "mock_erp"]
+        pool_hint=_ERP_POOL
     )
-    logger.info(f"Bigtool selected ERP connector: {erp_tool.name}")
+    logger.info("Bigtool selected ERP connector: %s", erp_tool.name)
+    
+    # Historical invoices don't depend on the POs, so fetch them alongside
+    # the whole PO -> GRN chain rather than only alongside fetch_po
+    history_task = asyncio.create_task(mcp.execute_ability(
+        server=MCPServer.ATLAS,
+        ability="fetch_history",
+        params={
+            "vendor_name": vendor_name,
+            "erp_tool": erp_tool.name
+        }
+    ))
     
     # Fetch POs via ATLAS server
     po_result = await mcp.execute_ability(
@@ -63,35 +75,24 @@ async def retrieve_node(state: InvoiceState) -> Dict[str, Any]:
     matched_pos = po_result.data.get("matched_pos", [])
     po_numbers = [po.get("po_number") for po in matched_pos]
     
-    # Fetch GRNs via ATLAS server
-    grn_result = await mcp.execute_ability(
-        server=MCPServer.ATLAS,
-        ability="fetch_grn",
-        params={
-            "po_numbers": po_numbers,
-            "erp_tool": erp_tool.name
-        }
+    # Fetch GRNs via ATLAS server (needs the PO numbers)
+    grn_result, history_result = await asyncio.gather(
+        mcp.execute_ability(
+            server=MCPServer.ATLAS,
+            ability="fetch_grn",
+            params={
+                "po_numbers": po_numbers,
+                "erp_tool": erp_tool.name
+            }
+        ),
+        history_task
     )
     
     matched_grns = grn_result.data.get("matched_grns", [])
     
-    # Fetch historical invoices via ATLAS server
-    history_result = await mcp.execute_ability(
-        server=MCPServer.ATLAS,
-        ability="fetch_history",
-        params={
-            "vendor_name": vendor_name,
-            "erp_tool": erp_tool.name
-        }
-    )
-    
     history = history_result.data.get("history", [])
     
-    logger.info(f"Retrieved {len(matched_pos)} POs, {len(matched_grns)} GRNs, {len(history)} historical invoices")
-    
-    # Update bigtool selections
-    bigtool_selections = state.get("bigtool_selections", {})
-    bigtool_selections["erp_connector"] = erp_tool.name
+    logger.info("Retrieved %d POs, %d GRNs, %d historical invoices", len(matched_pos), len(matched_grns), len(history))
     
     return {
         "current_stage": "RETRIEVE",
@@ -99,6 +100,7 @@ async def retrieve_node(state: InvoiceState) -> Dict[str, Any]:
         "matched_grns": matched_grns,
         "history": history,
         "erp_tool_used": erp_tool.name,
-        "updated_at": datetime.utcnow().isoformat(),
-        "bigtool_selections": bigtool_selections
+        "updated_at": utc_now_iso(),
+        # Merged into the state's selections by the field's reducer
+        "bigtool_selections": {"erp_connector": erp_tool.name}
     }
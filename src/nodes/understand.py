@@ -3,14 +3,16 @@ UNDERSTAND Node - OCR extraction and line item parsing
 Server: ATLAS (OCR), COMMON (parsing)
 """
 import logging
-from datetime import datetime
 from typing import Dict, Any
-from src.models.state import InvoiceState
+from src.models.state import InvoiceState, utc_now_iso
 from src.mcp.client import get_mcp_client, MCPServer
 from src.bigtool.picker import get_bigtool_picker
 
 logger = logging.getLogger(__name__)
 
+# Bigtool candidates: OCR engines
+_OCR_POOL = ("google_vision", "tesseract", "aws_textract")
+
 
 async def understand_node(state: InvoiceState) -> Dict[str, Any]:
     """
@@ -20,14 +22,12 @@ async def understand_node(state: InvoiceState) -> Dict[str, Any]:
     Bigtool selects OCR provider (Google Vision / Tesseract / AWS Textract)
     Server: ATLAS for OCR, COMMON for parsing
     """
-    logger.info("=" * 50)
-    logger.info("STAGE: UNDERSTAND - OCR extraction and parsing")
-    logger.info("=" * 50)
+    logger.info("=" * 50 + "\nSTAGE: UNDERSTAND - OCR extraction and parsing\n" + "=" * 50)
     
     mcp = get_mcp_client()
     bigtool = get_bigtool_picker()
     
-    invoice_payload = state.get("invoice_payload", {})
+    invoice_payload = state["invoice_payload"]
     attachments = invoice_payload.get("attachments", [])
     
     # Select OCR tool using Bigtool
@@ -37,9 +37,9 @@ async def understand_node(state: InvoiceState) -> Dict[str, Any]:
             "attachments": attachments,
             "amount": invoice_payload.get("amount", 0)
         },
-        pool_hint=["google_vision", "tesseract", "aws_textract"]
+        pool_hint=_OCR_POOL
     )
-    logger.info(f"Bigtool selected OCR: {ocr_tool.name}")
+    logger.info("Bigtool selected OCR: %s", ocr_tool.name)
     
     # Run OCR via ATLAS server
     ocr_result = await mcp.execute_ability(
@@ -52,13 +52,13 @@ async def understand_node(state: InvoiceState) -> Dict[str, Any]:
     )
     
     if not ocr_result.success:
-        logger.error(f"OCR extraction failed: {ocr_result.error}")
+        logger.error("OCR extraction failed: %s", ocr_result.error)
         return {
             "current_stage": "UNDERSTAND",
             "errors": state.get("errors", []) + [{
                 "stage": "UNDERSTAND",
                 "error": ocr_result.error,
-                "timestamp": datetime.utcnow().isoformat()
+                "timestamp": utc_now_iso()
             }]
         }
     
@@ -82,16 +82,13 @@ async def understand_node(state: InvoiceState) -> Dict[str, Any]:
         "parsed_dates": parse_result.data.get("parsed_dates", {})
     }
     
-    logger.info(f"Parsed {len(parsed_invoice['parsed_line_items'])} line items")
-    
-    # Update bigtool selections
-    bigtool_selections = state.get("bigtool_selections", {})
-    bigtool_selections["ocr"] = ocr_tool.name
+    logger.info("Parsed %d line items", len(parsed_invoice['parsed_line_items']))
     
     return {
         "current_stage": "UNDERSTAND",
         "parsed_invoice": parsed_invoice,
         "ocr_tool_used": ocr_tool.name,
-        "updated_at": datetime.utcnow().isoformat(),
-        "bigtool_selections": bigtool_selections
+        "updated_at": utc_now_iso(),
+        # Merged into the state's selections by the field's reducer
+        "bigtool_selections": {"ocr": ocr_tool.name}
     }
@@ -0,0 +1,15 @@
+"""
+Pytest configuration for the test suite
+"""
+try:
+    import uvloop
+except ImportError:  # Windows, or uvloop not installed
+    uvloop = None
+
+
+if uvloop is not None:
+    # pytest-asyncio rejects an empty answer from this hook, so it only
+    # exists when uvloop does
+    def pytest_asyncio_loop_factories(config, item):
+        """Run async tests on uvloop (the loop uvicorn picks for the app)"""
+        return {"uvloop": uvloop.new_event_loop}
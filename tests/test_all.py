@@ -7,15 +7,26 @@ import json
 import sys
 import os
 import pytest
+import numpy as np
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from dotenv import load_dotenv
 load_dotenv()
 
-# Configure pytest-asyncio
-pytestmark = pytest.mark.asyncio(loop_scope="function")
+# Under pytest-xdist (pytest -n auto) every worker resets and fills the
+# database, so each gets its own SQLite file instead of sharing demo.db
+_XDIST_WORKER = os.getenv("PYTEST_XDIST_WORKER")
+if _XDIST_WORKER and os.getenv("DATABASE_URL", "sqlite:///./demo.db").startswith("sqlite"):
+    os.environ["DATABASE_URL"] = f"sqlite:///./demo-{_XDIST_WORKER}.db"
 
+# Imported once at collection (after the DATABASE_URL override above, since
+# importing the nodes pulls in the database module)
+from src.nodes import (
+    intake_node, understand_node, prepare_node, retrieve_node,
+    match_two_way_node, checkpoint_hitl_node, hitl_decision_node,
+    reconcile_node, approve_node, posting_node, notify_node, complete_node
+)
 
 # ============================================================================
 # TEST DATA
@@ -54,6 +65,32 @@ SAMPLE_INVOICE_FAILED = {
 }
 
 
+def make_invoices(n: int, seed: int = 0):
+    """
+    Bulk numeric fixtures, column-wise: (qty, unit_price, total) arrays
+    
+    Checks that only need the numbers work on the arrays directly; use
+    invoice_dicts() where a test needs payload dicts.
+    """
+    rng = np.random.default_rng(seed)
+    qty = rng.integers(1, 20, n)
+    unit_price = rng.uniform(10, 10000, n).round(2)
+    return qty, unit_price, qty * unit_price
+
+
+def invoice_dicts(qty, unit_price, total, base=SAMPLE_INVOICE_MATCHED):
+    """Single-line invoice payloads built from make_invoices() columns"""
+    return [
+        {
+            **base,
+            "invoice_id": f"TEST-INV-BULK-{i}",
+            "amount": t,
+            "line_items": [{"desc": "Bulk item", "qty": q, "unit_price": u, "total": t}]
+        }
+        for i, (q, u, t) in enumerate(zip(qty.tolist(), unit_price.tolist(), total.tolist()))
+    ]
+
+
 # ============================================================================
 # 1. BIGTOOL TESTS
 # ============================================================================
@@ -152,6 +189,112 @@ async def test_mcp_client():
     print("✅ ATLAS fetch_po: PASSED")
 
 
+@pytest.mark.asyncio
+async def test_mcp_result_cache():
+    """Pure abilities are memoized; timestamped ones are not"""
+    from src.mcp.client import get_mcp_client, MCPServer
+    
+    mcp = get_mcp_client()
+    
+    # Pure abilities are memoized on (server, ability, params)
+    for _ in range(2):
+        result = await mcp.execute_ability(MCPServer.COMMON, "normalize_vendor", {"vendor_name": "  test vendor  "})
+    assert result.data.get("normalized_name") == "TEST VENDOR"
+    assert mcp.get_execution_log()[-1].get("cached") is True
+    print("✅ MCP result cache: PASSED")
+    
+    # validate_schema is timestamped, so never served from the result cache
+    for _ in range(2):
+        await mcp.execute_ability(MCPServer.COMMON, "validate_schema", {"invoice_payload": SAMPLE_INVOICE_MATCHED})
+    assert not mcp.get_execution_log()[-1].get("cached")
+    print("✅ validate_schema not cached: PASSED")
+    
+    # Log entries keep the params / result keys at any log level
+    entry = mcp.get_execution_log()[-1]
+    assert list(entry["params_keys"]) == ["invoice_payload"] and "validation_ts" in entry["result_keys"]
+    print("✅ MCP execution log fields: PASSED")
+
+
+@pytest.mark.asyncio
+async def test_match_score_bulk_pos():
+    """Many candidate POs are scored the same way as the per-PO loop"""
+    from src.mcp.client import get_mcp_client, MCPServer
+    
+    mcp = get_mcp_client()
+    
+    # Many candidate POs take the vectorized scoring path; the exact-amount
+    # PO must win, as it would in the per-PO loop
+    _, _, totals = make_invoices(64)
+    pos = [{"po_number": f"PO-BULK-{i}", "amount": t} for i, t in enumerate(totals.tolist())]
+    target = int(np.argmax(totals))
+    result = await mcp.execute_ability(MCPServer.COMMON, "compute_match_score", {
+        "invoice": {"amount": float(totals[target]), "line_items": [{}]}, "matched_pos": pos, "threshold": 0.9
+    })
+    assert result.data["match_evidence"]["best_po"] == f"PO-BULK-{target}"
+    assert result.data["match_score"] == 0.92
+    print("✅ COMMON compute_match_score (bulk POs): PASSED")
+
+
+@pytest.mark.asyncio
+async def test_mcp_execute_batch():
+    """JSON-RPC batching over the http transport, with per-call fallback"""
+    # One POST per server, falling back to single calls for a server that
+    # rejects batches
+    import httpx
+    import src.mcp.client as mcp_module
+    from src.mcp.client import MCPClient, MCPServer
+    
+    posts = []
+    
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        posts.append(request.url.path)
+        if isinstance(body, list):
+            if request.url.path.endswith("/common"):
+                return httpx.Response(405)
+            return httpx.Response(200, json=[
+                {"jsonrpc": "2.0", "id": call["id"], "result": {"echo": call["params"]["ability"]}}
+                for call in body
+            ])
+        return httpx.Response(200, json={"echo": body["ability"]})
+    
+    batch_client = MCPClient()
+    batch_client._http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    original_transport = mcp_module.MCP_TRANSPORT
+    mcp_module.MCP_TRANSPORT = "http"
+    try:
+        results = await batch_client.execute_batch([
+            (MCPServer.ATLAS, "fetch_po", {}),
+            (MCPServer.ATLAS, "fetch_history", {}),
+            (MCPServer.COMMON, "compute_flags", {}),
+            (MCPServer.COMMON, "validate_schema", {}),
+        ])
+    finally:
+        mcp_module.MCP_TRANSPORT = original_transport
+        await batch_client.aclose()
+    assert [r.data.get("echo") for r in results] == ["fetch_po", "fetch_history", "compute_flags", "validate_schema"]
+    assert posts.count("/mcp/atlas") == 1 and posts.count("/mcp/common") == 3
+    assert MCPServer.COMMON in batch_client._no_batch
+    print("✅ MCP execute_batch: PASSED")
+
+
+def test_mcp_sync_client():
+    """Blocking bridge: one shared loop thread, used from several threads at once"""
+    from concurrent.futures import ThreadPoolExecutor
+    from src.mcp.client import MCPServer
+    from src.mcp.loop import get_mcp_client_sync
+    
+    sync_mcp = get_mcp_client_sync()
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        results = list(pool.map(
+            lambda name: sync_mcp.execute_ability_sync(MCPServer.COMMON, "normalize_vendor", {"vendor_name": name}),
+            ("a corp", "b corp", "c corp")
+        ))
+    assert [r.data.get("normalized_name") for r in results] == ["A CORP", "B CORP", "C CORP"]
+    assert get_mcp_client_sync() is sync_mcp
+    print("✅ MCP sync client: PASSED")
+
+
 # ============================================================================
 # 3. DATABASE TESTS
 # ============================================================================
@@ -190,6 +333,58 @@ def test_database():
     print("✅ Checkpoint CRUD: PASSED")
 
 
+@pytest.mark.asyncio
+async def test_database_reset():
+    """Schema reset (DDL, one transaction) and data reset (rows only)"""
+    from src.database import get_db
+    from src.database.models import CheckpointModel
+    
+    db = get_db()
+    
+    def add_checkpoint():
+        with db.get_session() as session:
+            session.add(CheckpointModel(
+                checkpoint_id="TEST-CHKPT-RESET", workflow_id="TEST-WF", invoice_id="TEST-INV",
+                vendor_name="Test", amount=1000, state_blob={}, status="PENDING"
+            ))
+    
+    def checkpoint_count():
+        with db.get_session() as session:
+            return session.query(CheckpointModel).count()
+    
+    add_checkpoint()
+    db.reset_schema()
+    assert checkpoint_count() == 0
+    print("✅ Schema reset: PASSED")
+    
+    # DELETE/TRUNCATE, schema kept
+    add_checkpoint()
+    await db.reset_all()
+    assert checkpoint_count() == 0
+    print("✅ Data reset: PASSED")
+
+
+@pytest.mark.asyncio
+async def test_write_queue():
+    """Concurrent write-behind submits share a commit"""
+    import uuid
+    from src.database import get_db, WriteQueue
+    from src.database.models import CheckpointModel
+    
+    db = get_db()
+    queue = WriteQueue(db)
+    ids = [f"TEST-CHKPT-{uuid.uuid4().hex[:8]}" for _ in range(3)]
+    await asyncio.gather(*(
+        queue.submit(i, [CheckpointModel(checkpoint_id=i, workflow_id="TEST-WF", status="PENDING")])
+        for i in ids
+    ))
+    await queue.wait(ids[0])
+    
+    with db.get_session() as session:
+        assert session.query(CheckpointModel).filter(CheckpointModel.checkpoint_id.in_(ids)).count() == 3
+    print("✅ Write-behind queue: PASSED")
+
+
 # ============================================================================
 # 4. NODE TESTS
 # ============================================================================
@@ -201,32 +396,25 @@ async def test_nodes():
     print("-" * 40)
     
     from src.models.state import InvoiceState
-    from src.nodes.intake import intake_node
-    from src.nodes.understand import understand_node
-    from src.nodes.prepare import prepare_node
-    from src.nodes.retrieve import retrieve_node
-    from src.nodes.match import match_two_way_node
-    from src.nodes.reconcile import reconcile_node
-    from src.nodes.approve import approve_node
-    from src.nodes.posting import posting_node
-    from src.nodes.notify import notify_node
-    from src.nodes.hitl_decision import hitl_decision_node
-    
-    # INTAKE
+    from src.bigtool.picker import get_bigtool_picker
+    from src.mcp.client import get_mcp_client
+    
+    # INTAKE / UNDERSTAND both read only the base state: run them together
     state: InvoiceState = {"workflow_id": "TEST", "invoice_payload": SAMPLE_INVOICE_MATCHED, "bigtool_selections": {}}
-    result = await intake_node(state)
-    assert result.get("validated") == True
+    intake_result, understand_result = await asyncio.gather(
+        intake_node(dict(state)), understand_node(dict(state))
+    )
+    assert intake_result.get("validated") == True
     print("✅ INTAKE node: PASSED")
-    
-    # UNDERSTAND
-    result = await understand_node(state)
-    assert result.get("parsed_invoice") is not None
+    assert understand_result.get("parsed_invoice") is not None
     print("✅ UNDERSTAND node: PASSED")
     
     # PREPARE
     state["parsed_invoice"] = {"line_items": []}
     result = await prepare_node(state)
     assert result.get("vendor_profile") is not None
+    assert result["vendor_profile"]["normalized_name"] == "TEST VENDOR CORP"
+    assert "risk_score" in result["flags"]
     print("✅ PREPARE node: PASSED")
     
     # RETRIEVE
@@ -239,28 +427,36 @@ async def test_nodes():
     state["normalized_invoice"] = {"amount": 10000, "line_items": []}
     state["matched_pos"] = [{"po_number": "PO-001", "amount": 10000}]
     result = await match_two_way_node(state)
-    assert "match_score" in result
+    assert result.current_stage == "MATCH_TWO_WAY" and 0 <= result.match_score <= 1
     print("✅ MATCH_TWO_WAY node: PASSED")
     
-    # RECONCILE
-    result = await reconcile_node(state)
-    assert "accounting_entries" in result
+    # RECONCILE / APPROVE are independent given the matched state. POSTING
+    # and NOTIFY stay sequential: they check the tail of the shared logs
+    reconcile_result, skipped_result, approve_result = await asyncio.gather(
+        reconcile_node(dict(state)),
+        # A failed match nobody accepted books nothing
+        reconcile_node({**state, "match_result": "FAILED"}),
+        approve_node(dict(state))
+    )
+    assert "accounting_entries" in reconcile_result
+    assert "accounting_entries" not in skipped_result
     print("✅ RECONCILE node: PASSED")
-    
-    # APPROVE
-    result = await approve_node(state)
-    assert "approval_status" in result
+    assert "approval_status" in approve_result
     print("✅ APPROVE node: PASSED")
     
-    # POSTING
+    # POSTING (reuses the ERP connector picked earlier in the run)
     state["accounting_entries"] = []
+    state["bigtool_selections"] = {"erp_connector": "netsuite"}
     result = await posting_node(state)
     assert "posted" in result
+    assert get_bigtool_picker().get_selection_log()[-1]["selected_tool"] == "netsuite"
     print("✅ POSTING node: PASSED")
     
     # NOTIFY
     result = await notify_node(state)
     assert "notified_parties" in result
+    await get_mcp_client().flush_background()
+    assert [e["ability"] for e in get_mcp_client().get_execution_log()[-2:]] == ["notify_vendor", "notify_finance_team"]
     print("✅ NOTIFY node: PASSED")
     
     # HITL_DECISION - ACCEPT
@@ -279,6 +475,99 @@ async def test_nodes():
     print("✅ HITL_DECISION (REJECT): PASSED")
 
 
+@pytest.mark.asyncio
+async def test_match_config():
+    """MATCH_THRESHOLD / TWO_WAY_TOLERANCE_PCT overrides apply after refresh_match_config"""
+    import os
+    from src.nodes.match import refresh_match_config
+    
+    # Equal amounts without line items score 0.8: below the default 0.90
+    state = {
+        "workflow_id": "TEST-WF-MATCHCFG", "invoice_payload": SAMPLE_INVOICE_MATCHED,
+        "normalized_invoice": {"amount": 10000, "line_items": []},
+        "matched_pos": [{"po_number": "PO-001", "amount": 10000}]
+    }
+    saved = {k: os.environ.get(k) for k in ("MATCH_THRESHOLD", "TWO_WAY_TOLERANCE_PCT")}
+    try:
+        os.environ.update(MATCH_THRESHOLD="0.75", TWO_WAY_TOLERANCE_PCT="7")
+        refresh_match_config()
+        result = await match_two_way_node(state)
+        assert result.match_result == "MATCHED" and result.tolerance_pct == 7
+        assert result.match_evidence["threshold_used"] == 0.75
+    finally:
+        for k, v in saved.items():
+            if v is None:
+                os.environ.pop(k, None)
+            else:
+                os.environ[k] = v
+        refresh_match_config()
+    
+    result = await match_two_way_node(state)
+    assert result.match_evidence["threshold_used"] == float(saved["MATCH_THRESHOLD"] or "0.90")
+    print("✅ MATCH_TWO_WAY config refresh: PASSED")
+
+
+@pytest.mark.asyncio
+async def test_prepare_paths():
+    """PREPARE builds the same vendor profile with and without the composite ability"""
+    import src.nodes.prepare as prepare_module
+    from src.mcp.client import get_mcp_client
+    
+    mcp = get_mcp_client()
+    state = {"workflow_id": "TEST", "invoice_payload": SAMPLE_INVOICE_MATCHED,
+             "parsed_invoice": {"line_items": []}, "bigtool_selections": {}}
+    
+    profiles = {}
+    original = prepare_module.PREPARE_VENDOR_COMPOSITE
+    try:
+        for composite, abilities in [(False, {"normalize_vendor", "enrich_vendor", "compute_flags"}),
+                                     (True, {"enrich_vendor", "prepare_vendor"})]:
+            prepare_module.PREPARE_VENDOR_COMPOSITE = composite
+            mcp.clear_log()
+            result = await prepare_node(state)
+            assert {e["ability"] for e in mcp.get_execution_log()} == abilities
+            assert "risk_score" in result["flags"]
+            profiles[composite] = result["vendor_profile"]
+    finally:
+        prepare_module.PREPARE_VENDOR_COMPOSITE = original
+    
+    assert profiles[False].keys() == profiles[True].keys()
+    assert profiles[False]["normalized_name"] == profiles[True]["normalized_name"] == "TEST VENDOR CORP"
+    print("✅ PREPARE (separate and composite abilities): PASSED")
+
+@pytest.mark.asyncio
+async def test_notify_delivery():
+    """NOTIFY reports its sends as queued and audits each outcome once known"""
+    from sqlalchemy import select
+    from src.database import get_db
+    from src.database.models import AuditLogModel
+    from src.mcp.client import get_mcp_client, MCPResponse, MCPServer
+    from src.nodes.notify import _delivery_recorder
+    
+    db = get_db()
+    await db.reset_all()
+    
+    state = {"workflow_id": "WF-NOTIFY", "invoice_payload": SAMPLE_INVOICE_MATCHED, "bigtool_selections": {}}
+    result = await notify_node(state)
+    assert result["notify_status"]["vendor_delivery"] == "queued"
+    assert result["notify_status"]["finance_delivery"] == "queued"
+    
+    await get_mcp_client().flush_background()
+    # A send that never succeeded is audited as failed, not as delivered
+    await _delivery_recorder("WF-NOTIFY")(MCPResponse(
+        success=False, data={}, server=MCPServer.ATLAS, ability="notify_vendor", error="smtp down"
+    ))
+    
+    async with db.get_async_session() as session:
+        rows = (await session.execute(
+            select(AuditLogModel.details)
+            .where(AuditLogModel.workflow_id == "WF-NOTIFY", AuditLogModel.stage == "NOTIFY")
+        )).scalars().all()
+    outcomes = sorted((d["recipient"], d["delivery"]) for d in rows)
+    assert outcomes == [("finance", "delivered"), ("vendor", "delivered"), ("vendor", "failed")]
+    print("✅ NOTIFY delivery outcomes audited: PASSED")
+
+
 # ============================================================================
 # 5. WORKFLOW TESTS
 # ============================================================================
@@ -290,13 +579,12 @@ async def test_workflow():
     print("-" * 40)
     
     from src.database import get_db
-    from src.graph.workflow import InvoiceProcessingGraph
+    from src.graph.workflow import get_invoice_graph
     
     db = get_db()
-    db.drop_tables()
-    db.create_tables()
+    await db.reset_all()
     
-    graph = InvoiceProcessingGraph()
+    graph = get_invoice_graph()
     
     # Test workflow execution
     result = await graph.start_workflow(SAMPLE_INVOICE_MATCHED)
@@ -315,8 +603,7 @@ async def test_workflow():
         print("✅ Workflow resume (ACCEPT): PASSED")
     
     # Test REJECT scenario
-    db.drop_tables()
-    db.create_tables()
+    await db.reset_all()
     
     result = await graph.start_workflow(SAMPLE_INVOICE_FAILED)
     if result.get("status") == "PAUSED":
@@ -325,6 +612,125 @@ async def test_workflow():
         print("✅ Workflow resume (REJECT): PASSED")
 
 
+@pytest.mark.asyncio
+async def test_fast_path():
+    """The direct node-call fast path follows the same edges as the graph"""
+    from src.graph.workflow import is_fast_path_candidate, run_fast_path
+    
+    small_invoice = {**SAMPLE_INVOICE_MATCHED, "amount": 5000.00}
+    assert is_fast_path_candidate(small_invoice)
+    assert not is_fast_path_candidate(SAMPLE_INVOICE_MATCHED)
+    final_state = await run_fast_path({
+        "workflow_id": "WF-FASTPATH", "invoice_payload": small_invoice,
+        "errors": [], "bigtool_selections": {}
+    })
+    if final_state.get("match_result") == "FAILED":
+        assert final_state["current_stage"] == "CHECKPOINT_HITL"
+    else:
+        assert final_state["current_stage"] == "COMPLETE"
+        assert final_state["final_payload"]["workflow_id"] == "WF-FASTPATH"
+    print("✅ Workflow fast path: PASSED")
+
+
+@pytest.mark.asyncio
+async def test_node_cache():
+    """An identical invoice reuses UNDERSTAND's result; a different one runs it"""
+    from src.graph.workflow import get_invoice_graph, NODE_CACHE_TTL
+    from src.mcp.client import get_mcp_client
+    import uuid
+    
+    if NODE_CACHE_TTL <= 0:
+        print("⏭️ Node cache disabled (NODE_CACHE_TTL=0): SKIPPED")
+        return
+    
+    graph = get_invoice_graph()
+    mcp = get_mcp_client()
+    invoice = {**SAMPLE_INVOICE_MATCHED, "invoice_id": f"TEST-CACHE-{uuid.uuid4().hex[:8]}"}
+    
+    def ocr_runs():
+        return sum(e["ability"] == "ocr_extract" for e in mcp.get_execution_log())
+    
+    mcp.clear_log()
+    await graph.start_workflow(invoice)
+    assert ocr_runs() == 1
+    await graph.start_workflow(dict(invoice))
+    assert ocr_runs() == 1
+    await graph.start_workflow({**invoice, "amount": invoice["amount"] + 1})
+    assert ocr_runs() == 2
+    print("✅ UNDERSTAND node cache (hit / miss): PASSED")
+
+
+@pytest.mark.asyncio
+async def test_start_many():
+    """Batch entry point: results come back in payload order"""
+    from src.graph.workflow import get_invoice_graph
+    
+    graph = get_invoice_graph()
+    batch = invoice_dicts(*make_invoices(3))
+    results = await graph.start_many(batch, concurrency=2)
+    assert len(results) == 3 and len({r["workflow_id"] for r in results}) == 3
+    assert all(r.get("status") in ["COMPLETED", "PAUSED"] for r in results)
+    print("✅ Workflow batch start: PASSED")
+
+
+@pytest.mark.asyncio
+async def test_workflow_state_lookup():
+    """Persisted workflow state is readable through the sync and async getters"""
+    from src.graph.workflow import get_invoice_graph
+    
+    graph = get_invoice_graph()
+    result = await graph.start_workflow(SAMPLE_INVOICE_MATCHED)
+    workflow_id = result["workflow_id"]
+    
+    # The sync getter blocks on the database, so keep it off the loop
+    state = await asyncio.to_thread(graph.get_workflow_state, workflow_id)
+    assert state["workflow_id"] == workflow_id
+    # Matching is randomized, so the run may have paused instead
+    assert state["current_stage"] in ("COMPLETE", "CHECKPOINT_HITL")
+    assert "match_score" in state
+    assert await graph.aget_workflow_state(workflow_id) == state
+    assert await asyncio.to_thread(graph.get_workflow_state, "WF-MISSING") == {}
+    
+    # A workflow waiting on HITL reports the pause, not its start-time state
+    result = await graph.start_workflow({**SAMPLE_INVOICE_FAILED, "amount": 0})
+    assert result.get("status") == "PAUSED"
+    state = await graph.aget_workflow_state(result["workflow_id"])
+    assert state["workflow_status"] == "PAUSED"
+    assert state["current_stage"] == "CHECKPOINT_HITL"
+    assert state["hitl_checkpoint_id"] == result["checkpoint_id"]
+    assert state["match_result"] == "FAILED"
+    print("✅ Workflow state lookup (sync / async, paused): PASSED")
+
+
+@pytest.mark.asyncio
+async def test_resume_claims_checkpoint():
+    """Concurrent decisions on one checkpoint resume the workflow only once"""
+    from src.database import get_db
+    from src.database.models import CheckpointModel
+    from src.graph.workflow import get_invoice_graph
+    
+    db = get_db()
+    await db.reset_all()
+    graph = get_invoice_graph()
+    
+    # No PO and no amount leaves nothing to match, so the workflow always pauses
+    result = await graph.start_workflow({**SAMPLE_INVOICE_FAILED, "amount": 0})
+    assert result.get("status") == "PAUSED"
+    checkpoint_id = result["checkpoint_id"]
+    
+    results = await asyncio.gather(
+        graph.resume_workflow(checkpoint_id, "ACCEPT", "reviewer-a"),
+        graph.resume_workflow(checkpoint_id, "ACCEPT", "reviewer-b")
+    )
+    errors = [r for r in results if r.get("status") == "ERROR"]
+    assert len(errors) == 1 and "already processed" in errors[0]["message"]
+    
+    async with db.get_async_session() as session:
+        checkpoint = await session.get(CheckpointModel, checkpoint_id)
+        assert checkpoint.status == "ACCEPTED" and checkpoint.decision_at is not None
+    print("✅ Checkpoint claimed by a single resume: PASSED")
+
+
 # ============================================================================
 # 6. API TESTS
 # ============================================================================
@@ -335,40 +741,85 @@ async def test_api():
     print("\n🌍 API TESTS")
     print("-" * 40)
     
-    from fastapi.testclient import TestClient
+    from httpx import AsyncClient, ASGITransport
     from main import app
     from src.database import get_db
     
     db = get_db()
-    db.drop_tables()
-    db.create_tables()
-    
-    client = TestClient(app)
-    
-    # Health check
-    response = client.get("/health")
-    assert response.status_code == 200
-    print("✅ GET /health: PASSED")
-    
-    # Start workflow
-    response = client.post("/api/workflow/start", json=SAMPLE_INVOICE_MATCHED)
-    assert response.status_code == 200
-    print("✅ POST /api/workflow/start: PASSED")
+    await db.reset_all()
+    
+    # The app runs in-process on this test's loop; independent probes go
+    # out together
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        health, start, pending, pending_page, selections, selections_page, mcp_log = await asyncio.gather(
+            client.get("/health"),
+            client.post("/api/workflow/start", json=SAMPLE_INVOICE_MATCHED),
+            client.get("/api/human-review/pending"),
+            client.get("/api/human-review/pending", params={"limit": 1}),
+            client.get("/api/bigtool/selections"),
+            client.get("/api/bigtool/selections", params={"limit": 1, "offset": 0}),
+            client.get("/api/mcp/execution-log")
+        )
+        
+        # Health check
+        assert health.status_code == 200
+        print("✅ GET /health: PASSED")
+        
+        # Start workflow
+        assert start.status_code == 200
+        print("✅ POST /api/workflow/start: PASSED")
+        
+        # List pending reviews
+        assert pending.status_code == 200
+        assert pending_page.status_code == 200
+        assert len(pending_page.json()) <= 1
+        print("✅ GET /api/human-review/pending: PASSED")
+        
+        # Bigtool selections
+        assert selections.status_code == 200
+        assert selections_page.status_code == 200
+        assert len(selections_page.json()["selections"]) <= 1
+        print("✅ GET /api/bigtool/selections: PASSED")
+        
+        # MCP execution log
+        assert mcp_log.status_code == 200
+        print("✅ GET /api/mcp/execution-log: PASSED")
+        
+        # HTML pages are loaded once during lifespan startup (ASGITransport
+        # doesn't run the lifespan, so enter it here)
+        async with app.router.lifespan_context(app):
+            for path in ["/", "/review", "/dashboard"]:
+                response = await client.get(path)
+                assert response.status_code == 200
+                assert response.headers["content-type"].startswith("text/html")
+                cached = await client.get(path, headers={"If-None-Match": response.headers["etag"]})
+                assert cached.status_code == 304
+    print("✅ GET /, /review, /dashboard: PASSED")
+
+
+@pytest.mark.asyncio
+async def test_review_details():
+    """The review details carry the invoice being reviewed"""
+    from httpx import AsyncClient, ASGITransport
+    from main import app
+    from src.database import get_db
+    from src.graph.workflow import get_invoice_graph
     
-    # List pending reviews
-    response = client.get("/api/human-review/pending")
-    assert response.status_code == 200
-    print("✅ GET /api/human-review/pending: PASSED")
+    await get_db().reset_all()
     
-    # Bigtool selections
-    response = client.get("/api/bigtool/selections")
-    assert response.status_code == 200
-    print("✅ GET /api/bigtool/selections: PASSED")
+    # No PO and no amount leaves nothing to match, so the workflow always pauses
+    invoice = {**SAMPLE_INVOICE_FAILED, "amount": 0}
+    result = await get_invoice_graph().start_workflow(invoice)
+    assert result.get("status") == "PAUSED"
     
-    # MCP execution log
-    response = client.get("/api/mcp/execution-log")
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.get(f"/api/human-review/{result['checkpoint_id']}")
     assert response.status_code == 200
-    print("✅ GET /api/mcp/execution-log: PASSED")
+    state_data = response.json()["state_data"]
+    assert state_data["invoice_payload"]["invoice_id"] == invoice["invoice_id"]
+    assert state_data["invoice_payload"]["line_items"] == invoice["line_items"]
+    assert "matched_pos" in state_data
+    print("✅ GET /api/human-review/{checkpoint_id}: PASSED")
 
 
 # ============================================================================
@@ -382,40 +833,42 @@ async def test_sample_invoices():
     print("-" * 40)
     
     from src.database import get_db
-    from src.graph.workflow import InvoiceProcessingGraph
-    
-    # Load sample invoices
-    with open("sample_invoices.json", "r") as f:
-        data = json.load(f)
+    from src.graph.workflow import get_invoice_graph
     
-    invoices = data.get("invoices", [])
+    # Load sample invoices (parsed once per process by the config loader;
+    # the first read and parse happen off the loop)
+    from src.config import load_json
+    invoices = (await asyncio.to_thread(load_json, "sample_invoices.json")).get("invoices", [])
     print(f"Testing {len(invoices)} sample invoices...")
     
     db = get_db()
-    db.drop_tables()
-    db.create_tables()
+    await db.reset_all()
     
-    passed = 0
-    paused_checkpoints = []
+    # Sample invoices are independent: run them concurrently on the shared graph
+    graph = get_invoice_graph()
+    results = await graph.start_many(invoices, concurrency=8)
     
-    for invoice in invoices:
-        graph = InvoiceProcessingGraph()
-        result = await graph.start_workflow(invoice)
-        
-        if result.get("status") in ["COMPLETED", "PAUSED"]:
-            passed += 1
-            if result.get("status") == "PAUSED":
-                paused_checkpoints.append((invoice["invoice_id"], result.get("checkpoint_id")))
+    ok = [(invoice, result) for invoice, result in zip(invoices, results)
+          if result.get("status") in ["COMPLETED", "PAUSED"]]
+    passed = len(ok)
+    paused_checkpoints = [(invoice["invoice_id"], result.get("checkpoint_id"))
+                          for invoice, result in ok if result.get("status") == "PAUSED"]
     
+    assert passed == len(invoices)
     print(f"✅ {passed}/{len(invoices)} invoices processed successfully")
     
     # Resume paused workflows
     if paused_checkpoints:
         print(f"  Resuming {len(paused_checkpoints)} paused workflows...")
-        for inv_id, chkpt_id in paused_checkpoints:
-            graph = InvoiceProcessingGraph()
-            resume_result = await graph.resume_workflow(chkpt_id, "ACCEPT", "test-reviewer")
-            assert resume_result.get("status") in ["COMPLETED", "ERROR"]
+        # Same bound as the starts above
+        sem = asyncio.Semaphore(8)
+        
+        async def _resume(chkpt_id):
+            async with sem:
+                return await graph.resume_workflow(chkpt_id, "ACCEPT", "test-reviewer")
+        
+        resume_results = await asyncio.gather(*(_resume(c) for _, c in paused_checkpoints))
+        assert all(r.get("status") in ["COMPLETED", "ERROR"] for r in resume_results)
         print(f"✅ All paused workflows resumed: PASSED")
 
 
@@ -428,37 +881,57 @@ def test_requirements():
     print("\n📝 REQUIREMENTS VALIDATION")
     print("-" * 40)
     
-    # Check all 12 nodes exist
-    from src.nodes import (
-        intake_node, understand_node, prepare_node, retrieve_node,
-        match_two_way_node, checkpoint_hitl_node, hitl_decision_node,
-        reconcile_node, approve_node, posting_node, notify_node, complete_node
-    )
-    
-    nodes = [intake_node, understand_node, prepare_node, retrieve_node,
-             match_two_way_node, checkpoint_hitl_node, hitl_decision_node,
-             reconcile_node, approve_node, posting_node, notify_node, complete_node]
-    
-    assert all(callable(n) for n in nodes)
-    print("✅ All 12 LangGraph nodes exist: PASSED")
-    
-    # Check graph has all nodes
-    from src.graph.workflow import create_invoice_graph
-    graph = create_invoice_graph()
     expected = ["intake", "understand", "prepare", "retrieve", "match_two_way",
                 "checkpoint_hitl", "hitl_decision", "reconcile", "approve", 
                 "posting", "notify", "complete"]
+    
+    # Check all 12 nodes are exported by the (already imported) package
+    import src.nodes
+    missing = [n for n in expected if not callable(getattr(src.nodes, f"{n}_node", None))]
+    assert not missing, missing
+    print("✅ All 12 LangGraph nodes exist: PASSED")
+    
+    # Check graph has all nodes (the shared graph's builder, not a new one)
+    from src.graph.workflow import get_invoice_graph
+    graph = get_invoice_graph().graph
     assert all(n in graph.nodes for n in expected)
     print("✅ Graph contains all 12 nodes: PASSED")
     
     # Check workflow.json
-    with open("workflow.json", "r") as f:
-        config = json.load(f)
+    from src.config import load_workflow
+    config = load_workflow()
     assert config.get("version") == "1.0"
     assert len(config.get("stages", [])) == 12
     print("✅ workflow.json valid with 12 stages: PASSED")
 
 
+# ============================================================================
+# 9. CONFIG LOADER TESTS
+# ============================================================================
+
+def test_config_loader():
+    """Test cached workflow.json / sample_invoices.json loading"""
+    print("\n⚙️ CONFIG LOADER TESTS")
+    print("-" * 40)
+    
+    from src.config import load_json, load_workflow, clear_cache
+    
+    clear_cache()
+    wf = load_workflow()
+    assert wf.get("version") == "1.0"
+    assert load_workflow() is wf
+    print("✅ workflow.json cached: PASSED")
+    
+    samples = load_json("sample_invoices.json")
+    assert len(samples.get("invoices", [])) == 5
+    assert load_json("sample_invoices.json") is samples
+    print("✅ sample_invoices.json cached: PASSED")
+    
+    clear_cache()
+    assert load_workflow() is not wf
+    print("✅ Cache cleared: PASSED")
+
+
 # ============================================================================
 # RUN ALL TESTS
 # ============================================================================
@@ -469,29 +942,51 @@ async def run_all_tests():
     print("🧪 COMPLETE TEST SUITE - LangGraph Invoice Processing Agent")
     print("=" * 70)
     
-    # 1. Bigtool
-    test_bigtool()
+    # 1-3 and 8 touch disjoint subsystems (only Database uses the tables,
+    # created up front), so they run together with the sync ones on threads
+    from src.database import get_db
+    get_db().create_tables()
+    await asyncio.gather(
+        asyncio.to_thread(test_bigtool),        # 1. Bigtool
+        test_mcp_client(),                      # 2. MCP Client
+        asyncio.to_thread(test_database),       # 3. Database
+        asyncio.to_thread(test_requirements),   # 8. Requirements
+    )
     
-    # 2. MCP Client
-    await test_mcp_client()
+    # 2. MCP Client (shared client state, so after the group above)
+    await test_mcp_result_cache()
+    await test_match_score_bulk_pos()
+    await test_mcp_execute_batch()
+    # Waits on the sync client's own loop thread, not this loop
+    test_mcp_sync_client()
     
-    # 3. Database
-    test_database()
+    # 3. Database (resets the tables)
+    await test_database_reset()
+    await test_write_queue()
     
     # 4. Nodes
     await test_nodes()
+    await test_match_config()
+    await test_prepare_paths()
+    await test_notify_delivery()
     
     # 5. Workflow
     await test_workflow()
+    await test_fast_path()
+    await test_node_cache()
+    await test_start_many()
+    await test_resume_claims_checkpoint()
+    await test_workflow_state_lookup()
     
     # 6. API
     await test_api()
+    await test_review_details()
     
     # 7. Sample Invoices
     await test_sample_invoices()
     
-    # 8. Requirements
-    test_requirements()
+    # 9. Config loader
+    test_config_loader()
     
     print("\n" + "=" * 70)
     print("✅ ALL TESTS PASSED!")
@@ -499,4 +994,8 @@ async def run_all_tests():
 
 
 if __name__ == "__main__":
-    asyncio.run(run_all_tests())
+    try:
+        import uvloop
+    except ImportError:
+        uvloop = None
+    (uvloop.run if uvloop else asyncio.run)(run_all_tests())
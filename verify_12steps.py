@@ -6,12 +6,8 @@ from dotenv import load_dotenv
 load_dotenv()
 
 from src.database import get_db
-from src.graph.workflow import InvoiceProcessingGraph
-
-# Reset database
-db = get_db()
-db.drop_tables()
-db.create_tables()
+from src.graph.workflow import get_invoice_graph
+from src.mcp.client import get_mcp_client
 
 # Invoice that will FAIL match (no PO, triggers HITL)
 invoice = {
@@ -28,7 +24,20 @@ invoice = {
 }
 
 async def verify_12_steps():
-    graph = InvoiceProcessingGraph()
+    # Start and resume share the compiled graph and the MCP client's pooled
+    # HTTP connections (opened on the first call, kept alive until the end)
+    graph = get_invoice_graph()
+    mcp = get_mcp_client()
+    # Empty the tables (no DDL) before the run
+    await get_db().reset_all()
+    try:
+        return await _run_12_steps(graph)
+    finally:
+        await mcp.flush_background()
+        await mcp.aclose()
+
+
+async def _run_12_steps(graph):
     
     print('=' * 70)
     print('VERIFYING 12-STEP WORKFLOW PATH')